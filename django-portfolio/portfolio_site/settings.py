@@ -3,6 +3,10 @@ Django settings for portfolio_site project.
 
 Generated by 'django-admin startproject' using Django 5.2.5.
 
+Every value that differs between environments is read with decouple's
+config(): from the process environment first, then from a local .env file
+(gitignored) next to manage.py.
+
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/topics/settings/
 
@@ -12,215 +16,74 @@ https://docs.djangoproject.com/en/5.2/ref/settings/
 
 from pathlib import Path
 
-from decouple import config
-
-# below your imports, read keys like this:
-RAZORPAY_KEY_ID = config('RAZORPAY_KEY_ID', default=None)
-RAZORPAY_KEY_SECRET = config('RAZORPAY_KEY_SECRET', default=None)
-RAZORPAY_WEBHOOK_SECRET = config('RAZORPAY_WEBHOOK_SECRET', default=None)
-
+from decouple import Csv, config
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
-STATICFILES_DIRS = [ BASE_DIR / 'static' ]
-
-
-# Quick-start development settings - unsuitable for production
-# See https://docs.djangoproject.com/en/5.2/howto/deployment/checklist/
 
 # SECURITY WARNING: keep the secret key used in production secret!
-SECRET_KEY = 'django-insecure-ucr7q68dcl5b*mfdyh65e4)hdbrrrc-3^bmppi@im!_$o!agvi'
+SECRET_KEY = config("SECRET_KEY", default="django-insecure-ucr7q68dcl5b*mfdyh65e4)hdbrrrc-3^bmppi@im!_$o!agvi")
 
 # SECURITY WARNING: don't run with debug turned on in production!
-DEBUG = True
-
-ALLOWED_HOSTS = ["*"]
-
-CSRF_TRUSTED_ORIGINS = [
-    "http://127.0.0.1:8000",
-    "http://localhost:8000",
-    # if using https in dev:
-    # "https://127.0.0.1:8000",
-    # "https://your.dev.domain"
-]
-
-
-
-# Application definition
-
-INSTALLED_APPS = [
-    'django.contrib.admin',
-    'django.contrib.auth',
-    'django.contrib.sites',          # required by allauth
-    'django.contrib.contenttypes',
-    'django.contrib.sessions',
-    'django.contrib.messages',
-    'django.contrib.staticfiles',
-    'core',
-    'shop',
-    # "django.contrib.sites",          # required
-    "allauth",
-    "allauth.account",
-    "allauth.socialaccount",
-    "allauth.socialaccount.providers.google",
-
-]
-
-MIDDLEWARE = [
-    'django.middleware.security.SecurityMiddleware',
-    'django.contrib.sessions.middleware.SessionMiddleware',
-    'django.middleware.common.CommonMiddleware',
-    'django.middleware.csrf.CsrfViewMiddleware',
-    'django.contrib.auth.middleware.AuthenticationMiddleware',
-    'allauth.account.middleware.AccountMiddleware',             # <-- add this line
-    'django.contrib.messages.middleware.MessageMiddleware',
-    'django.middleware.clickjacking.XFrameOptionsMiddleware',
-]
-
-ROOT_URLCONF = 'portfolio_site.urls'
-
-TEMPLATES = [
-    {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
-        'DIRS': [BASE_DIR / 'templates'],  # ← keep this even if unused
-        'APP_DIRS': True,                  # ← must be True
-        'OPTIONS': {
-            'context_processors': [
-                'django.template.context_processors.debug',
-                'django.template.context_processors.request',
-                'django.contrib.auth.context_processors.auth',
-                'django.contrib.messages.context_processors.messages',
-                'shop.context_processors.cart_counts',
-
-            ],
-        },
-    },
-]
-
-
-SITE_ID = 1
-
-# 3) Authentication backends (make sure these are present)
-AUTHENTICATION_BACKENDS = (
-    "django.contrib.auth.backends.ModelBackend",  # default
-    "allauth.account.auth_backends.AuthenticationBackend",  # allauth
-)
-
-# 4) allauth basic settings (tweak as you like)
-ACCOUNT_EMAIL_REQUIRED = True
-ACCOUNT_EMAIL_VERIFICATION = "optional"   # or "mandatory"
-ACCOUNT_AUTHENTICATION_METHOD = "username_email"
-ACCOUNT_USERNAME_REQUIRED = True
-LOGIN_REDIRECT_URL = "/"   # where to go after login/signup
-ACCOUNT_ADAPTER = None     # keep default unless customizing
-
-# 5) Social provider config — placeholders (use real client id/secret in admin or env)
-SOCIALACCOUNT_PROVIDERS = {
-    "google": {
-        "SCOPE": [
-            "profile",
-            "email",
-        ],
-        "AUTH_PARAMS": {"access_type": "online"},
-        # Optionally you can configure 'APP' here for client id & secret,
-        # but it's usually done via Django admin > Social applications
-    }
-}
-
-# 6) (Optional) Email backend for local dev — you can keep your existing settings
-# Example (console backend for dev):
-EMAIL_BACKEND = "django.core.mail.backends.console.EmailBackend"
-# Redirects after login/logout
-LOGIN_REDIRECT_URL = 'shop:product_list'
-LOGOUT_REDIRECT_URL = 'shop:product_list'
-
-
-WSGI_APPLICATION = 'portfolio_site.wsgi.application'
-
-
-# Database
-# https://docs.djangoproject.com/en/5.2/ref/settings/#databases
-
-DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
-    }
-}
-
-
-# Password validation
-# https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
-
-AUTH_PASSWORD_VALIDATORS = [
-    {
-        'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',
-    },
-    {
-        'NAME': 'django.contrib.auth.password_validation.MinimumLengthValidator',
-    },
-    {
-        'NAME': 'django.contrib.auth.password_validation.CommonPasswordValidator',
-    },
-    {
-        'NAME': 'django.contrib.auth.password_validation.NumericPasswordValidator',
-    },
-]
-
-
-# Internationalization
-# https://docs.djangoproject.com/en/5.2/topics/i18n/
-
-LANGUAGE_CODE = 'en-us'
-
-TIME_ZONE = 'UTC'
-
-USE_I18N = True
-
-USE_TZ = True
-
-
-# Static files (CSS, JavaScript, Images)
-# https://docs.djangoproject.com/en/5.2/howto/static-files/
-
-STATIC_URL = 'static/'
-STATIC_ROOT = BASE_DIR / 'staticfiles'
-
-# Default primary key field type
-# https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
-
-DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
-
-
-"""
-Django settings for portfolio_site project.
-
-Generated by 'django-admin startproject' using Django 5.2.5.
-"""
-
-from pathlib import Path
-from decouple import config
-
-# Build paths inside the project like this: BASE_DIR / 'subdir'.
-BASE_DIR = Path(__file__).resolve().parent.parent
-
-# Read secrets from environment (use python-decouple .env in dev)
-# SECRET_KEY = config("SECRET_KEY", default="dev-secret-replace-this-in-production")
-
 DEBUG = config("DEBUG", default=True, cast=bool)
 
 ALLOWED_HOSTS = config("ALLOWED_HOSTS", default="*", cast=lambda v: [h.strip() for h in v.split(",") if h.strip()])
 
+CSRF_TRUSTED_ORIGINS = config("CSRF_TRUSTED_ORIGINS", default="http://127.0.0.1:8000,http://localhost:8000",
+                              cast=Csv())
+
 # Razorpay keys from env
 RAZORPAY_KEY_ID = config("RAZORPAY_KEY_ID", default=None)
 RAZORPAY_KEY_SECRET = config("RAZORPAY_KEY_SECRET", default=None)
 RAZORPAY_WEBHOOK_SECRET = config("RAZORPAY_WEBHOOK_SECRET", default=None)
 
+# Thread pool for blocking SMTP / Razorpay calls (shop/offload.py)
+BLOCKING_IO_WORKERS = config("BLOCKING_IO_WORKERS", default=8, cast=int)
+BLOCKING_IO_TIMEOUT = config("BLOCKING_IO_TIMEOUT", default=30, cast=int)
+
 # Static files
 STATICFILES_DIRS = [BASE_DIR / "static"]
 STATIC_URL = "static/"
 STATIC_ROOT = BASE_DIR / "staticfiles"
 
+# collectstatic writes content-hashed copies (base.3f2a9c1b7d4e.css) plus a
+# manifest, and .gz/.br variants of text assets (brotli is optional);
+# {% static %} resolves to the hashed name when DEBUG is off.
+STORAGES = {
+    "default": {"BACKEND": "django.core.files.storage.FileSystemStorage"},
+    "staticfiles": {"BACKEND": "shop.staticfiles.CompressedManifestStaticFilesStorage"},
+}
+
+# Uploaded files (product images and their derivatives, shop/images.py).
+# Served by Django only when DEBUG is on; put the web server in front of
+# MEDIA_ROOT otherwise. Derivative names are content-hashed, so
+# MEDIA_URL + "products/" can be cached as immutable.
+MEDIA_URL = "media/"
+MEDIA_ROOT = BASE_DIR / config("MEDIA_ROOT", default="media")
+
+# Prerendered anonymous pages (home, catalog, products), written by
+# "manage.py prerender" and kept current on product / review changes.
+# Served by shop.prerender.PrerenderedPagesMiddleware while the directory
+# exists; a front proxy can serve it directly instead (see shop/prerender.py).
+PRERENDER_ROOT = BASE_DIR / config("PRERENDER_ROOT", default="prerendered")
+
+# Widths (px) of the WebP/JPEG variants behind {% product_image %} srcsets
+PRODUCT_IMAGE_WIDTHS = config("PRODUCT_IMAGE_WIDTHS", default="240,480,720,1080",
+                              cast=lambda v: tuple(int(w) for w in v.split(",") if w.strip()))
+
+# Cache lifetime for hashed static files (their URL changes with content)
+STATIC_IMMUTABLE_MAX_AGE = config("STATIC_IMMUTABLE_MAX_AGE", default=60 * 60 * 24 * 365, cast=int)
+
+# Dynamic response compression (shop.middleware.CompressionMiddleware)
+COMPRESSION_GZIP_LEVEL = config("COMPRESSION_GZIP_LEVEL", default=6, cast=int)
+COMPRESSION_BROTLI_QUALITY = config("COMPRESSION_BROTLI_QUALITY", default=4, cast=int)
+COMPRESSION_MIN_SIZE = config("COMPRESSION_MIN_SIZE", default=500, cast=int)
+COMPRESSION_BREACH_PROTECTION = config("COMPRESSION_BREACH_PROTECTION", default="pad")  # pad | skip | off
+
+# "Sign in with Google" (allauth). Off drops the provider app, its URLs and
+# its imports (requests & co.) from every worker; the buttons disappear.
+SOCIAL_LOGIN_GOOGLE = config("SOCIAL_LOGIN_GOOGLE", default=True, cast=bool)
+
 # Application definition
 INSTALLED_APPS = [
     # Django contrib apps
@@ -239,16 +102,25 @@ INSTALLED_APPS = [
     # Third-party
     "allauth",
     "allauth.account",
-    "allauth.socialaccount",
-    "allauth.socialaccount.providers.google",
+    "allauth.socialaccount",        # kept either way: SocialApp / SocialAccount tables and the adapter
 ]
+if SOCIAL_LOGIN_GOOGLE:
+    INSTALLED_APPS.append("allauth.socialaccount.providers.google")
 
 MIDDLEWARE = [
     "django.middleware.security.SecurityMiddleware",
+    "shop.staticfiles.StaticFilesMiddleware",  # serves STATIC_ROOT before URL resolution
+    "shop.prerender.PrerenderedPagesMiddleware",  # cookie-less visitors get PRERENDER_ROOT pages
+    "shop.middleware.CompressionMiddleware",   # gzip/br for HTML + JSON (see shop/middleware.py)
+    "shop.middleware.SlowQueryMiddleware",     # request / URL name for the slow-query log
+    "shop.middleware.AllocationBudgetMiddleware",  # only with MEMORY_REQUEST_BUDGET_KB (shop/memory.py)
+    "shop.middleware.ReplicaPinMiddleware",    # outside sessions, so session writes pin too
+    "shop.middleware.SessionStatsMiddleware",  # Server-Timing: session bytes / writes
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
+    "shop.profiler.ProfilerMiddleware",  # staff-flagged requests only; needs request.user
     "allauth.account.middleware.AccountMiddleware",  # must come after AuthenticationMiddleware
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
@@ -260,8 +132,16 @@ TEMPLATES = [
     {
         "BACKEND": "django.template.backends.django.DjangoTemplates",
         "DIRS": [BASE_DIR / "templates"],
-        "APP_DIRS": True,
+        "APP_DIRS": False,  # app_directories is listed in "loaders" below
         "OPTIONS": {
+            # Cached loader that strips comments / indentation from .html
+            # sources once, at compile time (shop/loaders.py)
+            "loaders": [
+                ("shop.loaders.MinifyingCachedLoader", [
+                    "django.template.loaders.filesystem.Loader",
+                    "django.template.loaders.app_directories.Loader",
+                ]),
+            ],
             "context_processors": [
                 "django.template.context_processors.debug",
                 "django.template.context_processors.request",   # REQUIRED by django-allauth
@@ -271,6 +151,7 @@ TEMPLATES = [
                 "django.template.context_processors.tz",
                 "django.contrib.messages.context_processors.messages",
                 "shop.context_processors.cart_counts",          # your custom context processor
+                "shop.context_processors.social_login",
             ],
         },
     },
@@ -279,13 +160,105 @@ TEMPLATES = [
 WSGI_APPLICATION = "portfolio_site.wsgi.application"
 
 # Database
+# SQLite tuned for concurrent web traffic: WAL lets readers run alongside the
+# single writer, busy_timeout makes writers queue instead of failing with
+# "database is locked", and IMMEDIATE transactions take the write lock up
+# front so two read-then-write transactions can't deadlock on the upgrade.
+SQLITE_BUSY_TIMEOUT = config("SQLITE_BUSY_TIMEOUT", default=20, cast=int)  # seconds
+SQLITE_PRAGMAS = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",          # durable at checkpoints; safe with WAL
+    "busy_timeout": SQLITE_BUSY_TIMEOUT * 1000,
+    "mmap_size": config("SQLITE_MMAP_SIZE", default=128 * 1024 * 1024, cast=int),
+    "cache_size": -config("SQLITE_CACHE_KB", default=20000, cast=int),  # negative = KiB
+    "temp_store": "MEMORY",
+}
+
 DATABASES = {
     "default": {
         "ENGINE": "django.db.backends.sqlite3",
-        "NAME": BASE_DIR / "db.sqlite3",
+        "NAME": BASE_DIR / config("DATABASE_NAME", default="db.sqlite3"),
+        "CONN_MAX_AGE": config("DB_CONN_MAX_AGE", default=600, cast=int),
+        "CONN_HEALTH_CHECKS": True,
+        "OPTIONS": {
+            "timeout": SQLITE_BUSY_TIMEOUT,
+            # DEFERRED restores SQLite's default (no write serialization)
+            "transaction_mode": config("SQLITE_TRANSACTION_MODE", default="IMMEDIATE"),
+            "init_command": ";".join(f"PRAGMA {k}={v}" for k, v in SQLITE_PRAGMAS.items()),
+        },
     }
 }
 
+# Optional read replica for the catalog / review pages (shop/routers.py).
+# Locally: DATABASE_REPLICA_NAME=db-replica.sqlite3 plus
+# "python manage.py sync_replica --interval 5" to keep the copy fresh.
+DATABASE_REPLICA_NAME = config("DATABASE_REPLICA_NAME", default="")
+if DATABASE_REPLICA_NAME:
+    DATABASES["replica"] = {
+        **DATABASES["default"],
+        "NAME": BASE_DIR / DATABASE_REPLICA_NAME,
+        "TEST": {"MIRROR": "default"},
+    }
+DATABASE_ROUTERS = ["shop.routers.PrimaryReplicaRouter"]
+REPLICA_PIN_SECONDS = config("REPLICA_PIN_SECONDS", default=10, cast=int)
+
+# Slow-query log (shop/slowlog.py): statements slower than SLOW_QUERY_MS,
+# with the view, code frame and template node that ran them, go to an
+# in-process ring buffer and to a rotating JSON-lines file ("" = buffer
+# only). "python manage.py slow_queries" ranks them by query shape.
+# Statements touching a SLOW_QUERY_REDACT table (sessions, accounts, OAuth
+# tokens, orders, profiles, addresses) are recorded without their parameters
+# or literals.
+SLOW_QUERY_LOG = config("SLOW_QUERY_LOG", default=True, cast=bool)
+SLOW_QUERY_MS = config("SLOW_QUERY_MS", default=100, cast=float)
+SLOW_QUERY_LOG_FILE = config("SLOW_QUERY_LOG_FILE", default=str(BASE_DIR / "logs" / "slow_queries.log"))
+SLOW_QUERY_REDACT = config(
+    "SLOW_QUERY_REDACT",
+    default="django_session,auth_user,shop_order,shop_profile,shop_address,"
+            "account_emailaddress,socialaccount_socialaccount,socialaccount_socialtoken",
+    cast=Csv(),
+)
+
+# On-demand request profiling for staff (shop/profiler.py): ?__profile=1 or
+# an X-Profile token from /shop/staff/profiles/. Profiles are kept in
+# PROFILE_ROOT, least recently used evicted beyond the count / size caps.
+PROFILE_ROOT = BASE_DIR / config("PROFILE_ROOT", default="profiles")
+PROFILE_MAX_COUNT = config("PROFILE_MAX_COUNT", default=200, cast=int)
+PROFILE_MAX_MB = config("PROFILE_MAX_MB", default=200, cast=int)
+
+# Memory diagnostics (shop/memory.py): MEMORY_TRACE runs tracemalloc from
+# startup (keeping MEMORY_TRACE_FRAMES frames per allocation); a non-zero
+# MEMORY_REQUEST_BUDGET_KB measures every request and logs views whose peak
+# allocation exceeds it. Snapshots and diffs: /shop/staff/memory/ or
+# "python manage.py memory_report".
+MEMORY_TRACE = config("MEMORY_TRACE", default=False, cast=bool)
+MEMORY_TRACE_FRAMES = config("MEMORY_TRACE_FRAMES", default=8, cast=int)
+MEMORY_REQUEST_BUDGET_KB = config("MEMORY_REQUEST_BUDGET_KB", default=0, cast=int)
+
+# Cache shared by all workers (sessions, review feeds, rating summaries,
+# facets, idempotency keys): CACHE_URL=redis://host:6379/0. Without it each
+# process gets its own local-memory cache, which is only right for a single
+# worker (runserver); shop/sessions.py then keeps sessions in the database,
+# and with DEBUG off "manage.py check" / migrate fail with shop.E001.
+CACHE_URL = config("CACHE_URL", default="")
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.redis.RedisCache" if CACHE_URL
+        else "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": CACHE_URL,
+    }
+}
+# e.g. "shop.E001" for a single-process deployment without CACHE_URL (shop/checks.py)
+SILENCED_SYSTEM_CHECKS = config("SILENCED_SYSTEM_CHECKS", default="", cast=Csv())
+
+# Sessions: cache-first, diffed, write-behind store with a compact cart
+# encoding (shop/sessions.py). The cache and write-behind parts are only
+# used when SESSION_CACHE_ALIAS is a shared cache (see CACHE_URL).
+SESSION_ENGINE = "shop.sessions"
+SESSION_SERIALIZER = "shop.sessions.CompactSerializer"
+SESSION_WRITE_BEHIND_SECONDS = config("SESSION_WRITE_BEHIND_SECONDS", default=30, cast=int)
+SESSION_STATS = config("SESSION_STATS", default=DEBUG, cast=bool)
+
 # Sites framework
 SITE_ID = 1
 
@@ -300,7 +273,9 @@ ACCOUNT_EMAIL_REQUIRED = True
 ACCOUNT_EMAIL_VERIFICATION = "optional"   # or "mandatory"
 ACCOUNT_AUTHENTICATION_METHOD = "username_email"
 ACCOUNT_USERNAME_REQUIRED = True
-ACCOUNT_ADAPTER = None     # keep default unless customizing
+ACCOUNT_ADAPTER = "allauth.account.adapter.DefaultAccountAdapter"
+SOCIALACCOUNT_ADAPTER = "shop.adapters.AutoSocialAccountAdapter"
+SOCIALACCOUNT_AUTO_SIGNUP = True
 
 # Social (Google) provider defaults (can be set in admin SocialApp)
 SOCIALACCOUNT_PROVIDERS = {
@@ -313,13 +288,20 @@ SOCIALACCOUNT_PROVIDERS = {
     }
 }
 
-# Email backend for dev
-EMAIL_BACKEND = "django.core.mail.backends.console.EmailBackend"
-
 # Redirects after login/logout (use named routes)
 LOGIN_REDIRECT_URL = "shop:product_list"
 LOGOUT_REDIRECT_URL = "shop:product_list"
 
+# Email (SMTP; EMAIL_BACKEND=django.core.mail.backends.console.EmailBackend
+# prints messages instead, for local development)
+EMAIL_BACKEND = config("EMAIL_BACKEND", default="django.core.mail.backends.smtp.EmailBackend")
+EMAIL_HOST = config("EMAIL_HOST", default="smtp.gmail.com")
+EMAIL_PORT = config("EMAIL_PORT", default=587, cast=int)
+EMAIL_USE_TLS = config("EMAIL_USE_TLS", default=True, cast=bool)
+EMAIL_HOST_USER = config("EMAIL_HOST_USER", default="")
+EMAIL_HOST_PASSWORD = config("EMAIL_HOST_PASSWORD", default="")
+DEFAULT_FROM_EMAIL = EMAIL_HOST_USER
+
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
     {"NAME": "django.contrib.auth.password_validation.UserAttributeSimilarityValidator"},
@@ -335,30 +317,3 @@ USE_I18N = True
 USE_TZ = True
 
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
-
-# ACCOUNT_ADAPTER = None
-
-ACCOUNT_ADAPTER = "allauth.account.adapter.DefaultAccountAdapter"
-SOCIALACCOUNT_ADAPTER = "shop.adapters.AutoSocialAccountAdapter"
-SOCIALACCOUNT_AUTO_SIGNUP = True
-ACCOUNT_EMAIL_VERIFICATION = "optional"  # or "mandatory" if you want verification
-ACCOUNT_AUTHENTICATION_METHOD = "username_email"
-
-# settings.py (add or update)
-# settings.py — EMAIL config (production-ready)
-import os
-from pathlib import Path
-from dotenv import load_dotenv
-
-# Load local .env only in development
-BASE_DIR = Path(__file__).resolve().parent.parent
-load_dotenv(BASE_DIR / ".env")   # safe: dotenv reads .env but .env is gitignored
-
-EMAIL_BACKEND = 'django.core.mail.backends.smtp.EmailBackend'
-EMAIL_HOST = os.environ.get("EMAIL_HOST", "smtp.gmail.com")
-EMAIL_PORT = int(os.environ.get("EMAIL_PORT", 587))
-EMAIL_USE_TLS = os.environ.get("EMAIL_USE_TLS", "True").lower() in ("1", "true", "yes")
-EMAIL_HOST_USER = os.environ.get("EMAIL_HOST_USER", "")
-EMAIL_HOST_PASSWORD = os.environ.get("EMAIL_HOST_PASSWORD", "")
-DEFAULT_FROM_EMAIL = EMAIL_HOST_USER
-
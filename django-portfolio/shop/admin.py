@@ -1,5 +1,24 @@
-from django.contrib import admin 
+from django.contrib import admin, messages
+from django.core.exceptions import PermissionDenied
+from django.shortcuts import redirect
+from django.template.response import TemplateResponse
+from django.urls import path, reverse
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.http import urlencode
+from .admin_mixins import EstimatedCountMixin, IndexedSearchMixin, ProjectedListMixin, prefix_q
 from .models import Category, Product, Order, Feedback
+from . import exports, moderation
+
+
+def id_or_email_q(term, email_field):
+    """'123' / '#123' -> pk, anything with @ -> exact email (as typed or lowercased)."""
+    if term.lstrip("#").isdigit():
+        return Q(pk=int(term.lstrip("#")))
+    if "@" in term:
+        return Q(**{f"{email_field}__in": {term, term.lower()}})
+    return None
+
 
 @admin.register(Category)
 class CategoryAdmin(admin.ModelAdmin):
@@ -7,24 +26,75 @@ class CategoryAdmin(admin.ModelAdmin):
     list_display = ("name",)
 
 @admin.register(Product)
-class ProductAdmin(admin.ModelAdmin):
+class ProductAdmin(EstimatedCountMixin, ProjectedListMixin, IndexedSearchMixin, admin.ModelAdmin):
     prepopulated_fields = {"slug": ("name",)}
     list_display = ("name","category","price","is_active")
     list_filter = ("category","is_active")
+    list_related_fields = {"category": ("name",)}
+    search_help_text = "Product id, exact slug, or the start of the name (any case)."
+
+    def get_search_q(self, request, term):
+        if term.isdigit():
+            return Q(pk=int(term))
+        return Q(slug=term) | prefix_q("name", term)
 
 @admin.register(Order)
-class OrderAdmin(admin.ModelAdmin):
+class OrderAdmin(EstimatedCountMixin, ProjectedListMixin, IndexedSearchMixin, admin.ModelAdmin):
     list_display = ("id","email","total_amount","created_at")
+    list_filter = ("status",)
+    ordering = ("-created_at",)  # newest first along the (status, created_at) / (email, created_at) indexes
     readonly_fields = ("created_at",)
+    date_hierarchy = "created_at"
+    list_only_extra = ("status",)
+    search_help_text = "Order number or exact email address."
+    actions = ["export_csv", "export_jsonl"]
+
+    def get_search_q(self, request, term):
+        return id_or_email_q(term, "email")
+
+    # "Select all" + the status filter / date hierarchy export a whole range;
+    # rows are streamed, one per line item
+    def export_csv(self, request, queryset):
+        return exports.stream_response(request, "csv", exports.ORDER_COLUMNS, exports.order_rows(queryset), "orders")
+    export_csv.short_description = "Export selected orders with line items (CSV)"
+
+    def export_jsonl(self, request, queryset):
+        return exports.stream_response(request, "jsonl", exports.ORDER_COLUMNS, exports.order_rows(queryset), "orders")
+    export_jsonl.short_description = "Export selected orders with line items (JSON Lines)"
 
 # Feedback admin
+class RatingFilter(admin.SimpleListFilter):
+    """Fixed 1-5 choices; the default filter runs SELECT DISTINCT rating over every review."""
+    title = "rating"
+    parameter_name = "rating"
+
+    def lookups(self, request, model_admin):
+        return [(str(i), "★" * i) for i in range(5, 0, -1)]
+
+    def queryset(self, request, queryset):
+        if self.value() in {str(i) for i in range(1, 6)}:
+            return queryset.filter(rating=int(self.value()))
+        return queryset
+
+
 @admin.register(Feedback)
-class FeedbackAdmin(admin.ModelAdmin):
+class FeedbackAdmin(EstimatedCountMixin, ProjectedListMixin, IndexedSearchMixin, admin.ModelAdmin):
     list_display = ("id", "product", "rating", "short_reviewer", "approved", "created_at")
-    list_filter = ("approved", "rating", "created_at")
-    search_fields = ("reviewer_name", "reviewer_email", "message", "product__name")
+    list_filter = ("approved", RatingFilter)
     readonly_fields = ("created_at",)
-    actions = ["approve_reviews", "reject_reviews"]
+    actions = ["approve_reviews", "reject_reviews", "export_csv", "export_jsonl"]
+    date_hierarchy = "created_at"
+    list_related_fields = {"product": ("name",)}
+    list_only_extra = ("reviewer_name", "user__username", "user__first_name", "user__last_name")
+    search_help_text = "Review id, exact reviewer email, or the start of a product name (any case)."
+    change_list_template = "admin/shop/feedback/change_list.html"
+
+    def get_search_q(self, request, term):
+        q = id_or_email_q(term, "reviewer_email")
+        if q is not None:
+            return q
+        # resolve products on their name index instead of joining every review
+        return Q(product_id__in=Product.objects.filter(prefix_q("name", term)).values("id"))
 
     def short_reviewer(self, obj):
         if obj.user:
@@ -33,11 +103,83 @@ class FeedbackAdmin(admin.ModelAdmin):
     short_reviewer.short_description = "Reviewer"
 
     def approve_reviews(self, request, queryset):
-        updated = queryset.update(approved=True)
+        # update() skips auto_now, so bump updated_at for conditional GET
+        product_ids = list(queryset.values_list("product_id", flat=True).distinct())
+        updated = queryset.update(approved=True, updated_at=timezone.now())
+        moderation.after_review_change(product_ids)  # update() sends no signals
         self.message_user(request, f"{updated} review(s) approved.")
     approve_reviews.short_description = "Approve selected reviews"
 
     def reject_reviews(self, request, queryset):
-        updated = queryset.update(approved=False)
+        product_ids = list(queryset.values_list("product_id", flat=True).distinct())
+        updated = queryset.update(approved=False, updated_at=timezone.now())
+        moderation.after_review_change(product_ids)
         self.message_user(request, f"{updated} review(s) rejected/unapproved.")
     reject_reviews.short_description = "Reject / mark selected reviews unapproved"
+
+    def export_csv(self, request, queryset):
+        return exports.stream_response(request, "csv", exports.REVIEW_COLUMNS, exports.review_rows(queryset), "reviews")
+    export_csv.short_description = "Export selected reviews (CSV)"
+
+    def export_jsonl(self, request, queryset):
+        return exports.stream_response(request, "jsonl", exports.REVIEW_COLUMNS, exports.review_rows(queryset), "reviews")
+    export_jsonl.short_description = "Export selected reviews (JSON Lines)"
+
+    # -------------------------
+    # MODERATION QUEUE
+    # -------------------------
+    def get_urls(self):
+        urls = [
+            path(
+                "moderation/",
+                self.admin_site.admin_view(self.moderation_view),
+                name="shop_feedback_moderation",
+            ),
+        ]
+        return urls + super().get_urls()
+
+    def moderation_view(self, request):
+        if not self.has_change_permission(request):
+            raise PermissionDenied
+
+        params = {k: request.GET[k] for k in ("after", "product", "per_page") if request.GET.get(k)}
+
+        if request.method == "POST":
+            action = request.POST.get("action")
+            ids = [int(i) for i in request.POST.getlist("ids") if i.isdigit()]
+            if action not in ("approve", "reject"):
+                self.message_user(request, "Unknown action.", messages.ERROR)
+            elif action == "reject" and not self.has_delete_permission(request):
+                raise PermissionDenied
+            elif ids:
+                count = moderation.apply_batch(ids, action)
+                self.message_user(request, f"{count} review(s) {action}d.")
+            url = reverse("admin:shop_feedback_moderation")
+            return redirect(f"{url}?{urlencode(params)}" if params else url)
+
+        try:
+            per_page = min(int(params.get("per_page", 100)), moderation.MAX_PER_PAGE)
+        except ValueError:
+            per_page = 100
+        product_id = params.get("product")
+        rows, next_cursor = moderation.pending_page(
+            after=moderation.decode_cursor(params.get("after")),
+            product_id=int(product_id) if product_id and product_id.isdigit() else None,
+            per_page=max(per_page, 1),
+        )
+
+        next_url = None
+        if next_cursor:
+            next_url = "?" + urlencode({**params, "after": next_cursor})
+        first_url = "?" + urlencode({k: v for k, v in params.items() if k != "after"})
+
+        context = {
+            **self.admin_site.each_context(request),
+            "opts": self.model._meta,
+            "title": "Moderate pending reviews",
+            "rows": rows,
+            "next_url": next_url,
+            "first_url": first_url if "after" in params else None,
+            "can_reject": self.has_delete_permission(request),
+        }
+        return TemplateResponse(request, "admin/shop/feedback/moderation.html", context)
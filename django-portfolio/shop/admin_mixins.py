@@ -0,0 +1,281 @@
+# shop/admin_mixins.py
+"""
+ModelAdmin mixins that keep changelists fast on large tables.
+
+  EstimatedCountMixin   planner / ANALYZE row estimates instead of COUNT(*)
+  ProjectedListMixin    select_related + only() derived from list_display,
+                        and a date hierarchy that probes the date index
+  IndexedSearchMixin    exact / prefix lookups on indexed columns instead of
+                        LIKE '%term%' across joins
+"""
+import datetime
+
+from django.conf import settings
+from django.contrib.admin.views.main import ChangeList
+from django.core.exceptions import FieldDoesNotExist
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import ForeignKey, Max, Min, OneToOneField, Q
+from django.db.models.functions import Lower
+from django.db.models.lookups import GreaterThanOrEqual, LessThan
+from django.utils import timezone
+from django.utils.functional import cached_property
+
+# below this many rows an exact COUNT is cheap enough to keep
+ESTIMATE_THRESHOLD = getattr(settings, "ADMIN_COUNT_ESTIMATE_THRESHOLD", 100_000)
+# filtered changelists count at most this many rows ("10000+" beyond that)
+FILTERED_COUNT_LIMIT = getattr(settings, "ADMIN_FILTERED_COUNT_LIMIT", 10_000)
+
+
+# -------------------------
+# COUNTS
+# -------------------------
+def estimated_count(model, using="default"):
+    """
+    Row estimate from the database's own statistics, or None if it has none.
+    SQLite only has sqlite_stat1 after ANALYZE / PRAGMA optimize.
+    """
+    connection = connections[using]
+    table = model._meta.db_table
+    with connection.cursor() as cursor:
+        if connection.vendor == "postgresql":
+            cursor.execute("SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass", [table])
+        elif connection.vendor == "mysql":
+            cursor.execute(
+                "SELECT table_rows FROM information_schema.tables "
+                "WHERE table_schema = DATABASE() AND table_name = %s", [table],
+            )
+        elif connection.vendor == "sqlite":
+            cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'sqlite_stat1'")
+            if cursor.fetchone() is None:
+                return None
+            # stat is "<rows> <rows per key> ..." for every index on the table
+            cursor.execute("SELECT stat FROM sqlite_stat1 WHERE tbl = %s LIMIT 1", [table])
+        else:
+            return None
+        row = cursor.fetchone()
+    if not row or row[0] is None:
+        return None
+    estimate = int(str(row[0]).split()[0])
+    return estimate if estimate >= 0 else None
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Unfiltered querysets use the table estimate once it passes
+    ESTIMATE_THRESHOLD; filtered ones count at most FILTERED_COUNT_LIMIT + 1
+    rows, so a broad filter never scans the whole table just to number pages.
+    count_display is what the changelist shows: "~123456" for an estimate,
+    "10000+" for a capped count (admin/shop/pagination.html, search_form.html).
+    """
+    estimated = capped = False
+
+    @cached_property
+    def count(self):
+        qs = self.object_list
+        if not qs.query.where:
+            estimate = estimated_count(qs.model, qs.db)
+            if estimate is not None and estimate >= ESTIMATE_THRESHOLD:
+                self.estimated = True
+                return estimate
+            return qs.count()
+        count = qs[:FILTERED_COUNT_LIMIT + 1].count()
+        self.capped = count > FILTERED_COUNT_LIMIT
+        return count
+
+    @property
+    def count_display(self):
+        count = self.count
+        if self.estimated:
+            return f"~{count}"
+        if self.capped:
+            return f"{FILTERED_COUNT_LIMIT}+"
+        return str(count)
+
+
+class EstimatedCountMixin:
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False  # skips the second, unfiltered COUNT
+
+
+# -------------------------
+# PROJECTION
+# -------------------------
+class ProjectedChangeList(ChangeList):
+    def get_queryset(self, request, exclude_parameters=None):
+        qs = super().get_queryset(request, exclude_parameters)
+        fields = self.model_admin.get_list_only_fields(request)
+        if fields:
+            qs = qs.only(*fields)
+        return with_indexed_dates(qs) if self.date_hierarchy else qs
+
+
+class ProjectedListMixin:
+    """
+    Builds list_select_related and an only() projection from list_display.
+
+    list_related_fields: {fk name: related fields __str__ needs}; FKs not in
+        the map load the whole related row.
+    list_only_extra: fields used by callable columns and by __str__ (which
+        labels every row's action checkbox).
+    The projection is only applied to the changelist, never the change form.
+    """
+    list_related_fields = {}
+    list_only_extra = ()
+
+    def _list_foreign_keys(self):
+        fks = []
+        for name in self.list_display:
+            if not isinstance(name, str):
+                continue
+            try:
+                field = self.model._meta.get_field(name)
+            except FieldDoesNotExist:
+                continue
+            if isinstance(field, (ForeignKey, OneToOneField)):
+                fks.append(name)
+        return fks
+
+    def get_list_select_related(self, request):
+        fks = self._list_foreign_keys()
+        extra = {f.split("__")[0] for f in self.list_only_extra if "__" in f}
+        return list(dict.fromkeys(fks + sorted(extra))) or False
+
+    def get_list_only_fields(self, request):
+        opts = self.model._meta
+        fields = [opts.pk.name]
+        for name in self.list_display:
+            if not isinstance(name, str):
+                continue
+            try:
+                field = opts.get_field(name)
+            except FieldDoesNotExist:
+                continue
+            if not field.concrete:
+                continue
+            fields.append(name)
+            if field.is_relation and name in self.list_related_fields:
+                fields += [f"{name}__{f}" for f in self.list_related_fields[name]]
+            elif field.is_relation:
+                fields += [f"{name}__{f.name}" for f in field.related_model._meta.concrete_fields]
+        fields += list(self.list_only_extra)
+        date_field = getattr(self, "date_hierarchy", None)
+        if date_field:
+            fields.append(date_field)
+        return list(dict.fromkeys(fields))
+
+    def get_changelist(self, request, **kwargs):
+        return ProjectedChangeList
+
+
+# -------------------------
+# DATE HIERARCHY
+# -------------------------
+class IndexedDatesQuerySetMixin:
+    """
+    dates() / datetimes() for the admin date hierarchy without the
+    SELECT DISTINCT trunc(...) full scan: probe each candidate year / month /
+    day between Min and Max (both index seeks) with an EXISTS range query.
+    """
+
+    def _bucket_starts(self, field_name, kind):
+        bounds = self.aggregate(first=Min(field_name), last=Max(field_name))
+        first, last = bounds["first"], bounds["last"]
+        if first is None:
+            return []
+        if isinstance(first, datetime.datetime):
+            first, last = (timezone.localtime(v) if timezone.is_aware(v) else v for v in (first, last))
+            first, last = first.date(), last.date()
+
+        starts = []
+        day = first.replace(month=1, day=1) if kind == "year" else first.replace(day=1) if kind == "month" else first
+        while day <= last:
+            starts.append(day)
+            if kind == "year":
+                day = day.replace(year=day.year + 1)
+            elif kind == "month":
+                day = (day.replace(day=28) + datetime.timedelta(days=4)).replace(day=1)
+            else:
+                day += datetime.timedelta(days=1)
+        return starts
+
+    def _probe(self, field_name, kind, as_datetime):
+        starts = self._bucket_starts(field_name, kind)
+        if as_datetime:
+            starts = [_day_start(day) for day in starts]
+        found = []
+        for start, end in zip(starts, starts[1:] + [None]):
+            bucket = {f"{field_name}__gte": start}
+            if end is not None:
+                bucket[f"{field_name}__lt"] = end
+            if self.filter(**bucket).exists():
+                found.append(start)
+        return found
+
+    def dates(self, field_name, kind, order="ASC"):
+        found = self._probe(field_name, kind, as_datetime=False)
+        return found[::-1] if order == "DESC" else found
+
+    def datetimes(self, field_name, kind, order="ASC", tzinfo=None):
+        if kind not in ("year", "month", "day"):
+            return super().datetimes(field_name, kind, order, tzinfo)
+        found = self._probe(field_name, kind, as_datetime=True)
+        return found[::-1] if order == "DESC" else found
+
+
+def _day_start(day):
+    value = datetime.datetime.combine(day, datetime.time.min)
+    return timezone.make_aware(value) if settings.USE_TZ else value
+
+
+_indexed_dates_classes = {}
+
+
+def with_indexed_dates(qs):
+    cls = type(qs)
+    if cls not in _indexed_dates_classes:
+        _indexed_dates_classes[cls] = type(f"IndexedDates{cls.__name__}", (IndexedDatesQuerySetMixin, cls), {})
+    qs = qs._chain()
+    qs.__class__ = _indexed_dates_classes[cls]
+    return qs
+
+
+# -------------------------
+# SEARCH
+# -------------------------
+def prefix_q(field, term):
+    """
+    Case-insensitive prefix match as a plain range on LOWER(field), which an
+    index on Lower(field) serves (LIKE 'term%' only uses an index with the
+    right collation / operator class). SQLite's LOWER() folds ASCII only.
+    """
+    term = term.lower()
+    return Q(GreaterThanOrEqual(Lower(field), term), LessThan(Lower(field), term + "\uffff"))
+
+
+class IndexedSearchMixin:
+    """
+    Replaces search_fields with get_search_q(term), which should only use
+    exact or prefix_q lookups on indexed columns. Related models are
+    resolved with a subquery on their own index rather than a join.
+    """
+    search_fields = ("__indexed__",)  # anything non-empty shows the search box
+
+    def get_search_q(self, request, term):
+        """Default: the primary key, or the exact slug where the model has one. None finds nothing."""
+        if term.lstrip("#").isdigit():
+            return Q(pk=int(term.lstrip("#")))
+        try:
+            self.model._meta.get_field("slug")
+        except FieldDoesNotExist:
+            return None
+        return Q(slug=term)
+
+    def get_search_results(self, request, queryset, search_term):
+        term = search_term.strip()
+        if not term:
+            return queryset, False
+        q = self.get_search_q(request, term)
+        if not q:
+            return queryset.none(), False
+        return queryset.filter(q), False
@@ -1,6 +1,20 @@
 from django.apps import AppConfig
+from django.conf import settings
+from django.db.backends.signals import connection_created
 
 
 class ShopConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'shop'
+
+    def ready(self):
+        from . import checks, signals  # noqa: F401  (system checks, cache invalidation receivers)
+        from . import slowlog
+
+        if slowlog.ENABLED:
+            connection_created.connect(slowlog.attach, dispatch_uid="shop.slowlog")
+
+        if getattr(settings, "MEMORY_TRACE", False):
+            from . import memory
+
+            memory.start()  # as early as possible, so startup allocations are traced too
@@ -18,10 +18,8 @@ class Cart:
     """
     def __init__(self, request):
         self.session = request.session
-        cart = self.session.get(CART_SESSION_ID)
-        if not cart:
-            cart = self.session[CART_SESSION_ID] = {}
-        self.cart = cart
+        # an empty cart is not stored, so just looking at it never writes the session
+        self.cart = self.session.get(CART_SESSION_ID) or {}
 
     def add(self, product, quantity=1, update_quantity=False):
         """
@@ -41,7 +39,7 @@ class Cart:
             self.cart[pid]["quantity"] = int(self.cart[pid]["quantity"]) + int(quantity)
 
         # persist
-        self.session.modified = True
+        self.session[CART_SESSION_ID] = self.cart
 
     def remove(self, product):
         """
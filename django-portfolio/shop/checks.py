@@ -0,0 +1,33 @@
+# shop/checks.py
+"""
+System checks, registered in ShopConfig.ready (run by runserver, migrate and
+"manage.py check").
+"""
+from django.conf import settings
+from django.core.cache import caches
+from django.core.checks import Error, Tags, register
+
+from .sessions import PROCESS_LOCAL_CACHES
+
+# kept in the default cache and invalidated only through it, so every
+# worker must see the same cache
+SHARED_CACHE_USERS = (
+    "review feed versions and rendered feeds (shop/feeds.py)",
+)
+# as configured: the test runner turns DEBUG off before running the checks,
+# and a test run is one process anyway
+DEBUG = settings.DEBUG
+
+
+@register(Tags.caches)
+def shared_cache_check(app_configs, **kwargs):
+    cache = caches["default"]
+    if DEBUG or not isinstance(cache, PROCESS_LOCAL_CACHES):
+        return []
+    return [Error(
+        f"The default cache is process-local ({type(cache).__name__}): invalidations of "
+        f"{'; '.join(SHARED_CACHE_USERS)} only reach the worker that made them.",
+        hint="Set CACHE_URL to a cache shared by all workers (Redis), or add 'shop.E001' "
+             "to SILENCED_SYSTEM_CHECKS when the site runs as exactly one process.",
+        id="shop.E001",
+    )]
@@ -0,0 +1,163 @@
+# shop/conditional.py
+"""
+Cheap validators for conditional GET (ETag / Last-Modified).
+
+Every function here runs one or two aggregate queries and never renders a
+template, so a matching If-None-Match is answered with 304 before the view
+body runs (see django.views.decorators.http.condition).
+"""
+import hashlib
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from django.db.models import Count, Max, Q, Sum
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from django.views.decorators.http import condition
+
+from . import facets
+from .cart import CART_SESSION_ID
+from .models import Category, Feedback, Product, Wishlist
+
+
+def make_etag(*parts):
+    raw = "|".join(str(p) for p in parts)
+    return hashlib.md5(raw.encode(), usedforsecurity=False).hexdigest()
+
+
+def catalog_state():
+    """(max updated_at, row count) for products and categories; counts catch deletes."""
+    products = Product.objects.aggregate(last=Max("updated_at"), n=Count("id"))
+    categories = Category.objects.aggregate(last=Max("updated_at"), n=Count("id"))
+    last = max(filter(None, [products["last"], categories["last"]]), default=None)
+    return last, (products["last"], products["n"], categories["last"], categories["n"])
+
+
+def reviews_state(product_id, user=None):
+    """
+    Approved-review aggregates for one product in a single query. For a
+    signed-in user, their own (possibly unapproved) review is included too,
+    since product_detail shows it in the form.
+    """
+    aggregates = {
+        "last": Max("updated_at", filter=Q(approved=True)),
+        "n": Count("id", filter=Q(approved=True)),
+        "ratings": Sum("rating", filter=Q(approved=True)),
+    }
+    if user is not None and user.is_authenticated:
+        aggregates["mine"] = Max("updated_at", filter=Q(user=user))
+    agg = Feedback.objects.filter(product_id=product_id).aggregate(**aggregates)
+    return agg["last"], tuple(agg.get(k) for k in ("last", "n", "ratings", "mine"))
+
+
+def viewer_state(request):
+    """
+    Per-visitor bits the base template shows: who is signed in, the cart
+    badge and wishlist hearts. Read from the session / one aggregate.
+    """
+    user = request.user
+    cart = request.session.get(CART_SESSION_ID) or {}
+    cart_state = (len(cart), sum(int(i.get("quantity", 0)) for i in cart.values()))
+    if not user.is_authenticated:
+        return ("anon",) + cart_state
+    wishlist = Wishlist.objects.filter(user=user).aggregate(
+        n=Count("id"), last=Max("created_at"), ids=Sum("product_id")
+    )
+    return (user.pk, user.get_username()) + cart_state + (wishlist["n"], wishlist["last"], wishlist["ids"])
+
+
+def conditional_page(state_func, private=True):
+    """
+    Decorator: state_func(request, *args, **kwargs) returns
+    (last_modified or None, etag parts) or None for "no validators" (e.g. the
+    object does not exist and the view should 404 as usual).
+
+    The state is computed once per request and shared by the ETag and
+    Last-Modified hooks. Responses must be revalidated on every use; private
+    pages also get Cache-Control: private and Vary: Cookie.
+    """
+    def get_state(request, *args, **kwargs):
+        if not hasattr(request, "_conditional_state"):
+            request._conditional_state = state_func(request, *args, **kwargs)
+        return request._conditional_state
+
+    def etag_func(request, *args, **kwargs):
+        state = get_state(request, *args, **kwargs)
+        return make_etag(*state[1]) if state else None
+
+    def last_modified_func(request, *args, **kwargs):
+        state = get_state(request, *args, **kwargs)
+        return state[0] if state else None
+
+    def patch_headers(request, response):
+        if request.method in ("GET", "HEAD"):
+            if private:
+                patch_cache_control(response, private=True, no_cache=True)
+                patch_vary_headers(response, ("Cookie",))
+            else:
+                patch_cache_control(response, public=True, no_cache=True)
+        return response
+
+    def decorator(view):
+        conditional_view = condition(etag_func=etag_func, last_modified_func=last_modified_func)(view)
+
+        if iscoroutinefunction(view):
+            @wraps(view)
+            async def async_wrapper(request, *args, **kwargs):
+                # condition() calls the validator hooks synchronously; compute
+                # the state in a thread first so they only read request._conditional_state
+                await sync_to_async(get_state)(request, *args, **kwargs)
+                return patch_headers(request, await conditional_view(request, *args, **kwargs))
+
+            return async_wrapper
+
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            return patch_headers(request, conditional_view(request, *args, **kwargs))
+
+        return wrapper
+
+    return decorator
+
+
+# -------------------------
+# PER-VIEW STATE
+# -------------------------
+def product_list_state(request, slug=None):
+    _, catalog = catalog_state()
+    # Per-visitor bits only live in the ETag; Last-Modified is omitted so a
+    # client that only sends If-Modified-Since can't get a stale cart badge.
+    # facets.version() covers rating changes, which don't touch Product.updated_at
+    filters = (slug, request.GET.get("q", "")) + facets.parse(request.GET) + (facets.version(),)
+    return None, catalog + filters + viewer_state(request)
+
+
+def product_detail_state(request, slug):
+    product = Product.objects.filter(slug=slug).values("id").first()
+    if product is None:
+        return None
+    page_bits = (slug, request.GET.get("rpage", ""), request.headers.get("x-requested-with", ""))
+
+    if request.GET.get("rpage") and request.headers.get("x-requested-with") == "XMLHttpRequest":
+        # AJAX reviews page: only depends on the approved reviews
+        last, reviews = reviews_state(product["id"])
+        return last, reviews + page_bits
+
+    _, catalog = catalog_state()
+    _, reviews = reviews_state(product["id"], request.user)
+    return None, catalog + reviews + page_bits + viewer_state(request)
+
+
+def product_reviews_rss_state(request, product_id):
+    product = Product.objects.filter(id=product_id, is_active=True).values("updated_at").first()
+    if product is None:
+        return None
+    last, reviews = reviews_state(product_id)
+    last = max(filter(None, [last, product["updated_at"]]))
+    return last, (product_id, product["updated_at"]) + reviews
+
+
+def site_reviews_rss_state(request):
+    agg = Feedback.objects.filter(approved=True, product__is_active=True).aggregate(
+        last=Max("updated_at"), n=Count("id"), ratings=Sum("rating")
+    )
+    return agg["last"], ("all", agg["last"], agg["n"], agg["ratings"])
@@ -1,4 +1,6 @@
 # shop/context_processors.py
+from django.conf import settings
+
 from .cart import Cart
 
 def cart_counts(request):
@@ -19,3 +21,8 @@ def cart_counts(request):
         "cart_unique_items": unique,
         "cart_total_qty": total_qty,
     }
+
+
+def social_login(request):
+    """google_login: whether the Google provider is installed (SOCIAL_LOGIN_GOOGLE)."""
+    return {"google_login": settings.SOCIAL_LOGIN_GOOGLE}
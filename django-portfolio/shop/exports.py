@@ -0,0 +1,175 @@
+# shop/exports.py
+"""
+Streaming CSV / JSON Lines exports of orders (one row per line item) and
+reviews, for the admin actions and the export_data command.
+
+Rows come from a single values() query run with .iterator(chunk_size), so
+the joined product / user names arrive with each row and nothing is looked
+up per row; only one chunk of rows is held in memory at a time. Lines are
+packed into ~64 KB pieces before being written or streamed.
+
+Under ASGI a StreamingHttpResponse fed a plain generator is collected into
+a list first, so stream_response() hands it an async iterator instead that
+pulls one piece at a time from a thread.
+"""
+import csv
+import datetime
+
+from asgiref.sync import sync_to_async
+from django.core.handlers.asgi import ASGIRequest
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+
+from .models import Feedback, Order
+
+CHUNK_SIZE = 2000
+PIECE_SIZE = 64 * 1024
+
+# (column name, values() lookup)
+ORDER_COLUMNS = [
+    ("order_id", "id"),
+    ("created_at", "created_at"),
+    ("email", "email"),
+    ("status", "status"),
+    ("order_total", "total_amount"),
+    ("razorpay_order_id", "razorpay_order_id"),
+    ("razorpay_payment_id", "razorpay_payment_id"),
+    ("item_id", "items__id"),
+    ("product_id", "items__product_id"),
+    ("product_name", "items__product__name"),
+    ("unit_price", "items__price"),
+    ("quantity", "items__quantity"),
+]
+
+REVIEW_COLUMNS = [
+    ("review_id", "id"),
+    ("created_at", "created_at"),
+    ("product_id", "product_id"),
+    ("product_name", "product__name"),
+    ("rating", "rating"),
+    ("approved", "approved"),
+    ("username", "user__username"),
+    ("reviewer_name", "reviewer_name"),
+    ("reviewer_email", "reviewer_email"),
+    ("message", "message"),
+]
+
+FORMATS = {
+    "csv": ("text/csv; charset=utf-8", "csv"),
+    "jsonl": ("application/x-ndjson", "jsonl"),
+}
+
+
+# -------------------------
+# QUERIES
+# -------------------------
+def date_range_q(field, since=None, until=None):
+    """Half-open [since, until + 1 day) on an indexed datetime column (dates are local)."""
+    q = {}
+    if since:
+        q[f"{field}__gte"] = _start_of(since)
+    if until:
+        q[f"{field}__lt"] = _start_of(until + datetime.timedelta(days=1))
+    return q
+
+
+def _start_of(day):
+    return timezone.make_aware(datetime.datetime.combine(day, datetime.time.min))
+
+
+def order_rows(queryset=None, since=None, until=None, status=None):
+    """One row per line item (orders without items give one row with empty item columns)."""
+    qs = Order.objects.all() if queryset is None else queryset
+    qs = qs.filter(**date_range_q("created_at", since, until))
+    if status:
+        qs = qs.filter(status=status)
+    return (
+        qs.order_by("created_at", "id", "items__id")
+        .values_list(*(lookup for _, lookup in ORDER_COLUMNS))
+        .iterator(chunk_size=CHUNK_SIZE)
+    )
+
+
+def review_rows(queryset=None, since=None, until=None, approved=None):
+    qs = Feedback.objects.all() if queryset is None else queryset
+    qs = qs.filter(**date_range_q("created_at", since, until))
+    if approved is not None:
+        qs = qs.filter(approved=approved)
+    return (
+        qs.order_by("created_at", "id")
+        .values_list(*(lookup for _, lookup in REVIEW_COLUMNS))
+        .iterator(chunk_size=CHUNK_SIZE)
+    )
+
+
+# -------------------------
+# ENCODING
+# -------------------------
+class _Echo:
+    """csv.writer target that hands back the line instead of storing it."""
+
+    def write(self, value):
+        return value
+
+
+def _csv_cell(value):
+    if value is None:
+        return ""
+    if isinstance(value, datetime.datetime):
+        return value.isoformat()
+    # keep spreadsheet apps from evaluating user-entered text as a formula
+    if isinstance(value, str) and value[:1] in ("=", "+", "-", "@", "\t", "\r"):
+        return "'" + value
+    return value
+
+
+def csv_lines(columns, rows):
+    writer = csv.writer(_Echo())
+    yield writer.writerow([name for name, _ in columns])
+    for row in rows:
+        yield writer.writerow([_csv_cell(v) for v in row])
+
+
+def jsonl_lines(columns, rows):
+    names = [name for name, _ in columns]
+    encoder = DjangoJSONEncoder(ensure_ascii=False, separators=(",", ":"))
+    for row in rows:
+        yield encoder.encode(dict(zip(names, row))) + "\n"
+
+
+def encode(fmt, columns, rows):
+    """Bytes pieces of about PIECE_SIZE each."""
+    lines = csv_lines(columns, rows) if fmt == "csv" else jsonl_lines(columns, rows)
+    piece, size = [], 0
+    for line in lines:
+        piece.append(line)
+        size += len(line)
+        if size >= PIECE_SIZE:
+            yield "".join(piece).encode("utf-8")
+            piece, size = [], 0
+    if piece:
+        yield "".join(piece).encode("utf-8")
+
+
+# -------------------------
+# HTTP
+# -------------------------
+async def _pull(pieces):
+    it = iter(pieces)
+    # thread_sensitive (the default): every next() runs on the same thread,
+    # which owns the database cursor
+    next_piece = sync_to_async(lambda: next(it, None))
+    while (piece := await next_piece()) is not None:
+        yield piece
+
+
+def stream_response(request, fmt, columns, rows, filename):
+    content_type, extension = FORMATS[fmt]
+    pieces = encode(fmt, columns, rows)
+    if isinstance(request, ASGIRequest):
+        pieces = _pull(pieces)
+    response = StreamingHttpResponse(pieces, content_type=content_type)
+    stamp = timezone.localtime().strftime("%Y%m%d-%H%M")
+    response["Content-Disposition"] = f'attachment; filename="{filename}-{stamp}.{extension}"'
+    return response
@@ -0,0 +1,194 @@
+# shop/facets.py
+"""
+Category / price / rating facets for product_list.
+
+All counts for a page come from one aggregate over the active (and
+searched) products: one Count(filter=...) per facet value. Each facet's
+counts apply the *other* selected facets but not its own, so picking
+"₹500 – ₹1,000" still shows how many products each other price range has.
+Price ranges are a Case() bucket annotation; ratings use the denormalized
+Product.rating_avg (kept by shop.ratings.update), so every filter combination
+hits an index rather than joining reviews.
+
+Counts for pages with no search / price / rating filter are cached per
+category under the catalog version, which product, category and rating
+writes bump (see shop/signals.py).
+"""
+import time
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Case, Count, IntegerField, Q, Value, When
+from django.urls import reverse
+
+CACHE_TIMEOUT = getattr(settings, "FACET_CACHE_TIMEOUT", 60 * 60)
+# upper bounds of the price ranges; the last range is open-ended
+PRICE_BOUNDS = tuple(getattr(settings, "PRODUCT_PRICE_BUCKETS", (500, 1000, 5000)))
+RATING_STEPS = (4, 3, 2, 1)
+VERSION_KEY = "catalog:ver"
+
+
+# -------------------------
+# CATALOG VERSION
+# -------------------------
+def version():
+    ver = cache.get(VERSION_KEY)
+    if ver is None:
+        # not 1, so a recreated counter never matches entries cached under the old one
+        cache.add(VERSION_KEY, int(time.time() * 1000), None)
+        ver = cache.get(VERSION_KEY)
+    return ver
+
+
+def bump():
+    try:
+        cache.incr(VERSION_KEY)
+    except ValueError:
+        cache.set(VERSION_KEY, int(time.time() * 1000), None)
+
+
+# -------------------------
+# FILTERS
+# -------------------------
+def price_buckets():
+    """[(key, low, high), ...] e.g. ("500-1000", 500, 1000), ("5000-", 5000, None)."""
+    lows = (0,) + PRICE_BOUNDS
+    highs = PRICE_BOUNDS + (None,)
+    return [(f"{lo}-{hi or ''}", lo, hi) for lo, hi in zip(lows, highs)]
+
+
+def _price_label(lo, hi):
+    if hi is None:
+        return f"₹{lo:,} & up"
+    if not lo:
+        return f"Under ₹{hi:,}"
+    return f"₹{lo:,} – ₹{hi:,}"
+
+
+def parse(params):
+    """Selected price bucket key and minimum rating from the query string (invalid values are ignored)."""
+    price = params.get("price")
+    if price not in {key for key, _, _ in price_buckets()}:
+        price = None
+    try:
+        rating = int(params.get("rating", ""))
+    except ValueError:
+        rating = None
+    if rating not in RATING_STEPS:
+        rating = None
+    return price, rating
+
+
+def price_q(key):
+    for bucket, lo, hi in price_buckets():
+        if bucket == key:
+            q = Q(price__gte=lo)
+            return q & Q(price__lt=hi) if hi is not None else q
+    return Q()
+
+
+def rating_q(rating):
+    return Q(rating_avg__gte=rating) if rating else Q()
+
+
+def category_q(category):
+    return Q(category_id=category.id) if category else Q()
+
+
+def apply(queryset, category, price, rating):
+    return queryset.filter(category_q(category), price_q(price), rating_q(rating))
+
+
+# -------------------------
+# COUNTS
+# -------------------------
+def _count(q):
+    return Count("id", filter=q) if q else Count("id")
+
+
+def _aggregates(categories, category, price, rating):
+    cat, pr, rt = category_q(category), price_q(price), rating_q(rating)
+    aggregates = {"total": _count(cat & pr & rt)}
+    for c in categories:
+        aggregates[f"c{c.id}"] = _count(Q(category_id=c.id) & pr & rt)
+    for i, _ in enumerate(price_buckets()):
+        aggregates[f"p{i}"] = _count(Q(price_bucket=i) & cat & rt)
+    for step in RATING_STEPS:
+        aggregates[f"r{step}"] = _count(Q(rating_avg__gte=step) & cat & pr)
+    return aggregates
+
+
+def _bucketed(queryset):
+    whens = [When(price__lt=hi, then=Value(i)) for i, (_, _, hi) in enumerate(price_buckets()) if hi is not None]
+    return queryset.annotate(
+        price_bucket=Case(*whens, default=Value(len(PRICE_BOUNDS)), output_field=IntegerField())
+    )
+
+
+def _cache_key(category, query, price, rating):
+    if query or price or rating:
+        return None
+    return f"facets:{version()}:{category.slug if category else '*'}"
+
+
+def counts(queryset, categories, category=None, query="", price=None, rating=None):
+    """{"total": n, "c<id>": n, "p<i>": n, "r<step>": n} in one query (or from the cache)."""
+    key = _cache_key(category, query, price, rating)
+    found = cache.get(key) if key else None
+    if found is None:
+        if key:
+            queryset = queryset.using("default")  # cached: never from a lagging replica
+        found = _bucketed(queryset).aggregate(**_aggregates(categories, category, price, rating))
+        if key:
+            cache.set(key, found, CACHE_TIMEOUT)
+    return found
+
+
+async def acounts(queryset, categories, category=None, query="", price=None, rating=None):
+    key = _cache_key(category, query, price, rating)
+    found = await cache.aget(key) if key else None
+    if found is None:
+        if key:
+            queryset = queryset.using("default")
+        found = await _bucketed(queryset).aaggregate(**_aggregates(categories, category, price, rating))
+        if key:
+            await cache.aset(key, found, CACHE_TIMEOUT)
+    return found
+
+
+# -------------------------
+# PRESENTATION
+# -------------------------
+def _url(category, query, price, rating):
+    path = reverse("shop:product_list_by_category", args=[category.slug]) if category else reverse("shop:product_list")
+    params = urlencode({k: v for k, v in (("q", query), ("price", price), ("rating", rating)) if v})
+    return f"{path}?{params}" if params else path
+
+
+def present(found, categories, category, query, price, rating):
+    """Template-ready facet lists; clicking a selected value clears it."""
+    def option(label, count, active, url):
+        return {"label": label, "count": count, "active": active, "url": url}
+
+    categories = [
+        option(c.name, found[f"c{c.id}"], category is not None and c.id == category.id,
+               _url(None if category is not None and c.id == category.id else c, query, price, rating))
+        for c in categories
+    ]
+    prices = [
+        option(_price_label(lo, hi), found[f"p{i}"], key == price,
+               _url(category, query, None if key == price else key, rating))
+        for i, (key, lo, hi) in enumerate(price_buckets())
+    ]
+    ratings = [
+        option(f"{step}★ & up", found[f"r{step}"], step == rating,
+               _url(category, query, price, None if step == rating else step))
+        for step in RATING_STEPS
+    ]
+    return {
+        "total": found["total"],
+        "filtered": bool(category or price or rating),
+        "groups": [("Category", categories), ("Price", prices), ("Rating", ratings)],
+        "clear_url": _url(None, query, None, None),
+    }
@@ -0,0 +1,192 @@
+# shop/feeds.py
+"""
+Review RSS feeds, cached per product and invalidated by version bump.
+
+Cache layout (all keys are namespaced by host, because links are absolute):
+  rss:ver:<pid>                      version counter, bumped on invalidation
+  rss:items:<host>:<pid>:<ver>       list of feed item dicts for one product
+  rss:feed:<host>:<pid>:<ver>        rendered XML for one product
+  rss:ver:all                        site-wide version (bumped with any product)
+  rss:feed:<host>:all:<ver>          rendered site-wide XML
+
+The site-wide feed is merged from the per-product item lists, so rebuilding
+it only queries products whose items are not cached yet.
+"""
+import heapq
+import itertools
+import time
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.template.loader import render_to_string
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.html import escape
+
+from .models import Feedback, Product
+
+FEED_SIZE = 50
+CACHE_TIMEOUT = getattr(settings, "REVIEWS_RSS_CACHE_TIMEOUT", 60 * 60 * 24)
+RFC822 = "%a, %d %b %Y %H:%M:%S +0000"
+
+
+# -------------------------
+# VERSIONS / INVALIDATION
+# -------------------------
+def _ver_key(product_id):
+    return f"rss:ver:{product_id}"
+
+
+def _initial_version():
+    # Not 1: if a counter is evicted and recreated it must not line up with
+    # item keys that are still cached under the old counter.
+    return int(time.time() * 1000)
+
+
+def get_versions(product_ids):
+    keys = {_ver_key(pid): pid for pid in product_ids}
+    found = cache.get_many(keys)
+    versions = {keys[k]: v for k, v in found.items()}
+    for key, pid in keys.items():
+        if pid not in versions:
+            cache.add(key, _initial_version(), None)
+            versions[pid] = cache.get(key)
+    return versions
+
+
+def invalidate_product(product_id):
+    """Drop the cached feed for one product (and the site-wide feed)."""
+    for key in (_ver_key(product_id), _ver_key("all")):
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, _initial_version(), None)
+
+
+def invalidate_products(product_ids):
+    for pid in set(product_ids):
+        invalidate_product(pid)
+
+
+# -------------------------
+# ITEMS
+# -------------------------
+def build_items(request, product):
+    """One query (reviews + users), one reverse(), one absolute URI per product."""
+    # cached until the next invalidation, so never built from a lagging replica
+    reviews = (
+        Feedback.objects.using("default").filter(product=product, approved=True)
+        .select_related("user")
+        .order_by("-created_at")[:FEED_SIZE]
+    )
+    link = request.build_absolute_uri(reverse("shop:product_detail", args=[product.slug]))
+
+    items = []
+    for r in reviews:
+        who = r.reviewer_name or (r.user.get_username() if r.user else "Anonymous")
+        items.append({
+            "title": f"{r.rating} stars — {escape(who)}",
+            "link": link,
+            "description": escape(r.short_message(500) or ""),
+            "pubdate": r.created_at.strftime(RFC822),
+            "guid": f"feedback-{r.id}",
+            "ts": r.created_at.timestamp(),
+        })
+    return items
+
+
+def _items_key(host, product_id, version):
+    return f"rss:items:{host}:{product_id}:{version}"
+
+
+def get_items_many(request, products):
+    """Cached item lists for many products; only the misses hit the DB."""
+    host = request.get_host()
+    versions = get_versions([p.id for p in products])
+    keys = {_items_key(host, p.id, versions[p.id]): p for p in products}
+    found = cache.get_many(keys)
+
+    missing = {}
+    result = {}
+    for key, product in keys.items():
+        if key in found:
+            result[product.id] = found[key]
+        else:
+            result[product.id] = missing[key] = build_items(request, product)
+    if missing:
+        cache.set_many(missing, CACHE_TIMEOUT)
+    return result
+
+
+# -------------------------
+# RENDERED FEEDS
+# -------------------------
+def render_feed(title, link, description, items):
+    return render_to_string("shop/reviews_rss.xml", {
+        "channel_title": title,
+        "channel_link": link,
+        "channel_description": description,
+        "items": items,
+        "build_time": timezone.now().strftime(RFC822),
+    })
+
+
+def product_feed(request, product):
+    host = request.get_host()
+    version = get_versions([product.id])[product.id]
+    key = f"rss:feed:{host}:{product.id}:{version}"
+    rss = cache.get(key)
+    if rss is None:
+        items = get_items_many(request, [product])[product.id]
+        rss = render_feed(
+            product.name,
+            request.build_absolute_uri(reverse("shop:product_detail", args=[product.slug])),
+            f"Recent reviews for {product.name}",
+            items,
+        )
+        cache.set(key, rss, CACHE_TIMEOUT)
+    return rss
+
+
+async def aproduct_feed(request, product):
+    """Async fast path: two cache reads when the feed is cached, else build in a thread."""
+    version = await cache.aget(_ver_key(product.id))
+    if version is not None:
+        rss = await cache.aget(f"rss:feed:{request.get_host()}:{product.id}:{version}")
+        if rss is not None:
+            return rss
+    return await sync_to_async(product_feed)(request, product)
+
+
+def site_feed(request):
+    host = request.get_host()
+    version = get_versions(["all"])["all"]
+    key = f"rss:feed:{host}:all:{version}"
+    rss = cache.get(key)
+    if rss is None:
+        products = list(
+            Product.objects.filter(is_active=True, feedbacks__approved=True)
+            .distinct()
+            .only("id", "slug", "name")
+        )
+        per_product = get_items_many(request, products).values()
+        # each list is newest-first already, so a k-way merge is enough
+        merged = heapq.merge(*per_product, key=lambda item: item["ts"], reverse=True)
+        rss = render_feed(
+            "My Shoppings reviews",
+            request.build_absolute_uri(reverse("shop:product_list")),
+            "Recent reviews across all products",
+            list(itertools.islice(merged, FEED_SIZE)),
+        )
+        cache.set(key, rss, CACHE_TIMEOUT)
+    return rss
+
+
+async def asite_feed(request):
+    version = await cache.aget(_ver_key("all"))
+    if version is not None:
+        rss = await cache.aget(f"rss:feed:{request.get_host()}:all:{version}")
+        if rss is not None:
+            return rss
+    return await sync_to_async(site_feed)(request)
@@ -0,0 +1,138 @@
+# shop/idempotency.py
+"""
+Idempotent POST views (buy_now, initiate_payment, payment_handler).
+
+A request is identified by the client's Idempotency-Key header (scoped to
+the signed-in user or session) or, without one, by its fingerprint: the
+parts of the request that make it "the same" (e.g. the Razorpay ids of a
+payment callback). The first request claims the key with cache.add(),
+which is atomic, runs the view and stores a snapshot of the response for
+`ttl`. Repeats are answered from the snapshot without running the view, so
+no new rows, gateway calls or session changes happen. A duplicate arriving
+while the first is still running waits up to WAIT_SECONDS for its snapshot,
+then gets 409. Reusing a key for a different request gets 422.
+
+Only 2xx / 3xx responses are stored. On a 4xx (out of stock, a form error),
+a 5xx or an exception the key is released, so a retry runs the view again
+instead of replaying a refusal the client may have since fixed.
+
+The claim is only atomic across processes with a shared cache (Redis /
+Memcached) for IDEMPOTENCY_CACHE_ALIAS; LocMemCache covers one process.
+"""
+import hashlib
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import caches
+from django.http import HttpResponse, JsonResponse
+
+HEADER = "Idempotency-Key"
+TTL = getattr(settings, "IDEMPOTENCY_TTL", 24 * 60 * 60)
+# how long a claim survives a worker that died mid-request
+CLAIM_SECONDS = getattr(settings, "IDEMPOTENCY_CLAIM_SECONDS", 60)
+WAIT_SECONDS = getattr(settings, "IDEMPOTENCY_WAIT_SECONDS", 10)
+REPLAYED_HEADERS = ("Content-Type", "Location")
+IN_FLIGHT = "in-flight"
+
+
+def _cache():
+    return caches[getattr(settings, "IDEMPOTENCY_CACHE_ALIAS", "default")]
+
+
+def _digest(*parts):
+    raw = "\x1f".join(str(p) for p in parts)
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+
+def owner(request):
+    """Who a client-supplied key belongs to: the user, else the session (None if neither)."""
+    if request.user.is_authenticated:
+        return f"u{request.user.pk}"
+    return request.session.session_key
+
+
+# -------------------------
+# CHECKOUT ROUNDS
+# -------------------------
+ROUND_KEY = "checkout_round"
+
+
+def checkout_round(request):
+    return request.session.get(ROUND_KEY, 0)
+
+
+def next_checkout_round(request):
+    """Call when a checkout attempt ends (paid, failed, dismissed) so the next one isn't a repeat."""
+    request.session[ROUND_KEY] = checkout_round(request) + 1
+
+
+# -------------------------
+# DECORATOR
+# -------------------------
+def _snapshot(fingerprint, response):
+    return {
+        "fp": fingerprint,
+        "status": response.status_code,
+        "headers": {h: response[h] for h in REPLAYED_HEADERS if response.has_header(h)},
+        "body": response.content,
+    }
+
+
+def _replay(snapshot):
+    response = HttpResponse(snapshot["body"], status=snapshot["status"])
+    for header, value in snapshot["headers"].items():
+        response[header] = value
+    response["Idempotent-Replayed"] = "true"
+    return response
+
+
+def idempotent(fingerprint, ttl=TTL):
+    """
+    fingerprint(request, *args, **kwargs) returns a tuple identifying the
+    request (include the user / session where it matters), or None to run
+    the view without idempotency.
+    """
+    def decorator(view):
+        name = f"{view.__module__}.{view.__qualname__}"
+
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if request.method != "POST":
+                return view(request, *args, **kwargs)
+            parts = fingerprint(request, *args, **kwargs)
+            if parts is None:
+                return view(request, *args, **kwargs)
+            fp = _digest(name, *parts)
+            client_key, who = request.headers.get(HEADER, "").strip(), owner(request)
+            key = f"idem:{_digest(name, who, client_key[:255])}" if client_key and who else f"idem:{fp}"
+            store = _cache()
+
+            deadline = time.monotonic() + WAIT_SECONDS
+            while not store.add(key, {"fp": fp, "status": IN_FLIGHT}, CLAIM_SECONDS):
+                entry = store.get(key)
+                if entry is None:
+                    continue  # released or expired in between; claim again
+                if entry["fp"] != fp:
+                    return JsonResponse({"error": f"{HEADER} was already used for a different request."},
+                                        status=422)
+                if entry["status"] != IN_FLIGHT:
+                    return _replay(entry)
+                if time.monotonic() >= deadline:
+                    response = JsonResponse({"error": "The same request is still being processed."}, status=409)
+                    response["Retry-After"] = "1"
+                    return response
+                time.sleep(0.1)
+
+            try:
+                response = view(request, *args, **kwargs)
+            except BaseException:
+                store.delete(key)
+                raise
+            if response.status_code >= 400 or response.streaming:
+                store.delete(key)
+            else:
+                store.set(key, _snapshot(fp, response), ttl)
+            return response
+        return wrapper
+    return decorator
@@ -0,0 +1,118 @@
+# shop/images.py
+"""
+Derivatives for uploaded product images (Product.image).
+
+After an upload, build_variants() runs in the shop.offload pool (never on the
+request path) and writes, per width in PRODUCT_IMAGE_WIDTHS no larger than
+the original:
+
+  products/<hash>-<width>.webp
+  products/<hash>-<width>.jpg
+
+where <hash> is the SHA-256 prefix of the original file, so the names change
+only when the picture does and can be served with a long immutable cache.
+It also builds a ~16px blurred JPEG as a data: URI placeholder. The result
+is stored in Product.image_variants and rendered by {% product_image %}
+(shop/templatetags/product_images.py).
+"""
+import base64
+import hashlib
+import io
+import logging
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.utils import timezone
+
+from . import facets, feeds, offload, prerender
+from .models import Product
+
+logger = logging.getLogger(__name__)
+
+WIDTHS = tuple(getattr(settings, "PRODUCT_IMAGE_WIDTHS", (240, 480, 720, 1080)))
+WEBP_QUALITY = getattr(settings, "PRODUCT_IMAGE_WEBP_QUALITY", 78)
+JPEG_QUALITY = getattr(settings, "PRODUCT_IMAGE_JPEG_QUALITY", 82)
+PLACEHOLDER_WIDTH = 16
+VARIANT_DIR = "products"
+
+
+def needs_variants(product):
+    """True when the uploaded image has no (or stale) derivatives."""
+    return bool(product.image) and (product.image_variants or {}).get("source") != product.image.name
+
+
+def _encode(img, fmt, **options):
+    buf = io.BytesIO()
+    img.save(buf, fmt, **options)
+    return buf.getvalue()
+
+
+def _store(name, data):
+    # same hash + width = same bytes, so an existing file is reused as is
+    if not default_storage.exists(name):
+        default_storage.save(name, ContentFile(data))
+    return name
+
+
+def render_variants(source):
+    """Return the image_variants dict for an open file object."""
+    from PIL import Image, ImageFilter, ImageOps
+
+    raw = source.read()
+    digest = hashlib.sha256(raw).hexdigest()[:12]
+    with Image.open(io.BytesIO(raw)) as img:
+        img = ImageOps.exif_transpose(img).convert("RGB")
+        width, height = img.size
+        widths = sorted({w for w in WIDTHS if w < width} | {min(width, max(WIDTHS))})
+
+        variants = {"webp": [], "jpeg": []}
+        for w in widths:
+            resized = img if w == width else img.resize((w, round(height * w / width)), Image.LANCZOS)
+            variants["webp"].append([w, _store(
+                f"{VARIANT_DIR}/{digest}-{w}.webp",
+                _encode(resized, "WEBP", quality=WEBP_QUALITY, method=6),
+            )])
+            variants["jpeg"].append([w, _store(
+                f"{VARIANT_DIR}/{digest}-{w}.jpg",
+                _encode(resized, "JPEG", quality=JPEG_QUALITY, optimize=True, progressive=True),
+            )])
+
+        tiny = img.resize((PLACEHOLDER_WIDTH, max(1, round(height * PLACEHOLDER_WIDTH / width))))
+        tiny = tiny.filter(ImageFilter.GaussianBlur(1))
+        placeholder = base64.b64encode(_encode(tiny, "JPEG", quality=40)).decode()
+
+    variants.update({
+        "width": width,
+        "height": height,
+        "placeholder": f"data:image/jpeg;base64,{placeholder}",
+    })
+    return variants
+
+
+def build_variants(product_id):
+    """Generate and record derivatives for one product; returns the dict or None."""
+    product = Product.objects.filter(pk=product_id).only("id", "category_id", "image", "image_variants").first()
+    if product is None or not needs_variants(product):
+        return None
+    source_name = product.image.name
+    with product.image.open("rb") as source:
+        variants = render_variants(source)
+    variants["source"] = source_name
+    # update() rather than save(): no post_save, so this doesn't reschedule itself,
+    # and a newer upload that landed meanwhile is not overwritten. updated_at and
+    # the caches as product_saved (shop/signals.py) would: pages get the <picture> markup
+    stored = Product.objects.filter(pk=product_id, image=source_name).update(
+        image_variants=variants, updated_at=timezone.now(),
+    )
+    if stored:
+        facets.bump()
+        feeds.invalidate_product(product_id)
+        prerender.product_changed(product)
+    logger.info("Built %d image variants for product %s", len(variants["webp"]) * 2, product_id)
+    return variants
+
+
+def schedule(product_id):
+    """Queue build_variants off the request path (call after commit)."""
+    offload.submit(build_variants, product_id)
@@ -0,0 +1,74 @@
+# shop/loaders.py
+import re
+
+from django.template.loaders import cached
+
+# Comments, plus the elements whose contents must be left byte-for-byte
+TOKEN_RE = re.compile(
+    r"(?P<comment><!--.*?-->)"
+    r"|(?P<raw><(?P<tag>pre|textarea|script)\b.*?</(?P=tag)\s*>)",
+    re.DOTALL | re.IGNORECASE,
+)
+NEWLINE_RUN_RE = re.compile(r"[ \t\r\f\v]*\n\s*")
+SPACE_RUN_RE = re.compile(r"[ \t\r\f\v]{2,}")
+
+
+def collapse_whitespace(text):
+    # Indentation and blank lines go; a single newline / space is kept so
+    # inline elements keep the gap between them.
+    text = NEWLINE_RUN_RE.sub("\n", text)
+    return SPACE_RUN_RE.sub(" ", text)
+
+
+def keep_comment(comment):
+    # IE conditional comments, and comments that wrap template tags (removing
+    # those could unbalance {% if %} / {% block %} pairs).
+    return comment.startswith("<!--[if") or "{%" in comment or "{{" in comment
+
+
+def minify_html(source):
+    """
+    Strip HTML comments and collapse insignificant whitespace in a template
+    source. <pre>, <textarea> and <script> contents are left untouched.
+    """
+    out = []
+
+    def add_text(text):
+        text = collapse_whitespace(text)
+        # a dropped comment leaves two text runs side by side
+        if text.startswith("\n") and out and out[-1].endswith("\n"):
+            text = text[1:]
+        out.append(text)
+
+    pos = 0
+    for match in TOKEN_RE.finditer(source):
+        add_text(source[pos:match.start()])
+        if match.group("raw") is not None:
+            out.append(match.group("raw"))
+        elif keep_comment(match.group("comment")):
+            out.append(match.group("comment"))
+        pos = match.end()
+    add_text(source[pos:])
+    return "".join(out)
+
+
+class MinifyingCachedLoader(cached.Loader):
+    """
+    Cached loader that minifies .html sources before they are compiled.
+
+    The cached loader keeps the compiled Template, so minification runs once
+    per template per process, not per response. Non-HTML templates (the RSS
+    .xml, plain-text emails) are passed through unchanged.
+
+    TEMPLATES OPTIONS:
+        "loaders": [("shop.loaders.MinifyingCachedLoader", [
+            "django.template.loaders.filesystem.Loader",
+            "django.template.loaders.app_directories.Loader",
+        ])]
+    """
+
+    def get_contents(self, origin):
+        contents = super().get_contents(origin)
+        if origin.name.endswith(".html"):
+            return minify_html(contents)
+        return contents
@@ -0,0 +1,118 @@
+# shop/management/commands/bench_admin.py
+import random
+import time
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib import admin
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, reset_queries
+from django.test import RequestFactory
+from django.test.utils import override_settings
+from django.utils import timezone
+
+from shop.models import Category, Feedback, Order, Product
+
+# what the admin classes looked like before the mixins, for comparison
+PLAIN = {
+    Product: {"list_display": ("name", "category", "price", "is_active"),
+              "list_filter": ("category", "is_active"), "search_fields": ("name",)},
+    Order: {"list_display": ("id", "email", "total_amount", "created_at"), "search_fields": ("email",)},
+    Feedback: {"list_display": ("id", "product", "rating", "approved", "created_at"),
+               "list_filter": ("approved", "rating", "created_at"),
+               "search_fields": ("reviewer_name", "reviewer_email", "message", "product__name")},
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Render the Product / Order / Feedback changelists with and without the "
+        "admin performance mixins. --seed inserts rows first, so run it on a copy of the DB."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--seed", type=int, default=0,
+                            help="Insert this many orders and reviews (e.g. 1000000) before measuring")
+        parser.add_argument("--repeat", type=int, default=3)
+
+    def handle(self, *args, **options):
+        if options["seed"]:
+            self.seed(options["seed"])
+            with connection.cursor() as cursor:
+                cursor.execute("ANALYZE")  # statistics for the estimated counts
+
+        product = Product.objects.only("name").first()
+        if product is None:
+            raise CommandError("Needs at least one product (or --seed).")
+        user = get_user_model()(username="bench", is_staff=True, is_superuser=True, is_active=True)
+        factory = RequestFactory()
+        today = timezone.localdate()
+
+        scenarios = [
+            ("page 1", {}),
+            ("page 5", {"p": "5"}),
+            ("search", {"q": product.name[:4]}),
+            ("search email", {"q": "customer7@example.com"}),
+            ("date drilldown", {"created_at__year": str(today.year), "created_at__month": str(today.month)}),
+        ]
+
+        self.stdout.write(f"{'changelist':<10} {'scenario':<15} {'admin':<6} {'ms':>9} {'queries':>8}")
+        for model in (Product, Order, Feedback):
+            tuned = admin.site._registry[model]
+            plain = type("Plain", (admin.ModelAdmin,), PLAIN[model])(model, admin.site)
+            for label, params in scenarios:
+                if "created_at__year" in params and not tuned.date_hierarchy:
+                    continue
+                for name, model_admin in (("plain", plain), ("tuned", tuned)):
+                    ms, queries = self.measure(model_admin, factory, user, params, options["repeat"])
+                    self.stdout.write(
+                        f"{model._meta.model_name:<10} {label:<15} {name:<6} {ms:>9.1f} {queries:>8}"
+                    )
+
+    def measure(self, model_admin, factory, user, params, repeat):
+        best, queries = None, 0
+        with override_settings(DEBUG=True):
+            for _ in range(repeat):
+                request = factory.get("/admin/", params)
+                request.user = user
+                reset_queries()
+                start = time.perf_counter()
+                response = model_admin.changelist_view(request)
+                if hasattr(response, "render"):  # invalid page / filter -> redirect
+                    response.render()
+                elapsed = (time.perf_counter() - start) * 1000
+                best = elapsed if best is None else min(best, elapsed)
+                queries = len(connection.queries)
+        return best, queries
+
+    def seed(self, count):
+        rng = random.Random(1)
+        category, _ = Category.objects.get_or_create(slug="bench", defaults={"name": "Bench"})
+        words = ["Alpha", "Bravo", "Cedar", "Delta", "Ember", "Flint", "Gale", "Harbor"]
+        existing = Product.objects.filter(category=category).count()
+        Product.objects.bulk_create([
+            Product(category=category, name=f"{rng.choice(words)} {i}", slug=f"bench-{i}", price=Decimal("9.99"))
+            for i in range(existing, 1000)
+        ])
+        product_ids = list(Product.objects.values_list("id", flat=True))
+
+        batch = 10_000
+        for start in range(0, count, batch):
+            size = min(batch, count - start)
+            batch_start = timezone.now()
+            orders = [Order(email=f"customer{rng.randrange(100_000)}@example.com",
+                            total_amount=Decimal(rng.randrange(100, 100_000)) / 100)
+                      for _ in range(size)]
+            reviews = [Feedback(product_id=rng.choice(product_ids), rating=rng.randint(1, 5),
+                                message="bench review", reviewer_name="bench",
+                                approved=rng.random() < 0.8)
+                       for _ in range(size)]
+            Order.objects.bulk_create(orders)
+            Feedback.objects.bulk_create(reviews)
+            # auto_now_add ignores passed values, so backdate each batch afterwards
+            created_at = batch_start - timedelta(days=rng.randrange(730), seconds=rng.randrange(86400))
+            for model in (Order, Feedback):
+                model.objects.filter(created_at__gte=batch_start).update(created_at=created_at)
+            self.stdout.write(f"seeded {start + size}/{count}", ending="\r")
+        self.stdout.write("")
@@ -0,0 +1,134 @@
+# shop/management/commands/bench_asgi.py
+import asyncio
+import os
+import socket
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.urls import reverse
+
+from shop.models import Product
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+async def fetch(port, path):
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    writer.write(
+        f"GET {path} HTTP/1.1\r\nHost: 127.0.0.1\r\nAccept-Encoding: gzip\r\n"
+        f"Connection: close\r\n\r\n".encode()
+    )
+    await writer.drain()
+    data = await reader.read()
+    writer.close()
+    return int(data.split(b" ", 2)[1])
+
+
+async def load(port, path, concurrency, duration):
+    latencies, errors = [], 0
+    deadline = time.perf_counter() + duration
+
+    async def client():
+        nonlocal errors
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            try:
+                status = await fetch(port, path)
+            except OSError:
+                status = 0
+            if status == 200:
+                latencies.append(time.perf_counter() - start)
+            else:
+                errors += 1
+
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    return sorted(latencies), errors
+
+
+class Command(BaseCommand):
+    help = (
+        "Start the site under uvicorn (ASGI, async views) and under the threaded WSGI "
+        "dev server, hit the read-only endpoints with N concurrent clients and compare. "
+        "Both servers run on a copy of the database."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 16, 64])
+        parser.add_argument("--duration", type=float, default=5.0, help="Seconds per measurement")
+
+    def handle(self, *args, **options):
+        try:
+            import uvicorn  # noqa: F401
+        except ImportError:
+            raise CommandError("bench_asgi needs uvicorn (pip install uvicorn).")
+
+        product = Product.objects.filter(is_active=True).first()
+        if product is None:
+            raise CommandError("Needs at least one active product.")
+        paths = [
+            ("ajax_search", reverse("shop:ajax_search") + "?q=" + product.name[:3]),
+            ("product_list", reverse("shop:product_list")),
+            ("reviews_page", reverse("shop:product_detail", args=[product.slug]) + "?rpage=1"),
+            ("reviews_rss", reverse("shop:product_reviews_rss", args=[product.id])),
+        ]
+
+        with tempfile.TemporaryDirectory() as tmp:
+            db_copy = os.path.join(tmp, "bench.sqlite3")
+            source = sqlite3.connect(f"file:{settings.DATABASES['default']['NAME']}?mode=ro", uri=True)
+            with sqlite3.connect(db_copy) as target:
+                source.backup(target)
+            source.close()
+            # DEBUG is left as configured: with DEBUG off, pages need collectstatic first
+            env = {**os.environ, "DATABASE_NAME": db_copy, "SESSION_STATS": "False"}
+
+            self.stdout.write(f"{'endpoint':<13} {'server':<6} {'conc':>5} {'req/s':>8} {'p50 ms':>8} {'p99 ms':>8} {'errors':>7}")
+            for server in ("wsgi", "asgi"):
+                port = free_port()
+                with self.start(server, port, env):
+                    for label, path in paths:
+                        for concurrency in options["concurrency"]:
+                            latencies, errors = asyncio.run(load(port, path, concurrency, options["duration"]))
+                            pct = lambda q: latencies[min(len(latencies) - 1, int(q * len(latencies)))] * 1000 if latencies else 0.0
+                            self.stdout.write(
+                                f"{label:<13} {server:<6} {concurrency:>5} {len(latencies) / options['duration']:>8.0f} "
+                                f"{pct(0.5):>8.1f} {pct(0.99):>8.1f} {errors:>7}"
+                            )
+
+    def start(self, server, port, env):
+        manage = os.path.join(settings.BASE_DIR, "manage.py")
+        if server == "asgi":
+            cmd = [sys.executable, "-m", "uvicorn", "portfolio_site.asgi:application",
+                   "--port", str(port), "--log-level", "warning", "--no-access-log"]
+        else:
+            cmd = [sys.executable, manage, "runserver", f"127.0.0.1:{port}", "--noreload"]
+        proc = subprocess.Popen(cmd, cwd=settings.BASE_DIR, env=env,
+                                stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        return _Server(proc, port)
+
+
+class _Server:
+    def __init__(self, proc, port):
+        self.proc, self.port = proc, port
+
+    def __enter__(self):
+        for _ in range(100):
+            try:
+                socket.create_connection(("127.0.0.1", self.port), timeout=0.2).close()
+                return self
+            except OSError:
+                time.sleep(0.1)
+        self.proc.kill()
+        raise CommandError("server did not start")
+
+    def __exit__(self, *exc):
+        self.proc.terminate()
+        self.proc.wait(timeout=10)
@@ -0,0 +1,65 @@
+# shop/management/commands/bench_compression.py
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.test import Client
+from django.urls import reverse
+
+from shop.middleware import BrotliStream, GzipStream, brotli
+from shop.models import Product
+
+
+class Command(BaseCommand):
+    help = "Bytes on the wire and CPU cost of gzip / brotli per view."
+
+    def add_arguments(self, parser):
+        parser.add_argument("urls", nargs="*", help="Paths to fetch (default: catalog, detail, reviews, rss)")
+        parser.add_argument("--repeat", type=int, default=50)
+        parser.add_argument("--gzip-level", type=int, default=settings.COMPRESSION_GZIP_LEVEL)
+        parser.add_argument("--brotli-quality", type=int, default=settings.COMPRESSION_BROTLI_QUALITY)
+
+    def default_urls(self):
+        urls = [reverse("shop:product_list")]
+        product = Product.objects.filter(is_active=True).order_by("-created_at").first()
+        if product:
+            urls += [
+                reverse("shop:product_detail", args=[product.slug]),
+                # same fragment product_feedback embeds in its JSON
+                reverse("shop:product_detail", args=[product.slug]) + "?rpage=1",
+                reverse("shop:product_reviews_rss", args=[product.id]),
+            ]
+        return urls
+
+    def handle(self, *args, **options):
+        client = Client()
+        repeat = options["repeat"]
+        encoders = [("gzip", lambda: GzipStream(options["gzip_level"]))]
+        if brotli is not None:
+            encoders.append(("br", lambda: BrotliStream(options["brotli_quality"])))
+        else:
+            self.stderr.write("brotli not installed; gzip only")
+
+        header = f"{'url':<48} {'raw':>9}"
+        for name, _ in encoders:
+            header += f" {name + ' bytes':>11} {name + ' ratio':>9} {name + ' ms':>9}"
+        header += f" {'render ms':>10}"
+        self.stdout.write(header)
+
+        for url in options["urls"] or self.default_urls():
+            start = time.process_time()
+            response = client.get(url, HTTP_X_REQUESTED_WITH="XMLHttpRequest" if "rpage=" in url else "")
+            render_ms = (time.process_time() - start) * 1000
+            body = b"".join(response.streaming_content) if response.streaming else response.content
+
+            line = f"{url[:48]:<48} {len(body):>9}"
+            for name, make in encoders:
+                start = time.process_time()
+                for _ in range(repeat):
+                    stream = make()
+                    out = stream.header() + stream.compress(body) + stream.finish()
+                cpu_ms = (time.process_time() - start) * 1000 / repeat
+                ratio = len(out) / len(body) if body else 0
+                line += f" {len(out):>11} {ratio:>9.2f} {cpu_ms:>9.3f}"
+            line += f" {render_ms:>10.2f}"
+            self.stdout.write(line)
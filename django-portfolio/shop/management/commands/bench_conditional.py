@@ -0,0 +1,71 @@
+# shop/management/commands/bench_conditional.py
+import random
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client
+from django.urls import reverse
+
+from shop.models import Feedback, Product
+
+
+class Command(BaseCommand):
+    help = (
+        "Replay revalidating clients against the catalog, review and feed views "
+        "and report the 304 hit rate. Touches one product per write, so run it on a copy of the DB."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=500, help="Conditional requests per URL")
+        parser.add_argument("--write-rate", type=float, default=0.05,
+                            help="Chance that a catalog / review write happens before a request")
+        parser.add_argument("--seed", type=int, default=1)
+
+    def handle(self, *args, **options):
+        product = Product.objects.filter(is_active=True).first()
+        if product is None:
+            raise CommandError("Needs at least one active product.")
+        rng = random.Random(options["seed"])
+
+        urls = [
+            ("product_list", reverse("shop:product_list"), {}),
+            ("product_detail", reverse("shop:product_detail", args=[product.slug]), {}),
+            ("reviews_page", reverse("shop:product_detail", args=[product.slug]) + "?rpage=1",
+             {"HTTP_X_REQUESTED_WITH": "XMLHttpRequest"}),
+            ("reviews_rss", reverse("shop:product_reviews_rss", args=[product.id]), {}),
+        ]
+
+        self.stdout.write(f"{'view':<16} {'requests':>8} {'304s':>6} {'hit rate':>9} {'200 ms':>8} {'304 ms':>8}")
+        for label, url, headers in urls:
+            client = Client()
+            etag = client.get(url, **headers).get("ETag")
+            hits, timings = 0, {200: [], 304: []}
+
+            for _ in range(options["requests"]):
+                if rng.random() < options["write_rate"]:
+                    self.write(rng, product)
+                extra = dict(headers)
+                if etag:
+                    extra["HTTP_IF_NONE_MATCH"] = etag
+                start = time.perf_counter()
+                response = client.get(url, **extra)
+                elapsed = (time.perf_counter() - start) * 1000
+                timings.setdefault(response.status_code, []).append(elapsed)
+                if response.status_code == 304:
+                    hits += 1
+                else:
+                    etag = response.get("ETag", etag)
+
+            total = options["requests"]
+            avg = lambda xs: sum(xs) / len(xs) if xs else 0.0
+            self.stdout.write(
+                f"{label:<16} {total:>8} {hits:>6} {hits / total:>9.1%} "
+                f"{avg(timings[200]):>8.2f} {avg(timings[304]):>8.2f}"
+            )
+
+    def write(self, rng, product):
+        if rng.random() < 0.5:
+            product.save(update_fields=["updated_at"])
+        else:
+            Feedback.objects.create(product=product, rating=rng.randint(1, 5),
+                                    reviewer_name="bench", approved=True)
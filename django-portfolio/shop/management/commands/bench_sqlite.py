@@ -0,0 +1,101 @@
+# shop/management/commands/bench_sqlite.py
+import multiprocessing
+import os
+import random
+import sqlite3
+import tempfile
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import OperationalError, connections, transaction
+
+SCHEMA = [
+    "CREATE TABLE bench_session (key TEXT PRIMARY KEY, data TEXT NOT NULL)",
+    "CREATE TABLE bench_order (id INTEGER PRIMARY KEY, session_key TEXT, total INTEGER, created REAL)",
+]
+SESSIONS = 50
+
+
+def worker(path, options, iterations, seed, results):
+    """One 'web worker' process: cart_add / initiate_payment style transactions."""
+    connection = connections["default"]
+    connection.settings_dict.update(NAME=path, OPTIONS=options, CONN_MAX_AGE=None)
+    rng = random.Random(seed)
+    ok = locked = 0
+    latencies = []
+
+    for _ in range(iterations):
+        key = f"s{rng.randrange(SESSIONS)}"
+        start = time.perf_counter()
+        try:
+            with transaction.atomic():
+                with connection.cursor() as cursor:
+                    # read the session, then write it back (the classic lock upgrade)
+                    cursor.execute("SELECT data FROM bench_session WHERE key = %s", [key])
+                    data = cursor.fetchone()[0]
+                    cursor.execute("UPDATE bench_session SET data = %s WHERE key = %s", [data[-200:] + "x", key])
+                    if rng.random() < 0.2:
+                        cursor.execute(
+                            "INSERT INTO bench_order (session_key, total, created) VALUES (%s, %s, %s)",
+                            [key, rng.randrange(100, 10000), time.time()],
+                        )
+            ok += 1
+            latencies.append(time.perf_counter() - start)
+        except OperationalError as exc:
+            if "locked" not in str(exc) and "busy" not in str(exc):
+                raise
+            locked += 1
+    connection.close()
+    results.put((ok, locked, latencies))
+
+
+class Command(BaseCommand):
+    help = (
+        "Hammer a scratch SQLite file from several processes with read-then-write "
+        "transactions, once with stock SQLite settings and once with the DATABASES "
+        "OPTIONS from settings, and report 'database is locked' errors."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--workers", type=int, default=8)
+        parser.add_argument("--iterations", type=int, default=300, help="Transactions per worker")
+
+    def handle(self, *args, **options):
+        modes = [
+            ("stock", {"init_command": "PRAGMA journal_mode=DELETE"}),
+            ("configured", dict(settings.DATABASES["default"].get("OPTIONS", {}))),
+        ]
+        connections.close_all()  # nothing open may be inherited by the forked workers
+        context = multiprocessing.get_context("fork")
+
+        self.stdout.write(f"{'mode':<11} {'ok':>7} {'locked':>7} {'tx/s':>8} {'p50 ms':>8} {'p99 ms':>8}")
+        for label, db_options in modes:
+            with tempfile.TemporaryDirectory() as tmp:
+                path = os.path.join(tmp, "bench.sqlite3")
+                with sqlite3.connect(path) as db:
+                    for sql in SCHEMA:
+                        db.execute(sql)
+                    db.executemany("INSERT INTO bench_session VALUES (?, ?)",
+                                   [(f"s{i}", "{}") for i in range(SESSIONS)])
+
+                results = context.Queue()
+                procs = [
+                    context.Process(target=worker, args=(path, db_options, options["iterations"], seed, results))
+                    for seed in range(options["workers"])
+                ]
+                start = time.perf_counter()
+                for p in procs:
+                    p.start()
+                collected = [results.get() for _ in procs]
+                for p in procs:
+                    p.join()
+                elapsed = time.perf_counter() - start
+
+            ok = sum(r[0] for r in collected)
+            locked = sum(r[1] for r in collected)
+            latencies = sorted(x for r in collected for x in r[2]) or [0.0]
+            pct = lambda q: latencies[min(len(latencies) - 1, int(q * len(latencies)))] * 1000
+            self.stdout.write(
+                f"{label:<11} {ok:>7} {locked:>7} {ok / elapsed:>8.0f} {pct(0.5):>8.2f} {pct(0.99):>8.2f}"
+            )
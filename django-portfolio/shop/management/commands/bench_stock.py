@@ -0,0 +1,136 @@
+# shop/management/commands/bench_stock.py
+import os
+import random
+import tempfile
+import threading
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import OperationalError, connections, transaction
+from django.db.models import Sum
+from django.test.utils import setup_databases, teardown_databases
+from django.utils import timezone
+
+from shop import stock
+from shop.models import Category, Order, Product, StockReservation, StockShard
+
+
+class Command(BaseCommand):
+    help = (
+        "Throughput of stock reservations: many threads check out one product until it "
+        "sells out, some abandoning their checkout (the hold is left to expire), and report "
+        "transactions per second and latency once per shard count (the no-oversell guarantee "
+        "itself is tested by shop.tests.StockConcurrencyTests). Runs against a throwaway "
+        "test database."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--threads", type=int, default=16)
+        parser.add_argument("--units", type=int, default=1000)
+        parser.add_argument("--quantity", type=int, default=1, help="Units per checkout")
+        parser.add_argument("--shards", default="1,8", help="Comma-separated shard counts to compare")
+        parser.add_argument("--abandon", type=float, default=0.1,
+                            help="Share of checkouts that are never paid")
+
+    def handle(self, *args, **options):
+        try:
+            shard_counts = [int(n) for n in options["shards"].split(",")]
+        except ValueError:
+            raise CommandError("--shards takes e.g. 1,8")
+
+        with tempfile.TemporaryDirectory() as tmp:
+            for alias in connections:
+                # threads need a database file they can all open (not an in-memory one)
+                if connections[alias].vendor == "sqlite":
+                    connections[alias].settings_dict["TEST"]["NAME"] = os.path.join(tmp, f"{alias}.sqlite3")
+            old_config = setup_databases(verbosity=0, interactive=False)
+            try:
+                category = Category.objects.create(name="Bench", slug="bench")
+                self.stdout.write(
+                    f"{'shards':>6} {'paid':>6} {'abandon':>8} {'sold out':>9} {'locked':>7} "
+                    f"{'tx/s':>7} {'p50 ms':>7} {'p99 ms':>7}  check"
+                )
+                for i, shards in enumerate(shard_counts):
+                    product = Product.objects.create(category=category, name=f"SKU {i}", slug=f"sku-{i}", price=100)
+                    stock.set_stock(product, options["units"], shards)
+                    self.run_round(product, shards, options)
+            finally:
+                connections.close_all()
+                teardown_databases(old_config, verbosity=0)
+
+    def run_round(self, product, shards, options):
+        results = []
+        barrier = threading.Barrier(options["threads"])
+
+        def worker(seed):
+            rng = random.Random(seed)
+            paid = abandoned = sold_out = locked = 0
+            latencies = []
+            barrier.wait()
+            try:
+                while True:
+                    start = time.perf_counter()
+                    try:
+                        with transaction.atomic():
+                            order = Order.objects.create(email=f"bench{seed}@example.com", total_amount=100)
+                            stock.reserve(order, [(product.id, options["quantity"])])
+                        if rng.random() < options["abandon"]:
+                            # never paid: let the hold run out (the next sold-out checkout sweeps it)
+                            StockReservation.objects.filter(order=order).update(
+                                expires_at=timezone.now() - timedelta(seconds=1))
+                            abandoned += 1
+                        else:
+                            with transaction.atomic():
+                                Order.objects.filter(pk=order.pk).update(status="paid")
+                                stock.commit([order.pk])
+                            paid += 1
+                    except stock.OutOfStock:
+                        sold_out += 1
+                        break
+                    except OperationalError as exc:
+                        if "locked" not in str(exc) and "busy" not in str(exc):
+                            raise
+                        locked += 1
+                        continue
+                    latencies.append(time.perf_counter() - start)
+            finally:
+                connections.close_all()
+            results.append((paid, abandoned, sold_out, locked, latencies))
+
+        threads = [threading.Thread(target=worker, args=(seed,)) for seed in range(options["threads"])]
+        start = time.perf_counter()
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        elapsed = time.perf_counter() - start
+
+        paid, abandoned, sold_out, locked = (sum(r[i] for r in results) for i in range(4))
+        latencies = sorted(x for r in results for x in r[4]) or [0.0]
+        pct = lambda q: latencies[min(len(latencies) - 1, int(q * len(latencies)))] * 1000
+        self.stdout.write(
+            f"{shards:>6} {paid:>6} {abandoned:>8} {sold_out:>9} {locked:>7} "
+            f"{(paid + abandoned) / elapsed:>7.0f} {pct(0.5):>7.2f} {pct(0.99):>7.2f}  "
+            + self.verify(product, paid, options)
+        )
+
+    def verify(self, product, paid, options):
+        """Every unit is on a shard, held, or sold, and exactly the paid checkouts were sold."""
+        def held(status):
+            rows = StockReservation.objects.filter(product=product, status=status)
+            return rows.aggregate(n=Sum("quantity"))["n"] or 0
+
+        committed = held("committed")
+        on_hand = StockShard.objects.filter(product=product).aggregate(n=Sum("available"))["n"]
+        problems = []
+        if committed != paid * options["quantity"]:
+            problems.append(f"committed {committed} != paid {paid * options['quantity']}")
+        if on_hand + held("held") + committed != options["units"]:
+            problems.append(f"on hand {on_hand} + held {held('held')} + sold {committed} != {options['units']}")
+        stock.release_expired(product_id=product.id)
+        if held("held"):
+            problems.append(f"{held('held')} units still held after the expiry sweep")
+        if problems:
+            raise CommandError("; ".join(problems))
+        return "ok"
@@ -0,0 +1,80 @@
+# shop/management/commands/bench_templates.py
+import time
+
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.contrib.sessions.backends.db import SessionStore
+from django.core.management.base import BaseCommand
+from django.db.models import QuerySet
+from django.template import Engine, RequestContext
+from django.template.backends.django import get_installed_libraries
+from django.test import RequestFactory
+
+from shop.models import Category, Order, Product
+
+SOURCE_LOADERS = [
+    "django.template.loaders.filesystem.Loader",
+    "django.template.loaders.app_directories.Loader",
+]
+
+
+class Command(BaseCommand):
+    help = "Compare source / rendered bytes and render time with and without the minifying loader."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--repeat", type=int, default=200)
+
+    def make_engine(self, cached_loader):
+        options = settings.TEMPLATES[0]["OPTIONS"]
+        return Engine(
+            dirs=settings.TEMPLATES[0]["DIRS"],
+            loaders=[(cached_loader, SOURCE_LOADERS)],
+            context_processors=options["context_processors"],
+            libraries=get_installed_libraries(),
+            debug=False,
+        )
+
+    def contexts(self):
+        product = Product.objects.filter(is_active=True).first()
+        yield "shop/product_list.html", {
+            "categories": Category.objects.all(),
+            "products": Product.objects.filter(is_active=True).order_by("-created_at"),
+            "wishlist_ids": [],
+        }
+        if product:
+            yield "shop/product_detail.html", {
+                "product": product,
+                "related_products": Product.objects.filter(category=product.category).exclude(id=product.id),
+                "reviews_page": product.feedbacks.filter(approved=True)[:5],
+                "avg_rating": product.average_rating(),
+                "review_count": product.review_count(),
+                "wishlist_ids": [],
+            }
+        else:
+            self.stderr.write("no active product; skipping shop/product_detail.html")
+        yield "shop/my_orders.html", {"orders": Order.objects.order_by("-created_at")[:50]}
+
+    def handle(self, *args, **options):
+        repeat = options["repeat"]
+        request = RequestFactory().get("/shop/")
+        request.session = SessionStore()
+        request.user = AnonymousUser()
+
+        engines = [
+            ("plain", self.make_engine("django.template.loaders.cached.Loader")),
+            ("minified", self.make_engine("shop.loaders.MinifyingCachedLoader")),
+        ]
+
+        self.stdout.write(f"{'template':<28} {'loader':<9} {'source':>8} {'rendered':>9} {'render ms':>10}")
+        for name, context in self.contexts():
+            for label, engine in engines:
+                template = engine.get_template(name)
+                source = engine.template_loaders[0].get_contents(template.origin)
+                # evaluate querysets once so only template work is timed
+                context = {k: list(v) if isinstance(v, QuerySet) else v for k, v in context.items()}
+
+                start = time.perf_counter()
+                for _ in range(repeat):
+                    html = template.render(RequestContext(request, context))
+                ms = (time.perf_counter() - start) * 1000 / repeat
+                self.stdout.write(f"{name:<28} {label:<9} {len(source):>8} {len(html):>9} {ms:>10.3f}")
@@ -0,0 +1,43 @@
+# shop/management/commands/build_product_images.py
+import time
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from shop import images, prerender
+from shop.models import Product
+
+
+class Command(BaseCommand):
+    help = (
+        "Build the resized WebP/JPEG variants and blur placeholders for uploaded "
+        "product images. Uploads are normally processed in the background; use this "
+        "to backfill, or with --force after changing PRODUCT_IMAGE_WIDTHS."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("product_ids", nargs="*", type=int)
+        parser.add_argument("--force", action="store_true", help="Rebuild even if variants exist")
+
+    def handle(self, *args, **options):
+        products = Product.objects.exclude(image="").only("id", "image", "image_variants")
+        if options["product_ids"]:
+            products = products.filter(pk__in=options["product_ids"])
+
+        built = 0
+        for product in products.iterator():
+            if options["force"]:
+                Product.objects.filter(pk=product.pk).update(image_variants={}, updated_at=timezone.now())
+            elif not images.needs_variants(product):
+                continue
+            start = time.perf_counter()
+            variants = images.build_variants(product.pk)
+            if variants:
+                built += 1
+                self.stdout.write(
+                    f"  #{product.pk:<6} {variants['width']}x{variants['height']} -> "
+                    f"{', '.join(str(w) for w, _ in variants['webp'])} px "
+                    f"({(time.perf_counter() - start) * 1000:.0f} ms)"
+                )
+        prerender.flush()  # pages of the products that got variants
+        self.stdout.write(self.style.SUCCESS(f"Built variants for {built} product(s)."))
@@ -0,0 +1,234 @@
+# shop/management/commands/check_query_plans.py
+import random
+import re
+from contextlib import ExitStack
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.test import Client
+from django.test.utils import setup_databases, setup_test_environment, teardown_databases, teardown_test_environment
+from django.urls import reverse
+
+from shop import stock
+from shop.models import Address, Category, Feedback, Order, OrderItem, Product, Profile, Wishlist
+
+# Full scans that are fine: (request label or "*", table) -> why
+ALLOWED_SCANS = {
+    ("*", "shop_category"): "the whole (small) category list is rendered as facets",
+    ("ajax_search", "shop_product"): "substring search (LIKE '%q%') can't use a b-tree index",
+    ("search_products", "shop_product"): "substring search (LIKE '%q%') can't use a b-tree index",
+    ("product_list_search", "shop_product"): "substring search (LIKE '%q%') can't use a b-tree index",
+    ("site_rss", "shop_product"): "site-wide feed aggregates every approved review; the feed itself is cached",
+    ("admin_products", "shop_product"): "unfiltered changelist walks the primary key and stops at the page size",
+}
+STATEMENT = re.compile(r"^\s*(SELECT|UPDATE|DELETE)\b", re.I)
+SQLITE_SCAN = re.compile(r"^SCAN (\w+)(?: AS \w+)?$")
+POSTGRES_SCAN = re.compile(r"Seq Scan on (\w+)")
+# SQLite names an aliased table by its alias only ("SCAN U0" for FROM "shop_product" U0)
+_KEYWORDS = r"(?:WHERE|ON|USING|INNER|LEFT|RIGHT|FULL|CROSS|NATURAL|OUTER|JOIN|GROUP|ORDER|LIMIT|HAVING|WINDOW|UNION|EXCEPT|INTERSECT)\b"
+SQL_TABLE = re.compile(rf'\b(?:FROM|JOIN)\s+"?(\w+)"?(?:\s+(?:AS\s+)?(?!{_KEYWORDS})"?(\w+)"?)?', re.I)
+SQL_DERIVED = re.compile(rf'\)\s+(?:AS\s+)?(?!{_KEYWORDS})"?(\w+)"?', re.I)
+
+
+def scan_targets(sql, names):
+    """
+    Tables behind the SCAN targets `names` of a statement's plan. Aliases are
+    resolved from the SQL; derived tables (FROM (SELECT ...) alias) are
+    skipped; a name that is neither is kept as is, so it fails the check.
+    """
+    aliases = {}
+    for table, alias in SQL_TABLE.findall(sql):
+        aliases[table] = table
+        if alias:
+            aliases[alias] = table
+    derived = set(SQL_DERIVED.findall(sql)) - set(aliases)
+    return sorted({aliases.get(name, name) for name in names if name not in derived})
+
+
+def disallowed_scans(label, scanned):
+    """Tables in `scanned` that request `label` may not read with a full scan."""
+    return [t for t in scanned if (label, t) not in ALLOWED_SCANS and ("*", t) not in ALLOWED_SCANS]
+
+
+class Command(BaseCommand):
+    help = (
+        "Regression check for query plans. Builds a throwaway test database, seeds it, "
+        "requests the hot views (storefront, account pages, admin), captures every SQL "
+        "statement, EXPLAINs it, and fails if any reads a table with a full scan that "
+        "is not in ALLOWED_SCANS. Never touches the configured database."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--products", type=int, default=2000)
+        parser.add_argument("--show-plans", action="store_true", help="Print every plan, not just failures")
+
+    def handle(self, *args, **options):
+        self.verbosity = options["verbosity"]
+        setup_test_environment()
+        old_config = setup_databases(verbosity=0, interactive=False)
+        try:
+            self.seed(options["products"])
+            self.analyze()
+            captured = self.exercise()
+            failures = self.explain_all(captured, options["show_plans"])
+        finally:
+            teardown_databases(old_config, verbosity=0)
+            teardown_test_environment()
+
+        if failures:
+            raise CommandError(f"{failures} statement(s) fall back to a full table scan.")
+        self.stdout.write(self.style.SUCCESS(f"{len(captured)} distinct statements, all index-backed."))
+
+    # -------------------------
+    # DATA
+    # -------------------------
+    def seed(self, n_products):
+        rng = random.Random(0)
+        categories = Category.objects.bulk_create(
+            [Category(name=f"Category {i}", slug=f"category-{i}") for i in range(12)]
+        )
+        products = Product.objects.bulk_create([
+            Product(
+                category=rng.choice(categories), name=f"Product {i}", slug=f"product-{i}",
+                price=rng.randrange(50, 20000), is_active=rng.random() < 0.9,
+                rating_avg=rng.choice([0, 0, 2.5, 3.5, 4.5]),
+            )
+            for i in range(n_products)
+        ], batch_size=500)
+        users = [User.objects.create_user(f"user{i}", f"user{i}@example.com", "x") for i in range(20)]
+        self.user = users[0]
+        self.admin = User.objects.create_superuser("plans-admin", "admin@example.com", "x")
+        profiles = Profile.objects.bulk_create([Profile(user=u) for u in users])
+        Address.objects.bulk_create([Address(profile=p, address="1 Street") for p in profiles for _ in range(2)])
+        Wishlist.objects.bulk_create([
+            Wishlist(user=u, product=p) for u in users for p in rng.sample(products, 5)
+        ])
+        orders = Order.objects.bulk_create([
+            Order(email=rng.choice(users).email, total_amount=100, status=rng.choice(["created", "paid"]),
+                  razorpay_order_id=f"order_{i}")
+            for i in range(n_products // 2)
+        ], batch_size=500)
+        OrderItem.objects.bulk_create(
+            [OrderItem(order=o, product=rng.choice(products), price=100, quantity=1) for o in orders],
+            batch_size=500,
+        )
+        Feedback.objects.bulk_create([
+            Feedback(product=rng.choice(products), rating=rng.randint(1, 5), message="ok",
+                     reviewer_name="anon", approved=rng.random() < 0.8)
+            for _ in range(n_products * 2)
+        ], batch_size=500)
+        self.product = products[0]
+        self.category = self.product.category
+        self.order = Order.objects.filter(email=self.user.email).first()
+
+    def analyze(self):
+        for alias in connections:
+            connection = connections[alias]
+            if connection.vendor in ("sqlite", "postgresql"):
+                with connection.cursor() as cursor:
+                    cursor.execute("ANALYZE")
+
+    # -------------------------
+    # REQUESTS
+    # -------------------------
+    def requests(self):
+        product, category = self.product, self.category
+        ajax = {"x-requested-with": "XMLHttpRequest"}
+        category_url = reverse("shop:product_list_by_category", args=[category.slug])
+        return [
+            # (label, login as, path, headers)
+            ("product_list", None, reverse("shop:product_list"), {}),
+            ("product_list_price", None, reverse("shop:product_list") + "?price=500-1000", {}),
+            ("product_list_rating", None, reverse("shop:product_list") + "?rating=4", {}),
+            ("product_list_search", None, reverse("shop:product_list") + "?q=Product+1", {}),
+            ("category_page", None, category_url, {}),
+            ("category_facets", None, category_url + "?price=1000-5000&rating=3", {}),
+            ("product_detail", None, reverse("shop:product_detail", args=[product.slug]), {}),
+            ("reviews_page", None, reverse("shop:product_detail", args=[product.slug]) + "?rpage=2", ajax),
+            ("ajax_search", None, reverse("shop:ajax_search") + "?q=Product", {}),
+            ("search_products", None, reverse("shop:search_products") + "?q=Product", {}),
+            ("product_rss", None, reverse("shop:product_reviews_rss", args=[product.id]), {}),
+            ("site_rss", None, reverse("shop:reviews_rss"), {}),
+            ("cart_detail", None, reverse("shop:cart_detail"), {}),
+            ("product_list_user", self.user, reverse("shop:product_list"), {}),
+            ("product_detail_user", self.user, reverse("shop:product_detail", args=[product.slug]), {}),
+            ("wishlist", self.user, reverse("shop:wishlist"), {}),
+            ("my_orders", self.user, reverse("shop:my_orders"), {}),
+            ("order_detail", self.user, reverse("shop:order_detail", args=[self.order.id]), {}),
+            ("profile", self.user, reverse("shop:profile"), {}),
+            ("checkout_buy_now", self.user, reverse("shop:checkout") + f"?buy={product.id}&qty=1", {}),
+            ("admin_products", self.admin, reverse("admin:shop_product_changelist"), {}),
+            ("admin_product_search", self.admin, reverse("admin:shop_product_changelist") + "?q=PRODUCT+1", {}),
+            ("admin_feedback_search", self.admin, reverse("admin:shop_feedback_changelist") + "?q=product+1", {}),
+            ("admin_orders", self.admin, reverse("admin:shop_order_changelist") + "?status__exact=paid", {}),
+            ("admin_order_search", self.admin, reverse("admin:shop_order_changelist") + f"?q={self.user.email}", {}),
+            ("admin_feedback", self.admin, reverse("admin:shop_feedback_changelist"), {}),
+            ("admin_moderation", self.admin, reverse("admin:shop_feedback_moderation"), {}),
+        ]
+
+    def exercise(self):
+        """{(label, alias, sql): params} for every distinct statement the requests ran."""
+        captured = {}
+        for label, user, path, headers in self.requests():
+            client = Client()
+            if user is not None:
+                client.force_login(user)
+            with ExitStack() as stack:
+                for alias in connections:
+                    stack.enter_context(connections[alias].execute_wrapper(self.recorder(label, alias, captured)))
+                response = client.get(path, headers=headers)
+                if response.streaming:
+                    b"".join(response.streaming_content)
+            if response.status_code != 200:
+                raise CommandError(f"{label}: GET {path} returned {response.status_code}")
+
+        # the payment handler's lookup (the view itself needs a signed Razorpay callback)
+        with connections["default"].execute_wrapper(self.recorder("payment_handler", "default", captured)):
+            Order.objects.filter(razorpay_order_id=self.order.razorpay_order_id, id=self.order.id).exists()
+        # the expired-reservation sweeps (per product at checkout, and from cron)
+        with connections["default"].execute_wrapper(self.recorder("stock_sweep", "default", captured)):
+            stock.release_expired(product_id=self.product.id)
+            stock.release_expired()
+        return captured
+
+    @staticmethod
+    def recorder(label, alias, captured):
+        def record(execute, sql, params, many, context):
+            if not many and STATEMENT.match(sql):
+                captured.setdefault((label, alias, sql), params)
+            return execute(sql, params, many, context)
+        return record
+
+    # -------------------------
+    # PLANS
+    # -------------------------
+    def explain_all(self, captured, show_plans):
+        failures = 0
+        for (label, alias, sql), params in captured.items():
+            plan, scanned = self.explain(connections[alias], sql, params)
+            bad = disallowed_scans(label, scanned)
+            if bad:
+                failures += 1
+                self.stdout.write(self.style.ERROR(f"FULL SCAN of {', '.join(bad)} in {label}:"))
+            if bad or show_plans:
+                self.stdout.write(f"  {sql}\n    " + "\n    ".join(plan) + "\n")
+        return failures
+
+    def explain(self, connection, sql, params):
+        """(plan lines, tables read by a full scan)."""
+        with connection.cursor() as cursor:
+            if connection.vendor == "sqlite":
+                cursor.execute("EXPLAIN QUERY PLAN " + sql, params)
+                plan = [row[3] for row in cursor.fetchall()]
+                matches = (SQLITE_SCAN.match(line) for line in plan)
+            elif connection.vendor == "postgresql":
+                # tiny seeded tables would otherwise always be seq-scanned
+                cursor.execute("SET enable_seqscan = off")
+                cursor.execute("EXPLAIN " + sql, params)
+                plan = [row[0] for row in cursor.fetchall()]
+                matches = (POSTGRES_SCAN.search(line) for line in plan)
+            else:
+                raise CommandError(f"No plan parser for {connection.vendor}.")
+        scanned = scan_targets(sql, {m.group(1) for m in matches if m})
+        return plan, [t for t in scanned if not t.startswith("sqlite_")]  # the catalog, ANALYZE statistics
@@ -0,0 +1,285 @@
+# shop/management/commands/import_catalog.py
+import csv
+import itertools
+import json
+import sys
+import time
+from decimal import Decimal, InvalidOperation
+
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+from django.core.validators import validate_slug
+from django.db import connection, transaction
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.text import slugify
+
+from shop import facets, feeds, prerender
+from shop.models import Category, Product
+
+REQUIRED = ("name", "category", "price")
+SLUG_BASE_LENGTH = 44  # SlugField max_length is 50; leaves room for "-12345"
+FALSE_VALUES = {"0", "false", "no", "n", "off", ""}
+
+
+# -------------------------
+# READERS (one row in memory at a time)
+# -------------------------
+def read_csv(stream):
+    reader = csv.DictReader(stream)
+    yield reader.fieldnames or []
+    for row in reader:
+        yield reader.line_num, row
+
+
+def read_jsonl(stream):
+    """The first object's keys act as the header; bad lines come through as None."""
+    first = True
+    for line_num, line in enumerate(stream, 1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError:
+            row = None
+        if first:
+            if not isinstance(row, dict):
+                raise CommandError(f"line {line_num}: expected a JSON object")
+            yield list(row)
+            first = False
+        yield line_num, row
+    if first:
+        yield []
+
+
+# -------------------------
+# ROW CLEANING
+# -------------------------
+def clean_row(row):
+    if not isinstance(row, dict):
+        raise ValueError("not a JSON object")
+    name = str(row.get("name") or "").strip()
+    category = str(row.get("category") or "").strip()
+    if not name or not category:
+        raise ValueError("name and category are required")
+    try:
+        price = Decimal(str(row.get("price")).strip()).quantize(Decimal("0.01"))
+    except (InvalidOperation, ValueError):
+        raise ValueError(f"bad price {row.get('price')!r}")
+    if price < 0 or price >= 10 ** 8:
+        raise ValueError(f"price out of range: {price}")
+
+    slug = str(row.get("slug") or "").strip()
+    if slug:
+        try:
+            validate_slug(slug)
+        except ValidationError:
+            raise ValueError(f"bad slug {slug!r}")
+    is_active = row.get("is_active", True)
+    if isinstance(is_active, str):
+        is_active = is_active.strip().lower() not in FALSE_VALUES
+    return {
+        "name": name[:200],
+        "category": category[:120],
+        "price": price,
+        "slug": slug[:50],
+        "description": str(row.get("description") or ""),
+        "image_url": str(row.get("image_url") or "")[:200],
+        "is_active": bool(is_active),
+    }
+
+
+class Command(BaseCommand):
+    help = (
+        "Upsert products from a CSV file (header row) or JSON Lines file, streaming it in "
+        "batches. Columns: name, category, price, and optionally slug, description, "
+        "image_url, is_active. Rows match existing products by slug, or, without a slug, "
+        "by name (new products get a unique slug). Missing categories are created. "
+        "Columns absent from the file (for JSON Lines: from the first object) are left "
+        "unchanged on existing products."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="File to import, or - for stdin")
+        parser.add_argument("--format", choices=("csv", "jsonl"),
+                            help="Defaults to the file extension (.csv / .jsonl / .json)")
+        parser.add_argument("--batch-size", type=int, default=1000,
+                            help="Rows per INSERT ... ON CONFLICT and per transaction")
+        parser.add_argument("--max-errors", type=int, default=100,
+                            help="Abort after this many rejected rows")
+
+    def handle(self, *args, **options):
+        self.verbosity = options["verbosity"]
+        path, fmt = options["path"], options["format"]
+        if fmt is None:
+            if path.endswith(".csv"):
+                fmt = "csv"
+            elif path.endswith((".jsonl", ".json")):
+                fmt = "jsonl"
+            else:
+                raise CommandError("Can't tell the format from the file name; pass --format.")
+
+        stream = sys.stdin if path == "-" else open(path, newline="", encoding="utf-8-sig")
+        try:
+            rows = read_csv(stream) if fmt == "csv" else read_jsonl(stream)
+            self.import_rows(rows, options)
+        finally:
+            if stream is not sys.stdin:
+                stream.close()
+
+    def import_rows(self, rows, options):
+        columns = set(next(rows))
+        missing = [c for c in REQUIRED if c not in columns]
+        if missing:
+            raise CommandError(f"Missing column(s): {', '.join(missing)}")
+        # only overwrite what the file actually provides (slug is the key, never updated)
+        self.update_fields = ["category", "name", "price", "updated_at"] + [
+            c for c in ("description", "image_url", "is_active") if c in columns
+        ]
+        self.categories = dict(Category.objects.values_list("name", "id"))
+        self.categories_created = 0
+        self.errors = 0
+        self.max_errors = options["max_errors"]
+
+        started_at = timezone.now()
+        start = time.perf_counter()
+        total = upserted = 0
+        last_report = start
+        while True:
+            batch = list(itertools.islice(rows, options["batch_size"]))
+            if not batch:
+                break
+            total += len(batch)
+            upserted += self.import_batch(batch)
+            now = time.perf_counter()
+            if self.verbosity >= 1 and now - last_report >= 1:
+                last_report = now
+                self.stdout.write(f"  {total:>10,} rows  {upserted:>10,} upserted  {total / (now - start):>8,.0f} rows/s")
+
+        elapsed = time.perf_counter() - start
+        self.finish(started_at)
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {upserted:,} of {total:,} rows in {elapsed:.1f}s "
+            f"({total / elapsed if elapsed else 0:,.0f} rows/s); "
+            f"{self.categories_created} new categories, {self.errors} rejected rows."
+        ))
+
+    # -------------------------
+    # BATCH
+    # -------------------------
+    def import_batch(self, batch):
+        cleaned = []
+        for line_num, raw in batch:
+            try:
+                cleaned.append(clean_row(raw))
+            except ValueError as exc:
+                self.reject(line_num, exc)
+
+        with transaction.atomic():
+            self.ensure_categories({r["category"] for r in cleaned})
+            # a slug may appear only once per INSERT ... ON CONFLICT; the last row wins
+            products = {}
+            for row, slug in zip(cleaned, self.assign_slugs(cleaned)):
+                products[slug] = Product(
+                    slug=slug,
+                    category_id=self.categories[row["category"]],
+                    name=row["name"],
+                    price=row["price"],
+                    description=row["description"],
+                    image_url=row["image_url"],
+                    is_active=row["is_active"],
+                )
+            Product.objects.bulk_create(
+                products.values(),
+                update_conflicts=True,
+                unique_fields=["slug"],
+                update_fields=self.update_fields,
+            )
+        return len(products)
+
+    def reject(self, line_num, exc):
+        self.errors += 1
+        self.stderr.write(f"  line {line_num}: {exc}")
+        if self.errors >= self.max_errors:
+            raise CommandError(f"Stopped after {self.errors} rejected rows (--max-errors).")
+
+    def ensure_categories(self, names):
+        for name in sorted(names - self.categories.keys()):
+            base = slugify(name)[:SLUG_BASE_LENGTH] or "category"
+            taken = set(Category.objects.filter(slug__startswith=base).values_list("slug", flat=True))
+            slug = next(s for s in self.candidates(base) if s not in taken)
+            category, created = Category.objects.get_or_create(name=name, defaults={"slug": slug})
+            self.categories[name] = category.id
+            self.categories_created += created
+
+    # -------------------------
+    # SLUGS
+    # -------------------------
+    @staticmethod
+    def candidates(base):
+        yield base
+        for n in itertools.count(2):
+            yield f"{base}-{n}"
+
+    def assign_slugs(self, rows):
+        """
+        One slug per row, in one or two queries per batch: rows with a slug keep it;
+        a row without one reuses the slug of the existing product with the same
+        name, or gets the first free one of name, name-2, name-3, ...
+        """
+        reserved = {r["slug"] for r in rows if r["slug"]}
+        bases = {r["name"]: slugify(r["name"])[:SLUG_BASE_LENGTH] or "product" for r in rows if not r["slug"]}
+        if not bases:
+            return [r["slug"] for r in rows]
+
+        existing = dict(Product.objects.filter(slug__in=set(bases.values())).values_list("slug", "name"))
+        # only bases held by a differently named product need their -N siblings
+        # (chunked: SQLite limits the depth of an OR chain)
+        collided = sorted({base for name, base in bases.items() if existing.get(base, name) != name})
+        for i in range(0, len(collided), 200):
+            q = Q()
+            for base in collided[i:i + 200]:
+                q |= Q(slug__startswith=f"{base}-")
+            existing.update(Product.objects.filter(q).values_list("slug", "name"))
+        by_name = {name: slug for slug, name in existing.items()}
+
+        taken = reserved | existing.keys()
+        assigned = {}
+        for name, base in bases.items():
+            slug = by_name.get(name)
+            if slug is None or slug in reserved:
+                slug = next(s for s in self.candidates(base) if s not in taken)
+            taken.add(slug)
+            assigned[name] = slug
+        return [r["slug"] or assigned[r["name"]] for r in rows]
+
+    # -------------------------
+    # AFTER THE IMPORT
+    # -------------------------
+    def finish(self, started_at):
+        """Cache and planner-statistics upkeep, once for the whole import."""
+        # bulk_create sends no post_save; drop cached feeds of products that
+        # existed before and were touched (new ones have nothing cached)
+        touched = (
+            Product.objects.filter(updated_at__gte=started_at, created_at__lt=started_at)
+            .values_list("id", flat=True)
+            .iterator(chunk_size=2000)
+        )
+        invalidated = 0
+        for chunk in iter(lambda: list(itertools.islice(touched, 2000)), []):
+            feeds.invalidate_products(chunk)
+            invalidated += len(chunk)
+        facets.bump()
+        # new and updated products, their categories' pages and the listings
+        prerender.products_changed(Product.objects.filter(updated_at__gte=started_at))
+        prerender.flush()
+
+        # refresh index statistics (sqlite_stat1 also backs the admin's count estimate)
+        table = connection.ops.quote_name(Product._meta.db_table)
+        with connection.cursor() as cursor:
+            if connection.vendor == "mysql":
+                cursor.execute(f"ANALYZE TABLE {table}")
+            elif connection.vendor in ("sqlite", "postgresql"):
+                cursor.execute(f"ANALYZE {table}")
+        if self.verbosity >= 1:
+            self.stdout.write(f"  invalidated feeds for {invalidated:,} updated products; analyzed {table}")
@@ -0,0 +1,125 @@
+# shop/management/commands/memory_report.py
+import io
+import statistics
+import sys
+import tracemalloc
+
+from django.conf import settings
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.management.base import BaseCommand, CommandError
+from django.urls import reverse
+
+from shop import memory
+from shop.models import Product
+
+
+def kib(size):
+    return f"{size / 1024:,.1f}"
+
+
+class Command(BaseCommand):
+    help = (
+        "Request pages repeatedly in this process with tracemalloc on, snapshot after each round "
+        "and report what keeps growing (allocation sites, in-process caches, live model "
+        "instances) plus each page's peak allocation per request. --budget-kb turns it into "
+        "a regression check."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--path", action="append", help="URL to request (repeatable; "
+                            "default: the product list and the first product)")
+        parser.add_argument("--rounds", type=int, default=5)
+        parser.add_argument("--requests", type=int, default=10, help="Requests per URL per round")
+        parser.add_argument("--top", type=int, default=15)
+        parser.add_argument("--frames", type=int, default=16, help="Frames kept per allocation")
+        parser.add_argument("--budget-kb", type=float, default=None,
+                            help="Fail if a URL's peak allocation per request exceeds this")
+
+    def handle(self, *args, **options):
+        paths = options["path"] or self.default_paths()
+        if tracemalloc.is_tracing():
+            memory.stop()
+        memory.start(options["frames"])
+        # a bare handler, not the test client: its signal hooks would show up as growth
+        handler = WSGIHandler()
+        host = next((h for h in settings.ALLOWED_HOSTS if h != "*" and not h.startswith(".")), "localhost")
+
+        # first requests fill caches and compile templates: not growth
+        for path in paths:
+            self.fetch(handler, host, path)
+        baseline = previous = memory.snapshot("baseline")
+        self.stdout.write(f"{'round':>5} {'traced KiB':>11} {'growth KiB':>11} {'rss KiB':>10}")
+        self.stdout.write(f"{'base':>5} {kib(baseline['traced']):>11} {'':>11} {kib(baseline['rss'] or 0):>10}")
+
+        peaks = {path: 0 for path in paths}
+        growth = []
+        for round_no in range(1, options["rounds"] + 1):
+            for path in paths:
+                for _ in range(options["requests"]):
+                    tracemalloc.reset_peak()
+                    base = tracemalloc.get_traced_memory()[0]
+                    self.fetch(handler, host, path)
+                    peaks[path] = max(peaks[path], tracemalloc.get_traced_memory()[1] - base)
+            current = memory.snapshot(f"round {round_no}")
+            growth.append(current["traced"] - previous["traced"])
+            self.stdout.write(f"{round_no:>5} {kib(current['traced']):>11} {kib(growth[-1]):>11} "
+                              f"{kib(current['rss'] or 0):>10}")
+            previous = current
+
+        requests = options["rounds"] * options["requests"] * len(paths)
+        self.stdout.write(f"median growth per round: {kib(statistics.median(growth))} KiB "
+                          f"({len(paths)} URLs x {options['requests']} requests)")
+
+        self.stdout.write(self.style.MIGRATE_HEADING(f"\nGrowth since the baseline ({requests} requests)"))
+        self.stdout.write(f"{'grew KiB':>9} {'blocks':>7}  allocated at  [via project code]")
+        for row in memory.diff(baseline["snapshot"], previous["snapshot"], options["top"]):
+            via = f"  [{row['via']}]" if row["via"] and row["via"] != row["site"] else ""
+            self.stdout.write(f"{kib(row['size_diff']):>9} {row['count_diff']:>+7}  {row['site']}{via}")
+
+        self.stdout.write(self.style.MIGRATE_HEADING("\nIn-process caches"))
+        for row in memory.cache_sizes():
+            size = kib(row["bytes"]) if row["bytes"] is not None else "-"
+            entries = row["entries"] if row["entries"] is not None else "-"
+            self.stdout.write(f"{size:>9} KiB {entries:>7} entries  {row['name']}")
+
+        self.stdout.write(self.style.MIGRATE_HEADING("\nLive model instances"))
+        for label, count in memory.live_models(options["top"]):
+            self.stdout.write(f"{count:>9}  {label}")
+
+        self.stdout.write(self.style.MIGRATE_HEADING("\nPeak allocation per request"))
+        budget = options["budget_kb"]
+        over = []
+        for path, peak in sorted(peaks.items(), key=lambda kv: -kv[1]):
+            flag = ""
+            if budget is not None and peak > budget * 1024:
+                flag = "  OVER BUDGET"
+                over.append(path)
+            self.stdout.write(f"{kib(peak):>9} KiB  {path}{flag}")
+        memory.stop()
+
+        if over:
+            raise CommandError(f"{len(over)} URL(s) over the {budget:.0f} KiB allocation budget: "
+                               f"{', '.join(over)}")
+
+    def default_paths(self):
+        paths = [reverse("shop:product_list")]
+        product = Product.objects.filter(is_active=True).order_by("id").first()
+        if product:
+            paths.append(reverse("shop:product_detail", args=[product.slug]))
+        return paths
+
+    def fetch(self, handler, host, path):
+        environ = {
+            "REQUEST_METHOD": "GET", "PATH_INFO": path, "QUERY_STRING": "",
+            "SERVER_NAME": "localhost", "SERVER_PORT": "80", "HTTP_HOST": host,
+            "HTTP_X_PRERENDER": "1",  # measure the app, not a prerendered file (shop/prerender.py)
+            "wsgi.url_scheme": "http", "wsgi.input": io.BytesIO(), "wsgi.errors": sys.stderr,
+        }
+        status = []
+        response = handler(environ, lambda s, h, *a: status.append(s))
+        try:
+            b"".join(response)
+        finally:
+            response.close()
+        if not status[0].startswith(("2", "3")):
+            raise CommandError(f"GET {path} returned {status[0]}")
@@ -0,0 +1,64 @@
+# shop/management/commands/prerender.py
+import multiprocessing
+import os
+import shutil
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from shop import prerender
+
+
+def render_chunk(paths):
+    # runs in a forked worker: the parent's connections must not be shared
+    connections.close_all()
+    try:
+        return prerender.render_paths(paths)
+    finally:
+        connections.close_all()
+
+
+class Command(BaseCommand):
+    help = (
+        "Render the home, catalog, category and product pages for anonymous visitors "
+        "into PRERENDER_ROOT (with .gz/.br variants), spread over worker processes. "
+        "Once built, edits re-render the affected pages in the background; rerun after "
+        "deploying template or static changes."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+        parser.add_argument("--clear", action="store_true",
+                            help="Delete PRERENDER_ROOT first (stops serving until rebuilt)")
+
+    def handle(self, *args, **options):
+        if not prerender.ROOT:
+            raise CommandError("PRERENDER_ROOT is not set.")
+        if options["clear"] and os.path.isdir(prerender.ROOT):
+            shutil.rmtree(prerender.ROOT)
+        os.makedirs(prerender.ROOT, exist_ok=True)
+
+        start = time.perf_counter()
+        paths = prerender.all_paths()
+        pruned = prerender.prune(paths)
+        workers = max(1, min(options["workers"], len(paths)))
+        chunks = [paths[i::workers] for i in range(workers)]
+
+        if workers == 1:
+            results = [prerender.render_paths(paths)]
+        else:
+            connections.close_all()  # forked workers open their own
+            with ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context("fork")) as pool:
+                results = list(pool.map(render_chunk, chunks))
+
+        written = sum(r[0] for r in results)
+        size = sum(r[1] for r in results)
+        failures = [f for r in results for f in r[2]]
+        for path, status in failures:
+            self.stderr.write(f"  {path}: HTTP {status} (removed)")
+        self.stdout.write(self.style.SUCCESS(
+            f"Prerendered {written} page(s), {size / 1e6:.1f} MB uncompressed, with {workers} worker(s) "
+            f"in {time.perf_counter() - start:.1f}s; pruned {pruned}, failed {len(failures)}."
+        ))
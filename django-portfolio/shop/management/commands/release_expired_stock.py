@@ -0,0 +1,16 @@
+# shop/management/commands/release_expired_stock.py
+from django.core.management.base import BaseCommand
+
+from shop import stock
+
+
+class Command(BaseCommand):
+    help = (
+        "Return the units held by checkouts that were never paid and whose reservation "
+        "has passed STOCK_RESERVATION_MINUTES. Meant for cron, e.g. every minute; a "
+        "sold-out product also sweeps its own expired holds at checkout."
+    )
+
+    def handle(self, *args, **options):
+        released = stock.release_expired()
+        self.stdout.write(f"released {released} unit(s) from expired reservations")
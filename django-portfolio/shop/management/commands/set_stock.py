@@ -0,0 +1,44 @@
+# shop/management/commands/set_stock.py
+from django.core.management.base import BaseCommand, CommandError
+
+from shop import stock
+from shop.models import Product
+
+
+class Command(BaseCommand):
+    help = (
+        "Set or add to a product's stock. --shards splits the units over several rows "
+        "so concurrent checkouts of a popular product don't queue on one row lock. "
+        "--untrack removes stock tracking (the product can always be ordered)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("product", help="Product id or slug")
+        parser.add_argument("units", type=int, nargs="?")
+        parser.add_argument("--shards", type=int, default=1)
+        parser.add_argument("--add", action="store_true", help="Add units to the current stock instead of replacing it")
+        parser.add_argument("--untrack", action="store_true")
+
+    def handle(self, *args, **options):
+        key = options["product"]
+        try:
+            product = Product.objects.get(pk=int(key)) if key.isdigit() else Product.objects.get(slug=key)
+        except Product.DoesNotExist:
+            raise CommandError(f"No product {key!r}.")
+
+        if options["untrack"]:
+            product.stock_shards.all().delete()
+            self.stdout.write(f"{product.name}: stock no longer tracked")
+            return
+        units = options["units"]
+        if units is None or units < 0 or options["shards"] < 1:
+            raise CommandError("Give a non-negative number of units and at least one shard.")
+        try:
+            if options["add"]:
+                stock.restock(product, units)
+            else:
+                stock.set_stock(product, units, options["shards"])
+        except ValueError as exc:
+            raise CommandError(str(exc))
+        on_hand = stock.available([product.pk]).get(product.pk, 0)
+        self.stdout.write(f"{product.name}: {on_hand} available over {product.stock_shards.count()} shard(s)")
@@ -0,0 +1,99 @@
+# shop/management/commands/slow_queries.py
+import json
+import os
+import re
+from collections import Counter, defaultdict
+from datetime import datetime, timedelta, timezone
+
+from django.core.management.base import BaseCommand, CommandError
+
+from shop import slowlog
+
+SORT_KEYS = {
+    "total": lambda s: s["total"],
+    "count": lambda s: s["count"],
+    "max": lambda s: s["max"],
+    "avg": lambda s: s["total"] / s["count"],
+}
+
+
+def parse_age(value):
+    match = re.fullmatch(r"(\d+)([mhd])", value)
+    if not match:
+        raise CommandError("--since takes e.g. 30m, 12h or 7d")
+    unit = {"m": "minutes", "h": "hours", "d": "days"}[match.group(2)]
+    return timedelta(**{unit: int(match.group(1))})
+
+
+class Command(BaseCommand):
+    help = (
+        "Rank the query shapes in the slow-query log (SLOW_QUERY_LOG_FILE and its rotated "
+        "files) by total time, with the views, code frames and template nodes that ran them."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("files", nargs="*", help="Log files (default: SLOW_QUERY_LOG_FILE + rotations)")
+        parser.add_argument("--top", type=int, default=10)
+        parser.add_argument("--sort", choices=sorted(SORT_KEYS), default="total")
+        parser.add_argument("--since", help="Only records newer than e.g. 30m, 12h, 7d")
+        parser.add_argument("--view", help="Only queries from this URL name (e.g. shop:product_detail)")
+        parser.add_argument("--sql", action="store_true", help="Print a sample statement and its parameters")
+
+    def handle(self, *args, **options):
+        files = options["files"] or self.default_files()
+        if not files:
+            raise CommandError("No slow-query log found (SLOW_QUERY_LOG_FILE).")
+        since = datetime.now(timezone.utc) - parse_age(options["since"]) if options["since"] else None
+
+        shapes = defaultdict(lambda: {"count": 0, "total": 0.0, "max": 0.0, "origins": Counter()})
+        records = skipped = 0
+        for path in files:
+            with open(path, encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        skipped += 1
+                        continue
+                    if since and datetime.fromisoformat(entry["ts"]) < since:
+                        continue
+                    view = (entry.get("view") or {}).get("name")
+                    if options["view"] and view != options["view"]:
+                        continue
+                    records += 1
+                    shape = shapes[entry["fingerprint"]]
+                    shape["count"] += 1
+                    shape["total"] += entry["ms"]
+                    if entry["ms"] >= shape["max"]:
+                        shape["max"], shape["sample"] = entry["ms"], entry
+                    shape["origins"][(view or "-", entry.get("frame") or "-", entry.get("template"))] += 1
+
+        if not records:
+            self.stdout.write("No matching slow queries.")
+            return
+        total = sum(s["total"] for s in shapes.values())
+        self.stdout.write(
+            f"{records} slow queries, {len(shapes)} shapes, {total / 1000:.1f} s in total "
+            f"({', '.join(files)}{f'; {skipped} unreadable lines' if skipped else ''})\n"
+        )
+        ranked = sorted(shapes.items(), key=lambda kv: SORT_KEYS[options["sort"]](kv[1]), reverse=True)
+        for rank, (fp, shape) in enumerate(ranked[:options["top"]], 1):
+            sample = shape["sample"]
+            self.stdout.write(self.style.MIGRATE_HEADING(
+                f"#{rank} {fp}  total {shape['total']:.0f} ms  count {shape['count']}  "
+                f"avg {shape['total'] / shape['count']:.1f} ms  max {shape['max']:.1f} ms  "
+                f"({shape['total'] / total:.0%} of logged time)"
+            ))
+            self.stdout.write(f"  {sample['shape'][:300]}")
+            for (view, frame, template), n in shape["origins"].most_common(3):
+                self.stdout.write(f"  {n:>6}x  {view}  {frame}" + (f"  [{template}]" if template else ""))
+            if options["sql"]:
+                self.stdout.write(f"  sample: {sample['sql'][:1000]}")
+                self.stdout.write(f"  params: {sample['params']}")
+            self.stdout.write("")
+
+    def default_files(self):
+        if not slowlog.LOG_FILE:
+            return []
+        candidates = [slowlog.LOG_FILE] + [f"{slowlog.LOG_FILE}.{i}" for i in range(1, slowlog.BACKUPS + 1)]
+        return [path for path in candidates if os.path.exists(path)]
@@ -0,0 +1,45 @@
+# shop/management/commands/sqlite_maintenance.py
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+
+class Command(BaseCommand):
+    help = (
+        "Routine upkeep for a WAL-mode SQLite database: refresh planner statistics, "
+        "checkpoint and truncate the WAL, optionally VACUUM. Meant for cron, e.g. "
+        "hourly without --vacuum and weekly with it."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--database", default="default")
+        parser.add_argument("--full-analyze", action="store_true",
+                            help="Run ANALYZE on every table instead of PRAGMA optimize")
+        parser.add_argument("--vacuum", action="store_true",
+                            help="Rebuild the file to reclaim free pages (blocks writers while it runs)")
+
+    def handle(self, *args, **options):
+        connection = connections[options["database"]]
+        if connection.vendor != "sqlite":
+            raise CommandError(f"{options['database']!r} is not a SQLite database.")
+
+        with connection.cursor() as cursor:
+            self.step(cursor, "ANALYZE" if options["full_analyze"] else "PRAGMA optimize")
+            if options["vacuum"]:
+                self.step(cursor, "VACUUM")
+            # after VACUUM, so the rebuilt pages are folded back into the main file
+            busy, log_frames, checkpointed = self.step(cursor, "PRAGMA wal_checkpoint(TRUNCATE)")
+            if log_frames == -1:
+                self.stdout.write("  database is not in WAL mode; nothing to checkpoint")
+            elif busy:
+                self.stderr.write("WAL checkpoint could not finish: readers were active.")
+            else:
+                self.stdout.write(f"  checkpointed {checkpointed}/{log_frames} WAL frames")
+
+    def step(self, cursor, sql):
+        start = time.perf_counter()
+        cursor.execute(sql)
+        row = cursor.fetchone()
+        self.stdout.write(f"{sql:<36} {(time.perf_counter() - start) * 1000:>8.1f} ms")
+        return row
@@ -0,0 +1,125 @@
+# shop/management/commands/startup_profile.py
+import json
+import os
+import statistics
+import subprocess
+import sys
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+# Runs in a fresh interpreter, as a worker would boot: load the WSGI app,
+# build the URLconf, answer one request. Prints its timings as JSON.
+CHILD = r"""
+import io, json, os, sys, time
+start = time.perf_counter()
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "portfolio_site.settings")
+from django.core.wsgi import get_wsgi_application
+application = get_wsgi_application()
+booted = time.perf_counter()
+from django.urls import get_resolver
+get_resolver().url_patterns
+resolved = time.perf_counter()
+status = []
+environ = {
+    "REQUEST_METHOD": "GET", "PATH_INFO": sys.argv[1], "QUERY_STRING": "",
+    "SERVER_NAME": "localhost", "SERVER_PORT": "80", "HTTP_HOST": sys.argv[2],
+    "HTTP_X_PRERENDER": "1",  # measure the app, not a prerendered file (shop/prerender.py)
+    "wsgi.url_scheme": "http", "wsgi.input": io.BytesIO(), "wsgi.errors": sys.stderr,
+}
+body = b"".join(application(environ, lambda s, h, *a: status.append(s)))
+done = time.perf_counter()
+print(json.dumps({
+    "boot": booted - start, "urls": resolved - booted, "first": done - resolved, "total": done - start,
+    "cpu": time.process_time(),  # steadier than wall time on a busy machine
+    "status": status[0] if status else "", "bytes": len(body), "modules": sorted(sys.modules),
+}))
+"""
+
+# imports the views keep off the startup path (see shop/views/__init__.py)
+WATCHED = ("razorpay", "requests", "smtplib", "PIL.Image")
+
+
+def parse_importtime(stderr):
+    """[(name, self_us, cumulative_us, depth), ...] from -X importtime output."""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative, name = line[len("import time:"):].split("|")
+        stripped = name.lstrip()
+        # one space after the bar, then two per nesting level
+        rows.append((stripped.rstrip(), int(self_us), int(cumulative), (len(name) - len(stripped) - 1) // 2))
+    return rows
+
+
+class Command(BaseCommand):
+    help = (
+        "Boot the site in fresh interpreters (python -X importtime) and report import cost "
+        "(cumulative per top-level import, self time per package) plus time to the first "
+        "response. --budget-ms turns it into a regression check."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--runs", type=int, default=5)
+        parser.add_argument("--path", default="/shop/", help="URL of the first request")
+        parser.add_argument("--top", type=int, default=15, help="Rows per import table")
+        parser.add_argument("--budget-ms", type=float, default=None,
+                            help="Fail if the median boot + first response exceeds this")
+
+    def handle(self, *args, **options):
+        host = next((h for h in settings.ALLOWED_HOSTS if h != "*" and not h.startswith(".")), "localhost")
+        env = {**os.environ, "DJANGO_SETTINGS_MODULE": os.environ.get("DJANGO_SETTINGS_MODULE",
+                                                                      "portfolio_site.settings")}
+        runs = []
+        self.stdout.write(f"{'run':>3} {'boot ms':>8} {'urls ms':>8} {'first ms':>9} {'total ms':>9} "
+                          f"{'cpu ms':>7} {'modules':>8}  status")
+        for i in range(options["runs"]):
+            proc = subprocess.run(
+                [sys.executable, "-X", "importtime", "-c", CHILD, options["path"], host],
+                cwd=settings.BASE_DIR, env=env, capture_output=True, text=True,
+            )
+            if proc.returncode:
+                raise CommandError(f"Startup failed:\n{proc.stderr[-3000:]}")
+            result = json.loads(proc.stdout.strip().splitlines()[-1])
+            result["imports"] = parse_importtime(proc.stderr)
+            runs.append(result)
+            self.stdout.write(
+                f"{i + 1:>3} {result['boot'] * 1000:>8.0f} {result['urls'] * 1000:>8.0f} "
+                f"{result['first'] * 1000:>9.0f} {result['total'] * 1000:>9.0f} {result['cpu'] * 1000:>7.0f} "
+                f"{len(result['modules']):>8}  {result['status']}"
+            )
+
+        median = lambda key: statistics.median(r[key] for r in runs) * 1000
+        self.stdout.write(
+            f"med {median('boot'):>8.0f} {median('urls'):>8.0f} {median('first'):>9.0f} {median('total'):>9.0f} "
+            f"{median('cpu'):>7.0f}"
+        )
+
+        # import tables from the run closest to the median
+        typical = min(runs, key=lambda r: abs(r["total"] * 1000 - median("total")))
+        self.report_imports(typical["imports"], options["top"])
+        loaded = [m for m in WATCHED if m in typical["modules"]]
+        self.stdout.write(f"\nloaded before the first response: {', '.join(loaded) or 'none'} "
+                          f"(of {', '.join(WATCHED)})")
+
+        if options["budget_ms"] is not None and median("total") > options["budget_ms"]:
+            raise CommandError(f"Median startup {median('total'):.0f} ms is over the "
+                               f"{options['budget_ms']:.0f} ms budget.")
+
+    def report_imports(self, imports, top):
+        total = sum(self_us for _, self_us, _, _ in imports)
+        self.stdout.write(f"\nimports: {len(imports)} modules, {total / 1000:.0f} ms")
+
+        self.stdout.write(f"\n{'cumulative ms':>13}  top-level import")
+        roots = sorted((r for r in imports if r[3] == 0), key=lambda r: -r[2])
+        for name, _, cumulative, _ in roots[:top]:
+            self.stdout.write(f"{cumulative / 1000:>13.1f}  {name}")
+
+        per_package = defaultdict(int)
+        for name, self_us, _, _ in imports:
+            per_package[name.split(".")[0]] += self_us
+        self.stdout.write(f"\n{'self ms':>13}  package")
+        for package, self_us in sorted(per_package.items(), key=lambda kv: -kv[1])[:top]:
+            self.stdout.write(f"{self_us / 1000:>13.1f}  {package}")
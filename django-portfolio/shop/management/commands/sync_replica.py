@@ -0,0 +1,47 @@
+# shop/management/commands/sync_replica.py
+import sqlite3
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from shop.routers import REPLICA_ALIAS
+
+
+class Command(BaseCommand):
+    help = (
+        "Copy the primary SQLite database into the replica file with SQLite's online "
+        "backup API. Readers of the replica wait (busy_timeout) only while pages are copied."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--interval", type=float, default=0,
+                            help="Keep running and re-sync every N seconds")
+        parser.add_argument("--pages", type=int, default=1024,
+                            help="Pages copied per step; the primary stays writable between steps")
+
+    def handle(self, *args, **options):
+        if REPLICA_ALIAS not in connections.settings:
+            raise CommandError("No replica configured (set DATABASE_REPLICA_NAME).")
+        primary = connections["default"].settings_dict
+        replica = connections[REPLICA_ALIAS].settings_dict
+        if primary["ENGINE"] != replica["ENGINE"] or connections["default"].vendor != "sqlite":
+            raise CommandError("sync_replica only copies SQLite files; use the database's own replication.")
+
+        while True:
+            start = time.perf_counter()
+            self.sync(str(primary["NAME"]), str(replica["NAME"]), options["pages"])
+            self.stdout.write(f"replica synced in {(time.perf_counter() - start) * 1000:.0f} ms")
+            if not options["interval"]:
+                break
+            time.sleep(options["interval"])
+
+    def sync(self, source_path, target_path, pages):
+        timeout = connections["default"].settings_dict["OPTIONS"].get("timeout", 5)
+        source = sqlite3.connect(source_path, timeout=timeout)
+        target = sqlite3.connect(target_path, timeout=timeout)
+        try:
+            source.backup(target, pages=pages)
+        finally:
+            target.close()
+            source.close()
@@ -0,0 +1,271 @@
+# shop/memory.py
+"""
+Memory diagnostics for long-lived workers.
+
+  rss()            resident / peak resident set size of this process
+  snapshot(label)  a tracemalloc snapshot (after a gc pass), kept in a small
+                   in-process ring; diff(old, new) ranks the allocation sites
+                   that grew in between, each with the project frame that led
+                   there (shop/views/catalog.py:55) when tracing keeps enough
+                   frames
+  cache_sizes()    entries and deep byte size of each Django cache alias
+                   (local-memory backends only) and each in-process cache
+                   registered with register_cache()
+  live_models()    model instances alive in this process, by model, e.g.
+                   Product objects still held by an evaluated queryset
+
+Tracing costs memory and CPU, so it is off unless MEMORY_TRACE is set (or
+PYTHONTRACEMALLOC, or "start" on the staff memory page). Everything here is
+per process: with several workers each one has its own snapshots.
+
+AllocationBudgetMiddleware (shop/middleware.py) reports each request's peak
+traced allocation and records views over MEMORY_REQUEST_BUDGET_KB here
+(over_budget()). The peak is process-wide, so concurrent requests in other
+threads inflate it.
+
+"manage.py memory_report" drives requests in-process and reports the same
+for a fresh worker.
+"""
+import gc
+import logging
+import os
+import resource
+import sys
+import tracemalloc
+from collections import Counter, deque
+from types import FunctionType, ModuleType
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.db.models import Model
+from django.template import Engine, engines
+from django.utils import timezone
+
+from . import admin_mixins, prerender, profiler, sessions, slowlog
+
+TRACE = getattr(settings, "MEMORY_TRACE", False)
+FRAMES = getattr(settings, "MEMORY_TRACE_FRAMES", 8)
+BUDGET = getattr(settings, "MEMORY_REQUEST_BUDGET_KB", 0) * 1024  # 0 = off
+
+BASE_DIR = str(settings.BASE_DIR)
+_IGNORED_FILES = (tracemalloc.__file__, "<frozen importlib._bootstrap>",
+                  "<frozen importlib._bootstrap_external>", "<unknown>")
+# shared by everything; a cache holding one isn't paying for it
+_NOT_OWNED = (type, ModuleType, FunctionType, Engine)
+
+logger = logging.getLogger(__name__)
+_snapshots = deque(maxlen=getattr(settings, "MEMORY_SNAPSHOTS", 4))
+_over_budget = deque(maxlen=100)
+_caches = {}
+
+
+# -------------------------
+# PROCESS / TRACING
+# -------------------------
+def rss():
+    """(current, peak) resident set size in bytes; current is None where /proc isn't available."""
+    current = None
+    try:
+        with open("/proc/self/status", encoding="ascii") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    current = int(line.split()[1]) * 1024
+                    break
+    except OSError:
+        pass
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return current, peak if sys.platform == "darwin" else peak * 1024
+
+
+def start(frames=None):
+    if not tracemalloc.is_tracing():
+        tracemalloc.start(frames or FRAMES)
+
+
+def stop():
+    tracemalloc.stop()
+    _snapshots.clear()  # their traces can't be compared with a later run
+
+
+def tracing():
+    return tracemalloc.is_tracing()
+
+
+# -------------------------
+# SNAPSHOTS
+# -------------------------
+def snapshot(label=""):
+    """Take a snapshot (tracing must be on) and keep it in the ring; returns its entry."""
+    gc.collect()
+    snap = tracemalloc.take_snapshot().filter_traces([
+        *(tracemalloc.Filter(False, name) for name in _IGNORED_FILES),
+        tracemalloc.Filter(False, __file__, all_frames=True),  # earlier snapshots, reports
+    ])
+    entry = {
+        "label": label,
+        "taken": timezone.now(),
+        "rss": rss()[0],
+        "traced": sum(stat.size for stat in snap.statistics("filename")),
+        "frames": snap.traceback_limit,
+        "snapshot": snap,
+    }
+    _snapshots.append(entry)
+    return entry
+
+
+def snapshots():
+    """Kept snapshots, oldest first."""
+    return list(_snapshots)
+
+
+def _site(frame):
+    filename = frame.filename
+    for prefix in (BASE_DIR, *sorted(sys.path, key=len, reverse=True)):
+        if prefix and filename.startswith(prefix + os.sep):
+            filename = filename[len(prefix) + 1:]
+            break
+    return f"{filename}:{frame.lineno}"
+
+
+def _project_frame(traceback):
+    """Innermost frame in project code (not site-packages or management commands) of a traceback."""
+    for frame in reversed(traceback):  # tracemalloc keeps the innermost frame last
+        filename = frame.filename
+        if (filename.startswith(BASE_DIR) and "site-packages" not in filename
+                and f"{os.sep}management{os.sep}" not in filename):
+            return _site(frame)
+    return None
+
+
+def _row(stat, size, count, size_diff=None, count_diff=None):
+    return {
+        "site": _site(stat.traceback[-1]),
+        "via": _project_frame(stat.traceback),
+        "size": size,
+        "count": count,
+        "size_diff": size_diff,
+        "count_diff": count_diff,
+    }
+
+
+def top(snap, limit=20):
+    """Largest allocation sites of one snapshot."""
+    key = "traceback" if snap.traceback_limit > 1 else "lineno"
+    return [_row(s, s.size, s.count) for s in snap.statistics(key)[:limit]]
+
+
+def diff(old, new, limit=20):
+    """Allocation sites that grew the most from snapshot `old` to `new`."""
+    key = "traceback" if new.traceback_limit > 1 else "lineno"
+    stats = [s for s in new.compare_to(old, key) if s.size_diff > 0]
+    return [_row(s, s.size, s.count, s.size_diff, s.count_diff) for s in stats[:limit]]
+
+
+# -------------------------
+# CACHES AND LIVE OBJECTS
+# -------------------------
+def register_cache(name, getter):
+    """
+    Report an in-process cache in cache_sizes(). `getter` returns the
+    container; it is called at report time, so the cache may be rebuilt.
+    """
+    _caches[name] = getter
+
+
+def deep_size(obj, limit=1_000_000):
+    """Bytes reachable from obj (stopping at classes, modules, functions and engines)."""
+    seen, size, pending = set(), 0, [obj]
+    while pending and len(seen) < limit:
+        item = pending.pop()
+        if id(item) in seen or issubclass(type(item), _NOT_OWNED):  # type(): lazy objects stay lazy
+            continue
+        seen.add(id(item))
+        size += sys.getsizeof(item)
+        pending.extend(gc.get_referents(item))
+    return size
+
+
+def _entries(obj):
+    try:
+        return len(obj)
+    except TypeError:
+        return None
+
+
+def cache_sizes():
+    """[{name, entries, bytes}, ...], largest first; bytes is None if it can't be measured in-process."""
+    rows = []
+    for alias in settings.CACHES:
+        cache = caches[alias]
+        if isinstance(cache, LocMemCache):
+            data = cache._cache
+            rows.append({"name": f"cache '{alias}' (locmem)", "entries": len(data),
+                         "bytes": deep_size(data)})
+        else:
+            rows.append({"name": f"cache '{alias}' ({type(cache).__name__})", "entries": None, "bytes": None})
+    for name, getter in _caches.items():
+        container = getter()
+        if hasattr(container, "cache_info"):  # functools.lru_cache: no access to its contents
+            rows.append({"name": name, "entries": container.cache_info().currsize, "bytes": None})
+        else:
+            rows.append({"name": name, "entries": _entries(container), "bytes": deep_size(container)})
+    return sorted(rows, key=lambda r: r["bytes"] or 0, reverse=True)
+
+
+def live_models(limit=20):
+    """[(app_label.Model, instances), ...] of model instances alive in this process, most first."""
+    gc.collect()
+    # type(), not isinstance(): the latter would evaluate lazy objects (a stale request.user)
+    counts = Counter(o._meta.label for o in gc.get_objects() if issubclass(type(o), Model))
+    return counts.most_common(limit)
+
+
+def _template_cache():
+    cache = {}
+    for engine in engines.all():
+        for loader in getattr(getattr(engine, "engine", None), "template_loaders", ()):
+            cache.update(getattr(loader, "get_template_cache", {}))
+    return cache
+
+
+register_cache("slow-query buffer (slowlog)", lambda: slowlog._buffer)
+register_cache("session write-behind (sessions)", lambda: sessions._pending)
+register_cache("prerender queue (prerender)", lambda: prerender._pending)
+register_cache("profiler path labels (profiler)", lambda: profiler._short_path)
+register_cache("indexed-dates admin classes (admin_mixins)", lambda: admin_mixins._indexed_dates_classes)
+register_cache("compiled templates (cached loader)", _template_cache)
+register_cache("request budget records (memory)", lambda: _over_budget)
+
+
+# -------------------------
+# PER-REQUEST BUDGET
+# -------------------------
+def record_request(request, peak, retained):
+    """Called by AllocationBudgetMiddleware with the request's peak / retained traced bytes."""
+    if not BUDGET or peak <= BUDGET:
+        return
+    match = getattr(request, "resolver_match", None)
+    entry = {
+        "taken": timezone.now(),
+        "view": match.view_name if match else None,
+        "method": request.method,
+        "path": request.get_full_path(),
+        "peak": peak,
+        "retained": retained,
+    }
+    _over_budget.append(entry)
+    logger.warning("%s %s (%s) allocated %d KiB at peak, over the %d KiB budget; %d KiB retained",
+                   entry["method"], entry["path"], entry["view"], peak // 1024, BUDGET // 1024,
+                   retained // 1024)
+
+
+def over_budget(limit=None):
+    """Requests over MEMORY_REQUEST_BUDGET_KB, newest first."""
+    entries = list(_over_budget)[::-1]
+    return entries[:limit] if limit else entries
+
+
+def clear():
+    _snapshots.clear()
+    _over_budget.clear()
@@ -0,0 +1,389 @@
+# shop/middleware.py
+import random
+import string
+import struct
+import tracemalloc
+import zlib
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.utils.cache import patch_vary_headers
+
+from . import routers, slowlog
+from .staticfiles import accepted_encodings
+
+try:
+    import brotli  # optional: pip install brotli
+except ImportError:
+    brotli = None
+
+
+# -------------------------
+# RESPONSE COMPRESSION (gzip / br)
+# -------------------------
+COMPRESSIBLE_CONTENT_TYPES = (
+    "text/",
+    "application/json",
+    "application/javascript",
+    "application/xml",
+    "application/rss+xml",
+    "application/atom+xml",
+    "image/svg+xml",
+)
+
+
+class GzipStream:
+    """
+    gzip framing around a raw deflate stream, written by hand so the header
+    can carry a random-length FNAME field (BREACH length padding).
+    """
+
+    def __init__(self, level, padding=0):
+        self.compressor = zlib.compressobj(level, zlib.DEFLATED, -zlib.MAX_WBITS)
+        self.crc = 0
+        self.size = 0
+        self.padding = padding
+
+    def header(self):
+        if not self.padding:
+            return b"\x1f\x8b\x08\x00" + b"\x00\x00\x00\x00" + b"\x00\xff"
+        fname = "".join(random.choices(string.ascii_letters, k=self.padding)).encode()
+        return b"\x1f\x8b\x08\x08" + b"\x00\x00\x00\x00" + b"\x00\xff" + fname + b"\x00"
+
+    def compress(self, data, flush=False):
+        self.crc = zlib.crc32(data, self.crc)
+        self.size += len(data)
+        out = self.compressor.compress(data)
+        if flush:
+            out += self.compressor.flush(zlib.Z_SYNC_FLUSH)
+        return out
+
+    def finish(self):
+        return self.compressor.flush() + struct.pack("<II", self.crc & 0xFFFFFFFF, self.size & 0xFFFFFFFF)
+
+
+class BrotliStream:
+    def __init__(self, quality):
+        self.compressor = brotli.Compressor(quality=quality)
+
+    def header(self):
+        return b""
+
+    def compress(self, data, flush=False):
+        out = self.compressor.process(data)
+        if flush:
+            out += self.compressor.flush()
+        return out
+
+    def finish(self):
+        return self.compressor.finish()
+
+
+class CompressionMiddleware:
+    """
+    Compresses HTML / JSON / XML responses with brotli or gzip.
+
+    Settings (all optional):
+      COMPRESSION_GZIP_LEVEL       zlib level 1-9 (default 6)
+      COMPRESSION_BROTLI_QUALITY   brotli quality 0-11 (default 4, tuned for dynamic pages)
+      COMPRESSION_MIN_SIZE         don't bother below this many bytes (default 500)
+      COMPRESSION_BREACH_PROTECTION
+          "pad"  - (default) responses that rendered a CSRF token are gzipped
+                   with a random-length header field so their compressed size
+                   can't be used to guess the token byte by byte (BREACH)
+          "skip" - don't compress responses that rendered a CSRF token
+          "off"  - treat them like any other response
+
+    Streaming responses are compressed chunk by chunk (flushed per chunk) so
+    they stay streaming.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.gzip_level = getattr(settings, "COMPRESSION_GZIP_LEVEL", 6)
+        self.brotli_quality = getattr(settings, "COMPRESSION_BROTLI_QUALITY", 4)
+        self.min_size = getattr(settings, "COMPRESSION_MIN_SIZE", 500)
+        self.breach_protection = getattr(settings, "COMPRESSION_BREACH_PROTECTION", "pad")
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        response = self.get_response(request)
+        return self.process_response(request, response)
+
+    async def __acall__(self, request):
+        response = await self.get_response(request)
+        return self.process_response(request, response)
+
+    def process_response(self, request, response):
+        if response.has_header("Content-Encoding") or response.status_code in (204, 206, 304):
+            return response
+        content_type = response.get("Content-Type", "").split(";")[0].strip().lower()
+        if not content_type.startswith(COMPRESSIBLE_CONTENT_TYPES):
+            return response
+        if not response.streaming and len(response.content) < self.min_size:
+            return response
+
+        patch_vary_headers(response, ("Accept-Encoding",))
+
+        uses_csrf = self.uses_csrf_token(request, response)
+        if uses_csrf and self.breach_protection == "skip":
+            return response
+
+        padded = uses_csrf and self.breach_protection == "pad"
+        encoding = self.choose_encoding(request, padded=padded)
+        if encoding is None:
+            return response
+        stream = self.make_stream(encoding, padded=padded)
+
+        if response.streaming:
+            if response.is_async:
+                response.streaming_content = self.compress_async(stream, response.streaming_content)
+            else:
+                response.streaming_content = self.compress_sequence(stream, response.streaming_content)
+            del response.headers["Content-Length"]
+        else:
+            compressed = stream.header() + stream.compress(response.content) + stream.finish()
+            if len(compressed) >= len(response.content):
+                return response
+            response.content = compressed
+            response["Content-Length"] = str(len(compressed))
+
+        # The body changed, so a strong ETag no longer matches byte for byte
+        etag = response.get("ETag")
+        if etag and etag.startswith('"'):
+            response["ETag"] = "W/" + etag
+        response["Content-Encoding"] = encoding
+        return response
+
+    def uses_csrf_token(self, request, response):
+        """
+        CsrfViewMiddleware (re)sends the CSRF cookie whenever get_token() ran
+        for this request, i.e. when the page embeds a token.
+        """
+        return (
+            settings.CSRF_COOKIE_NAME in response.cookies
+            or bool(request.META.get("CSRF_COOKIE_NEEDS_UPDATE"))
+        )
+
+    def choose_encoding(self, request, padded=False):
+        accepted = accepted_encodings(request)
+        # Padding is only possible in the gzip header, so padded responses
+        # never go out as brotli.
+        if "br" in accepted and brotli is not None and not padded:
+            return "br"
+        if "gzip" in accepted:
+            return "gzip"
+        return None
+
+    def make_stream(self, encoding, padded=False):
+        if encoding == "br":
+            return BrotliStream(self.brotli_quality)
+        return GzipStream(self.gzip_level, padding=random.randint(1, 64) if padded else 0)
+
+    def compress_sequence(self, stream, sequence):
+        yield stream.header()
+        for chunk in sequence:
+            data = stream.compress(bytes(chunk), flush=True)
+            if data:
+                yield data
+        yield stream.finish()
+
+    async def compress_async(self, stream, sequence):
+        yield stream.header()
+        async for chunk in sequence:
+            data = stream.compress(bytes(chunk), flush=True)
+            if data:
+                yield data
+        yield stream.finish()
+
+
+# -------------------------
+# READ-YOUR-WRITES PIN (primary / replica)
+# -------------------------
+class ReplicaPinMiddleware:
+    """
+    Keeps a visitor on the primary database for a few seconds after they
+    wrote something, so pages right after a POST never read a lagging
+    replica. The pin is a short-lived cookie, not a session write.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        tokens = routers.begin_request(routers.PIN_COOKIE in request.COOKIES)
+        try:
+            response = self.get_response(request)
+        finally:
+            wrote = routers.end_request(tokens)
+        return self.pin(request, response, wrote)
+
+    async def __acall__(self, request):
+        tokens = routers.begin_request(routers.PIN_COOKIE in request.COOKIES)
+        try:
+            response = await self.get_response(request)
+        finally:
+            wrote = routers.end_request(tokens)
+        return self.pin(request, response, wrote)
+
+    def pin(self, request, response, wrote):
+        if wrote or request.method not in ("GET", "HEAD", "OPTIONS", "TRACE"):
+            response.set_cookie(
+                routers.PIN_COOKIE, "1", max_age=routers.PIN_SECONDS,
+                httponly=True, samesite="Lax", secure=request.is_secure(),
+            )
+        return response
+
+
+# -------------------------
+# SESSION STATS
+# -------------------------
+class SessionStatsMiddleware:
+    """
+    Reports what the session cost this request as a Server-Timing header
+    (visible in the browser dev tools):
+      session-bytes   size of the serialized session
+      session-db      database writes (write-through or a write-behind flush)
+      session-cache   cache writes
+      session-skip    saves skipped because nothing changed
+
+    Must sit outside SessionMiddleware, which saves on the way out.
+    Enabled by SESSION_STATS (defaults to DEBUG).
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.enabled = getattr(settings, "SESSION_STATS", settings.DEBUG)
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        return self.add_stats(request, self.get_response(request))
+
+    async def __acall__(self, request):
+        return self.add_stats(request, await self.get_response(request))
+
+    def add_stats(self, request, response):
+        stats = getattr(getattr(request, "session", None), "stats", None)
+        if self.enabled and stats is not None:
+            metrics = ", ".join([
+                f"session-bytes;desc={stats['bytes']}",
+                f"session-db;desc={stats['db_writes']}",
+                f"session-cache;desc={stats['cache_writes']}",
+                f"session-skip;desc={stats['skipped']}",
+            ])
+            existing = response.get("Server-Timing")
+            response["Server-Timing"] = f"{existing}, {metrics}" if existing else metrics
+        return response
+
+
+# -------------------------
+# SLOW-QUERY ATTRIBUTION
+# -------------------------
+class SlowQueryMiddleware:
+    """
+    Makes the current request (URL name, method, path) known to the
+    slow-query log (shop/slowlog.py) for the queries it runs. Sits outside
+    sessions and auth so their queries are attributed too.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        token = slowlog.begin_request(request)
+        try:
+            return self.get_response(request)
+        finally:
+            slowlog.end_request(token)
+
+    async def __acall__(self, request):
+        token = slowlog.begin_request(request)
+        try:
+            return await self.get_response(request)
+        finally:
+            slowlog.end_request(token)
+
+
+# -------------------------
+# ALLOCATION BUDGET
+# -------------------------
+class AllocationBudgetMiddleware:
+    """
+    Measures each request's peak and retained tracemalloc allocation,
+    reports them as a Server-Timing header (alloc-peak / alloc-kept, KiB)
+    and logs views whose peak exceeds MEMORY_REQUEST_BUDGET_KB; the staff
+    memory page lists them (shop/memory.py).
+
+    Off (removed from the stack) unless MEMORY_REQUEST_BUDGET_KB is set;
+    turning it on starts tracemalloc. The peak is process-wide, so
+    concurrent requests in other threads count towards it.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not getattr(settings, "MEMORY_REQUEST_BUDGET_KB", 0):
+            raise MiddlewareNotUsed
+        from . import memory
+
+        self.get_response = get_response
+        self.memory = memory
+        memory.start()
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not tracemalloc.is_tracing():  # stopped from the staff memory page
+            return self.get_response(request)
+        base = self.begin()
+        return self.finish(request, self.get_response(request), base)
+
+    async def __acall__(self, request):
+        if not tracemalloc.is_tracing():
+            return await self.get_response(request)
+        base = self.begin()
+        return self.finish(request, await self.get_response(request), base)
+
+    @staticmethod
+    def begin():
+        tracemalloc.reset_peak()
+        return tracemalloc.get_traced_memory()[0]
+
+    def finish(self, request, response, base):
+        current, peak = tracemalloc.get_traced_memory()
+        peak, retained = peak - base, current - base
+        self.memory.record_request(request, peak, retained)
+        metrics = f"alloc-peak;desc={peak // 1024}, alloc-kept;desc={retained // 1024}"
+        existing = response.get("Server-Timing")
+        response["Server-Timing"] = f"{existing}, {metrics}" if existing else metrics
+        return response
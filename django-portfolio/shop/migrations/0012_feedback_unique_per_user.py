@@ -0,0 +1,38 @@
+# Generated by Django 5.2.18 on 2026-10-19 07:03
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+def drop_duplicate_user_reviews(apps, schema_editor):
+    """Keep only the newest review per (product, user) before adding the constraint."""
+    Feedback = apps.get_model('shop', 'Feedback')
+    seen = set()
+    duplicates = []
+    rows = (
+        Feedback.objects.filter(user__isnull=False)
+        .order_by('product_id', 'user_id', '-created_at', '-id')
+        .values_list('id', 'product_id', 'user_id')
+    )
+    for fid, product_id, user_id in rows.iterator():
+        if (product_id, user_id) in seen:
+            duplicates.append(fid)
+        else:
+            seen.add((product_id, user_id))
+    Feedback.objects.filter(id__in=duplicates).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('shop', '0011_updated_at'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RunPython(drop_duplicate_user_reviews, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='feedback',
+            constraint=models.UniqueConstraint(fields=('product', 'user'), name='unique_feedback_per_user'),
+        ),
+    ]
@@ -0,0 +1,56 @@
+# Generated by Django 5.2.18 on 2026-10-19 07:28
+
+from django.db import migrations, models
+
+
+def fill_ratings(apps, schema_editor):
+    """Copy the approved-review average / count onto each product."""
+    Feedback = apps.get_model('shop', 'Feedback')
+    Product = apps.get_model('shop', 'Product')
+    rows = (
+        Feedback.objects.filter(approved=True)
+        .values('product_id')
+        .annotate(avg=models.Avg('rating'), count=models.Count('id'))
+    )
+    Product.objects.bulk_update(
+        [Product(id=r['product_id'], rating_avg=r['avg'], rating_count=r['count']) for r in rows],
+        ['rating_avg', 'rating_count'],
+        batch_size=500,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('shop', '0015_order_status_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='rating_avg',
+            field=models.FloatField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='rating_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['-created_at'], name='product_active_new_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['category', 'price'], name='product_active_cat_price_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['price'], name='product_active_price_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['rating_avg'], name='product_active_rating_idx'),
+        ),
+        migrations.RunPython(fill_ratings, migrations.RunPython.noop),
+    ]
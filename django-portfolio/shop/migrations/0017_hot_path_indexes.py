@@ -0,0 +1,51 @@
+# Generated by Django 5.2.18 on 2026-10-19 07:33
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('shop', '0016_product_rating_facets'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='order',
+            name='shop_order_email_fa7dab_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='product',
+            name='product_active_cat_price_idx',
+        ),
+        migrations.AddIndex(
+            model_name='address',
+            index=models.Index(fields=['profile', '-created_at'], name='shop_addres_profile_ca8c20_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['email', '-created_at'], name='shop_order_email_b66e58_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(condition=models.Q(('razorpay_order_id__isnull', False)), fields=['razorpay_order_id'], name='order_razorpay_order_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['updated_at'], name='shop_produc_updated_48807c_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['category', '-created_at'], name='product_active_cat_new_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['category', 'price', 'rating_avg', 'is_active'], name='product_active_facets_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='wishlist',
+            index=models.Index(fields=['user', '-created_at'], name='shop_wishli_user_id_2f14d3_idx'),
+        ),
+    ]
@@ -4,10 +4,12 @@ from django.contrib.auth.models import User
 from django.core.validators import MinValueValidator, MaxValueValidator
 from django.utils import timezone
 from django.db.models import Avg, Count
+from django.db.models.functions import Lower
 
 class Category(models.Model):
     name = models.CharField(max_length=120, unique=True)
     slug = models.SlugField(unique=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         verbose_name_plural = "Categories"
@@ -22,8 +24,32 @@ class Product(models.Model):
     description = models.TextField(blank=True)
     price = models.DecimalField(max_digits=10, decimal_places=2)
     image_url = models.URLField(blank=True)  # simple for local demo
+    # optional upload; resized WebP/JPEG variants are built off-request (shop/images.py)
+    image = models.ImageField(upload_to="products/originals/", blank=True)
+    image_variants = models.JSONField(default=dict, blank=True, editable=False)
+    # approved-review aggregates, kept by shop.ratings.update; back the rating facet
+    rating_avg = models.FloatField(default=0, editable=False)
+    rating_count = models.PositiveIntegerField(default=0, editable=False)
     is_active = models.BooleanField(default=True)
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['name']),
+            models.Index(Lower('name'), name='product_name_lower_idx'),  # admin prefix search, any case
+            models.Index(fields=['updated_at']),  # catalog_state: MAX + COUNT read only this index
+            # product_list facets (shop/facets.py); partial, because the storefront
+            # only ever lists active products
+            models.Index(fields=['-created_at'], condition=models.Q(is_active=True), name='product_active_new_idx'),
+            models.Index(fields=['category', '-created_at'], condition=models.Q(is_active=True), name='product_active_cat_new_idx'),
+            # covers the facet counts (SQLite also needs the condition column in the
+            # index to read it alone rather than the table)
+            models.Index(fields=['category', 'price', 'rating_avg', 'is_active'], condition=models.Q(is_active=True),
+                         name='product_active_facets_idx'),
+            models.Index(fields=['price'], condition=models.Q(is_active=True), name='product_active_price_idx'),
+            models.Index(fields=['rating_avg'], condition=models.Q(is_active=True), name='product_active_rating_idx'),
+        ]
 
     def __str__(self):
         return self.name
@@ -55,6 +81,16 @@ class Order(models.Model):
     razorpay_signature = models.CharField(max_length=255, blank=True, null=True)
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='created')
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['email', '-created_at']),  # my_orders; admin search uses the prefix
+            # payment handler / reconciliation look orders up by the Razorpay id
+            models.Index(fields=['razorpay_order_id'], condition=models.Q(razorpay_order_id__isnull=False),
+                         name='order_razorpay_order_idx'),
+            models.Index(fields=['created_at']),  # admin date hierarchy
+            models.Index(fields=['status', 'created_at']),  # exports by status + date range
+        ]
+
     def __str__(self):
         return f"Order #{self.id} ({self.status})"
 
@@ -77,6 +113,54 @@ class OrderItem(models.Model):
         return f"{self.product.name if self.product else 'Item'} × {self.quantity}"
 
 
+class StockShard(models.Model):
+    """
+    Units on hand for a product, split over one or more rows so concurrent
+    checkouts of a popular product decrement different rows (shop/stock.py).
+    Products without shards are not stock-tracked.
+    """
+    product = models.ForeignKey(Product, related_name="stock_shards", on_delete=models.CASCADE)
+    shard = models.PositiveSmallIntegerField()
+    available = models.PositiveIntegerField(default=0)  # CHECK >= 0: the database refuses an oversell
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["product", "shard"], name="unique_stock_shard"),
+        ]
+
+    def __str__(self):
+        return f"{self.product_id}#{self.shard}: {self.available}"
+
+
+class StockReservation(models.Model):
+    """Units taken from one shard for an order: held until paid (committed) or released."""
+    STATUS_CHOICES = (
+        ("held", "Held"),
+        ("committed", "Committed"),
+        ("released", "Released"),
+    )
+
+    order = models.ForeignKey(Order, related_name="reservations", on_delete=models.CASCADE)
+    product = models.ForeignKey(Product, related_name="+", on_delete=models.CASCADE)
+    shard = models.PositiveSmallIntegerField()
+    quantity = models.PositiveIntegerField()
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default="held")
+    expires_at = models.DateTimeField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            # release_expired(): only held reservations are ever swept
+            models.Index(fields=["product", "expires_at"], condition=models.Q(status="held"),
+                         name="reservation_held_expiry_idx"),
+            models.Index(fields=["expires_at"], condition=models.Q(status="held"),
+                         name="reservation_expiry_idx"),
+        ]
+
+    def __str__(self):
+        return f"Order #{self.order_id}: {self.quantity} × {self.product_id} ({self.status})"
+
+
 # models.py
 
 # models.py
@@ -108,13 +192,21 @@ class Feedback(models.Model):
     reviewer_email = models.EmailField(blank=True)                 # for anonymous email
     approved = models.BooleanField(default=False, db_index=True)   # moderation flag
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)               # drives ETag / Last-Modified
 
     class Meta:
         ordering = ['-created_at']
         verbose_name = "Product Feedback"
         verbose_name_plural = "Product Feedbacks"
         indexes = [
-            models.Index(fields=['product', 'approved', 'created_at'])
+            models.Index(fields=['product', 'approved', 'created_at']),
+            models.Index(fields=['created_at']),      # admin date hierarchy
+            models.Index(fields=['reviewer_email']),  # admin search
+        ]
+        constraints = [
+            # one review per signed-in user per product (NULL users, i.e.
+            # anonymous reviews, never conflict); product_feedback upserts on it
+            models.UniqueConstraint(fields=['product', 'user'], name='unique_feedback_per_user'),
         ]
 
     def __str__(self):
@@ -136,6 +228,9 @@ class Address(models.Model):
 
     class Meta:
         ordering = ["-created_at"]
+        indexes = [
+            models.Index(fields=["profile", "-created_at"]),  # profile page, newest first
+        ]
 
     def __str__(self):
         return f"Address for {self.profile.user.username}"
@@ -159,6 +254,9 @@ class Wishlist(models.Model):
 
     class Meta:
         unique_together = ("user", "product")
+        indexes = [
+            models.Index(fields=["user", "-created_at"]),  # wishlist page, newest first
+        ]
 
     def __str__(self):
         return f"{self.user} - {self.product}"
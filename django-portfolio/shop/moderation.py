@@ -0,0 +1,90 @@
+# shop/moderation.py
+"""
+Pending-review queue helpers for the admin moderation page.
+
+The queue walks Feedback(approved=False) in (product, created_at, id) order,
+which the (product, approved, created_at) index serves directly, using a
+keyset cursor instead of OFFSET / COUNT so page 500 costs the same as page 1.
+"""
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from . import feeds, prerender, ratings
+from .models import Feedback
+
+MAX_PER_PAGE = 500
+
+
+def encode_cursor(fb):
+    return f"{fb.product_id}|{fb.created_at.isoformat()}|{fb.id}"
+
+
+def decode_cursor(value):
+    """'<product_id>|<created_at iso>|<id>' -> tuple, or None if malformed."""
+    try:
+        product_id, created_at, fid = value.split("|")
+        created_at = parse_datetime(created_at)
+        if created_at is None:
+            return None
+        return int(product_id), created_at, int(fid)
+    except (AttributeError, ValueError):
+        return None
+
+
+def pending_page(after=None, product_id=None, per_page=100):
+    """
+    Returns (rows, next_cursor). Fetches per_page + 1 rows to know whether
+    there is a next page; never counts the queue.
+    """
+    qs = (
+        Feedback.objects.filter(approved=False)
+        .select_related("product", "user")
+        .only(
+            "id", "rating", "message", "reviewer_name", "reviewer_email", "created_at",
+            "product_id", "product__name", "product__slug", "user_id", "user__username",
+        )
+        .order_by("product_id", "created_at", "id")
+    )
+    if product_id:
+        qs = qs.filter(product_id=product_id)
+    if after:
+        pid, created_at, fid = after
+        qs = qs.filter(
+            Q(product_id__gt=pid)
+            | Q(product_id=pid, created_at__gt=created_at)
+            | Q(product_id=pid, created_at=created_at, id__gt=fid)
+        )
+
+    rows = list(qs[:per_page + 1])
+    next_cursor = encode_cursor(rows[per_page - 1]) if len(rows) > per_page else None
+    return rows[:per_page], next_cursor
+
+
+def after_review_change(product_ids):
+    """Refresh caches once per affected product (not once per review)."""
+    product_ids = set(product_ids)
+    feeds.invalidate_products(product_ids)
+    ratings.update(product_ids)
+    transaction.on_commit(lambda: prerender.reviews_changed(product_ids))
+
+
+def apply_batch(ids, action):
+    """
+    approve: mark the pending reviews approved (one UPDATE).
+    reject:  delete them (one DELETE); pending reviews are in no feed or
+             aggregate, so nothing downstream changes.
+    Returns the number of reviews handled.
+    """
+    with transaction.atomic():
+        qs = Feedback.objects.filter(id__in=ids, approved=False)
+        if action == "approve":
+            product_ids = set(qs.values_list("product_id", flat=True))
+            count = qs.update(approved=True, updated_at=timezone.now())
+            transaction.on_commit(lambda: after_review_change(product_ids))
+        elif action == "reject":
+            count, _ = qs.delete()
+        else:
+            raise ValueError(f"unknown moderation action: {action}")
+    return count
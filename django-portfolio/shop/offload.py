@@ -0,0 +1,47 @@
+# shop/offload.py
+"""
+Bounded thread pool for blocking network calls (SMTP, Razorpay).
+
+Neither library has an async client. Running them here keeps them off the
+event loop under ASGI, and the pool size (BLOCKING_IO_WORKERS) caps how many
+run at once under WSGI too, so a slow SMTP server or payment API can't tie
+up every request thread.
+"""
+import asyncio
+import functools
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+WORKERS = getattr(settings, "BLOCKING_IO_WORKERS", 8)
+TIMEOUT = getattr(settings, "BLOCKING_IO_TIMEOUT", 30)
+
+_executor = ThreadPoolExecutor(max_workers=WORKERS, thread_name_prefix="shop-io")
+
+
+def run(func, *args, timeout=TIMEOUT, **kwargs):
+    """Call func in the pool and wait for its result (from sync code)."""
+    return _executor.submit(func, *args, **kwargs).result(timeout=timeout)
+
+
+async def arun(func, *args, timeout=TIMEOUT, **kwargs):
+    """Await func running in the pool (from async code)."""
+    loop = asyncio.get_running_loop()
+    future = loop.run_in_executor(_executor, functools.partial(func, *args, **kwargs))
+    return await asyncio.wait_for(future, timeout)
+
+
+def submit(func, *args, **kwargs):
+    """Fire and forget (e.g. notification mail); failures are logged."""
+    future = _executor.submit(func, *args, **kwargs)
+    future.add_done_callback(_log_failure)
+    return future
+
+
+def _log_failure(future):
+    exc = future.exception()
+    if exc is not None:
+        logger.error("Offloaded call failed", exc_info=exc)
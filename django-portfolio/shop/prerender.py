@@ -0,0 +1,367 @@
+# shop/prerender.py
+"""
+Prerendered HTML for anonymous visitors: the home page, the product list,
+category pages and product pages.
+
+"manage.py prerender" renders every page (across a process pool) into
+PRERENDER_ROOT as <url path>/index.html plus .gz / .br variants. Once that
+directory exists, product, category and review changes re-render the pages
+they show up on most directly (the product's page, its category's page and
+the product list; not the "related products" of its neighbours) from one
+dedicated background thread, a moment after the change (bursts of edits are
+coalesced). That thread runs requests through a bare handler, without the
+test client, whose request signal juggling would race the worker's real
+requests, and without holding a thread of the shop.offload pool.
+
+PrerenderedPagesMiddleware serves those files to GET / HEAD requests without
+a query string or session cookie, before sessions, auth or any view run. A
+front proxy can do the same: serve $root/$uri/index.html(.br|.gz) when the
+request has no session cookie and no query string.
+
+Pages are rendered through the normal request stack, as a cookie-less
+visitor, so they match what such a visitor would get live. Their CSRF
+tokens are blanked; a small inline script fills them in from the CSRF cookie,
+fetching one from shop:csrf_cookie first if the visitor has none yet.
+"""
+import gzip
+import io
+import logging
+import os
+import re
+import sys
+import tempfile
+import threading
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.handlers.wsgi import WSGIHandler, WSGIRequest
+from django.db import connections
+from django.http import HttpResponseNotModified
+from django.urls import reverse
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from django.utils.http import parse_etags, parse_http_date_safe
+
+from . import profiler
+from .models import Category, Product
+from .staticfiles import ENCODINGS, StaticFile, accepted_encodings, brotli
+
+ROOT = str(getattr(settings, "PRERENDER_ROOT", "") or "")
+# coalescing window for re-renders after edits (seconds)
+DELAY = getattr(settings, "PRERENDER_DELAY", 2)
+# sent by the renderer so this middleware doesn't answer with the old file
+BYPASS_HEADER = "X-Prerender"
+INDEX = "index.html"
+
+logger = logging.getLogger(__name__)
+
+CSRF_INPUT_RE = re.compile(rb'(<input type="hidden" name="csrfmiddlewaretoken" value=")[^"]*(")')
+CSRF_SCRIPT = (
+    '<script>(function(){'
+    'function t(){var m=document.cookie.match(/(?:^|;\\s*)csrftoken=([^;]+)/);return m?m[1]:""}'
+    'function f(){var v=t();document.querySelectorAll(\'input[name="csrfmiddlewaretoken"]\')'
+    '.forEach(function(i){i.value=v})}'
+    'if(t())f();else fetch("%s",{credentials:"same-origin"}).then(f)'
+    '})();</script>'
+)
+
+
+def enabled():
+    return bool(ROOT) and os.path.isdir(ROOT)
+
+
+def host():
+    """Host header for rendering: PRERENDER_HOST, else the first concrete ALLOWED_HOSTS entry."""
+    configured = getattr(settings, "PRERENDER_HOST", "")
+    if configured:
+        return configured
+    return next((h for h in settings.ALLOWED_HOSTS if h != "*" and not h.startswith(".")), "localhost")
+
+
+def file_for(path):
+    """PRERENDER_ROOT/<path>/index.html, or None for paths that can't be a page."""
+    parts = [p for p in path.split("/") if p]
+    if any(p in (".", "..") or "\\" in p or p.startswith(".") for p in parts):
+        return None
+    return os.path.join(ROOT, *parts, INDEX)
+
+
+# -------------------------
+# PAGES
+# -------------------------
+def category_paths(category_ids=None):
+    """The product list and the category pages (all, or those of category_ids)."""
+    categories = Category.objects.all() if category_ids is None else Category.objects.filter(id__in=category_ids)
+    return [reverse("shop:product_list")] + [
+        reverse("shop:product_list_by_category", args=[slug])
+        for slug in categories.values_list("slug", flat=True)
+    ]
+
+
+def product_paths(queryset):
+    return [
+        reverse("shop:product_detail", args=[slug])
+        for slug in queryset.filter(is_active=True).values_list("slug", flat=True)
+    ]
+
+
+def all_paths():
+    return [reverse("home")] + category_paths() + product_paths(Product.objects.all())
+
+
+# -------------------------
+# RENDERING
+# -------------------------
+_handler = None
+
+
+def _get(path):
+    """
+    GET path as a cookie-less visitor, straight through the middleware and
+    view: no request_started / request_finished, which would close this
+    thread's connections (mid-transaction, in a command) - the caller owns them.
+    """
+    global _handler
+    if _handler is None:
+        _handler = WSGIHandler()
+    request = WSGIRequest({
+        "REQUEST_METHOD": "GET", "PATH_INFO": path, "QUERY_STRING": "", "SCRIPT_NAME": "",
+        "SERVER_NAME": "localhost", "SERVER_PORT": "80", "HTTP_HOST": host(),
+        "HTTP_" + BYPASS_HEADER.upper().replace("-", "_"): "1",
+        "wsgi.url_scheme": "http", "wsgi.input": io.BytesIO(), "wsgi.errors": sys.stderr,
+    })
+    return _handler.get_response(request)
+
+
+def postprocess(html):
+    """Blank the per-visitor CSRF tokens; the inline script fills them in client-side."""
+    if CSRF_INPUT_RE.search(html) is None:
+        return html
+    html = CSRF_INPUT_RE.sub(rb"\1\2", html)
+    script = (CSRF_SCRIPT % reverse("shop:csrf_cookie")).encode()
+    head, sep, tail = html.rpartition(b"</body>")
+    return head + script + sep + tail if sep else html + script
+
+
+def _write_atomic(full_path, data):
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(full_path), prefix=".tmp-")
+    with os.fdopen(fd, "wb") as f:
+        f.write(data)
+    os.chmod(tmp, 0o644)
+    os.replace(tmp, full_path)
+
+
+def write(path, html):
+    """Write a page and its compressed variants (a variant is only kept when smaller)."""
+    full_path = file_for(path)
+    os.makedirs(os.path.dirname(full_path), exist_ok=True)
+    variants = {".gz": gzip.compress(html, compresslevel=9, mtime=0)}
+    if brotli is not None:
+        variants[".br"] = brotli.compress(html, quality=11, mode=brotli.MODE_TEXT)
+    for _, suffix in ENCODINGS:
+        data = variants.get(suffix)
+        if data is not None and len(data) < len(html) * 0.95:
+            _write_atomic(full_path + suffix, data)
+        elif os.path.exists(full_path + suffix):
+            os.remove(full_path + suffix)
+    # last, so a new page never pairs with the previous page's variants for long
+    _write_atomic(full_path, html)
+    return len(html)
+
+
+def remove(path):
+    full_path = file_for(path)
+    for suffix in ("",) + tuple(suffix for _, suffix in ENCODINGS):
+        try:
+            os.remove(full_path + suffix)
+        except FileNotFoundError:
+            pass
+
+
+def render_paths(paths):
+    """Render and write pages; a page that no longer renders (404 etc.) is removed. -> (written, bytes, failures)."""
+    written = size = 0
+    failures = []
+    for path in paths:
+        if file_for(path) is None:
+            continue
+        response = _get(path)
+        if response.status_code == 200 and not response.streaming:
+            size += write(path, postprocess(response.content))
+            written += 1
+        else:
+            remove(path)
+            failures.append((path, response.status_code))
+    return written, size, failures
+
+
+def prune(keep):
+    """Delete pages (and now-empty directories) whose path is not in keep. -> number removed."""
+    keep = {os.path.normpath(file_for(p)) for p in keep if file_for(p)}
+    removed = 0
+    for dirpath, dirnames, filenames in os.walk(ROOT, topdown=False):
+        if INDEX in filenames and os.path.normpath(os.path.join(dirpath, INDEX)) not in keep:
+            for name in filenames:
+                if name == INDEX or name.startswith(INDEX + "."):
+                    os.remove(os.path.join(dirpath, name))
+            removed += 1
+            # the page's directory and emptied parents, up to (not including) ROOT
+            while dirpath != ROOT and dirpath.startswith(ROOT):
+                try:
+                    os.rmdir(dirpath)
+                except OSError:  # not empty
+                    break
+                dirpath = os.path.dirname(dirpath)
+    return removed
+
+
+# -------------------------
+# INCREMENTAL RE-RENDERS
+# -------------------------
+_pending = set()
+_lock = threading.Lock()
+_wakeup = threading.Event()
+_thread = None
+
+
+def schedule(paths):
+    """Re-render paths shortly, from the renderer thread; no-op until prerendering is set up."""
+    global _thread
+    if not enabled():
+        return
+    with _lock:
+        _pending.update(paths)
+        if _thread is None:
+            _thread = threading.Thread(target=_run, name="prerender", daemon=True)
+            _thread.start()
+    _wakeup.set()
+
+
+def _run():
+    while True:
+        _wakeup.wait()
+        time.sleep(DELAY)  # coalesce a burst of edits
+        _wakeup.clear()
+        try:
+            flush()
+        except Exception:
+            logger.exception("Re-rendering prerendered pages failed")
+        finally:
+            connections.close_all()  # this thread's connections
+
+
+def flush():
+    """
+    Render the pending paths now, in this thread. Management commands call it
+    before exiting: the renderer thread dies with the interpreter.
+    """
+    with _lock:
+        paths = set(_pending)
+        _pending.clear()
+    if not paths:
+        return
+    valid = all_paths()
+    prune(valid)  # deleted / deactivated / renamed products and categories
+    render_paths(sorted(paths & set(valid)))
+
+
+def product_changed(product):
+    """The product's page, its category's page and the product list (facet counts)."""
+    if enabled():
+        schedule(category_paths([product.category_id]) + product_paths(Product.objects.filter(pk=product.pk)))
+
+
+def products_changed(queryset):
+    """product_changed for many products at once (imports)."""
+    if enabled():
+        schedule(category_paths(queryset.values("category_id")) + product_paths(queryset))
+
+
+def reviews_changed(product_ids):
+    """Ratings show on the product pages and in their listings' rating facet."""
+    if enabled():
+        products = Product.objects.filter(id__in=product_ids)
+        schedule(category_paths(products.values("category_id")) + product_paths(products))
+
+
+def catalog_changed():
+    """A category added, renamed or removed: every listing's category facet."""
+    if enabled():
+        schedule(category_paths())
+
+
+# -------------------------
+# SERVING
+# -------------------------
+class PrerenderedPagesMiddleware:
+    """
+    Serves PRERENDER_ROOT to cookie-less anonymous GET / HEAD requests
+    without a query string, picking the .br / .gz variant when accepted.
+    Responses carry an ETag / Last-Modified from the file and must be
+    revalidated on every use.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        response = self.serve(request)
+        return response if response is not None else self.get_response(request)
+
+    async def __acall__(self, request):
+        # a stat and a read of one small file, like StaticFilesMiddleware
+        response = self.serve(request)
+        return response if response is not None else await self.get_response(request)
+
+    def serve(self, request):
+        if (
+            request.method not in ("GET", "HEAD")
+            or request.META.get("QUERY_STRING")
+            or settings.SESSION_COOKIE_NAME in request.COOKIES
+            or BYPASS_HEADER in request.headers
+            or profiler.flagged(request)  # X-Profile requests need not carry a session
+            or not ROOT
+        ):
+            return None
+        full_path = file_for(request.path_info)
+        if full_path is None or not os.path.isfile(full_path):
+            return None
+
+        accepted = accepted_encodings(request)
+        try:
+            for encoding, suffix in ENCODINGS:
+                if encoding in accepted and os.path.isfile(full_path + suffix):
+                    page = StaticFile(full_path + suffix, encoding)
+                    break
+            else:
+                page = StaticFile(full_path)
+        except FileNotFoundError:  # removed by a re-render in between
+            return None
+
+        if self.not_modified(request, page):
+            response = HttpResponseNotModified()
+        else:
+            response = page.response("text/html; charset=utf-8", head=request.method == "HEAD")
+            if page.encoding:
+                response["Content-Encoding"] = page.encoding
+        response["ETag"] = page.etag
+        response["Last-Modified"] = page.last_modified
+        patch_cache_control(response, no_cache=True)
+        patch_vary_headers(response, ("Accept-Encoding", "Cookie"))
+        return response
+
+    @staticmethod
+    def not_modified(request, page):
+        if_none_match = request.META.get("HTTP_IF_NONE_MATCH")
+        if if_none_match:
+            etags = parse_etags(if_none_match)
+            return "*" in etags or page.etag in etags
+        since = parse_http_date_safe(request.META.get("HTTP_IF_MODIFIED_SINCE") or "")
+        return since is not None and parse_http_date_safe(page.last_modified) <= since
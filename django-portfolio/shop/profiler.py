@@ -0,0 +1,307 @@
+# shop/profiler.py
+"""
+On-demand request profiling for staff.
+
+A request is profiled when it carries either
+  ?__profile=1 (or =cprofile / =sample) and comes from a signed-in staff user, or
+  an "X-Profile: <token>" header with a token from the staff profiles page
+  (signed, bound to a staff user, valid PROFILE_TOKEN_MAX_AGE seconds), so
+  scripts / curl can profile without a session. "X-Profile-Mode: sample"
+  picks the mode.
+
+Modes:
+  cprofile  cProfile (deterministic; every call, with overhead) plus a stack
+            sampler for the collapsed-stack file
+  sample    only the stack sampler: low overhead, so timings stay realistic
+
+Each profile is stored in PROFILE_ROOT as <id>.json (request metadata),
+<id>.prof (pstats, cprofile mode) and <id>.collapsed (one "frame;frame;frame
+count" line per stack, for flamegraph.pl / speedscope). The directory is
+capped at PROFILE_MAX_COUNT profiles and PROFILE_MAX_MB; the least recently
+used (written or downloaded) go first.
+
+Other requests pay one header lookup and one substring test.
+
+Only the thread that enters the middleware is sampled / profiled. Under WSGI
+that covers sync views and the sync_to_async parts of async views (asgiref
+runs those back on the request thread); the coroutine code itself runs on a
+helper loop thread and shows up as waiting. Under ASGI it is the event loop
+thread, which runs other requests' coroutines too. Streaming bodies are
+produced after the middleware returns and are not covered.
+"""
+import cProfile
+import io
+import json
+import os
+import pstats
+import re
+import secrets
+import sys
+import threading
+import time
+from collections import Counter
+from functools import lru_cache
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core import signing
+
+ROOT = str(getattr(settings, "PROFILE_ROOT", "") or "")
+MAX_COUNT = getattr(settings, "PROFILE_MAX_COUNT", 200)
+MAX_BYTES = getattr(settings, "PROFILE_MAX_MB", 200) * 1024 * 1024
+TOKEN_MAX_AGE = getattr(settings, "PROFILE_TOKEN_MAX_AGE", 60 * 60)
+SAMPLE_INTERVAL = getattr(settings, "PROFILE_SAMPLE_INTERVAL", 0.002)  # seconds
+
+QUERY_FLAG = "__profile"
+HEADER = "X-Profile"
+MODE_HEADER = "X-Profile-Mode"
+MODES = ("cprofile", "sample")
+SUFFIXES = (".json", ".prof", ".collapsed")
+ID_RE = re.compile(r"^\d{8}-\d{6}-[0-9a-f]{6}$")
+_SALT = "shop.profiler"
+_META_HEADER = "HTTP_" + HEADER.upper().replace("-", "_")
+
+
+# -------------------------
+# AUTHORIZATION
+# -------------------------
+def make_token(user):
+    """Value for the X-Profile header: lets requests without a session be profiled as `user`."""
+    return signing.TimestampSigner(salt=_SALT).sign(str(user.pk))
+
+
+def _token_user_is_staff(token):
+    try:
+        user_id = signing.TimestampSigner(salt=_SALT).unsign(token, max_age=TOKEN_MAX_AGE)
+    except signing.BadSignature:
+        return False
+    return get_user_model().objects.filter(pk=user_id, is_staff=True, is_active=True).exists()
+
+
+def flagged(request):
+    """Cheap pre-check every request goes through: could this ask for a profile?"""
+    return _META_HEADER in request.META or QUERY_FLAG in request.META.get("QUERY_STRING", "")
+
+
+def requested_mode(request):
+    """The profiling mode for a flagged request, or None if it isn't allowed one."""
+    token = request.META.get(_META_HEADER)
+    if token:
+        allowed = _token_user_is_staff(token)
+        mode = request.headers.get(MODE_HEADER) or request.GET.get(QUERY_FLAG)
+    else:
+        mode = request.GET.get(QUERY_FLAG)
+        allowed = mode is not None and request.user.is_staff
+    if not allowed or not ROOT:
+        return None
+    return mode if mode in MODES else MODES[0]
+
+
+# -------------------------
+# STACK SAMPLER
+# -------------------------
+class StackSampler(threading.Thread):
+    """Samples one thread's Python stack every SAMPLE_INTERVAL into collapsed-stack counts."""
+
+    def __init__(self, thread_id, root_code=None):
+        super().__init__(name="profile-sampler", daemon=True)
+        self.thread_id = thread_id
+        self.root_code = root_code  # stacks are cut above this frame (the middleware)
+        self.counts = Counter()
+        self.stopped = threading.Event()
+
+    def run(self):
+        while not self.stopped.wait(SAMPLE_INTERVAL):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is not None:
+                self.counts[self.stack(frame)] += 1
+
+    def stack(self, frame):
+        labels = []
+        while frame is not None:
+            code = frame.f_code
+            if code is self.root_code:
+                break
+            labels.append(f"{code.co_name} ({_short_path(code.co_filename)}:{code.co_firstlineno})")
+            frame = frame.f_back
+        return ";".join(reversed(labels))
+
+    def stop(self):
+        self.stopped.set()
+        self.join()
+
+    def collapsed(self):
+        return "".join(f"{stack} {n}\n" for stack, n in self.counts.most_common() if stack)
+
+
+@lru_cache(maxsize=4096)
+def _short_path(filename):
+    for prefix in sorted({str(settings.BASE_DIR), *sys.path}, key=len, reverse=True):
+        if prefix and filename.startswith(prefix + os.sep):
+            return filename[len(prefix) + 1:].replace(";", ":")
+    return filename.replace(";", ":")
+
+
+# -------------------------
+# STORAGE
+# -------------------------
+def path_for(profile_id, suffix):
+    return os.path.join(ROOT, profile_id + suffix)
+
+
+def _new_id():
+    return f"{time.strftime('%Y%m%d-%H%M%S')}-{secrets.token_hex(3)}"
+
+
+def save(meta, profile, sampler):
+    os.makedirs(ROOT, exist_ok=True)
+    profile_id = meta["id"]
+    if profile is not None:
+        profile.dump_stats(path_for(profile_id, ".prof"))
+    with open(path_for(profile_id, ".collapsed"), "w", encoding="utf-8") as f:
+        f.write(sampler.collapsed())
+    # last: a profile is listed once its metadata exists
+    with open(path_for(profile_id, ".json"), "w", encoding="utf-8") as f:
+        json.dump(meta, f)
+    evict()
+
+
+def _files(profile_id):
+    return [p for p in (path_for(profile_id, s) for s in SUFFIXES) if os.path.exists(p)]
+
+
+def entries():
+    """Stored profiles, newest first: metadata plus size and last use."""
+    if not ROOT or not os.path.isdir(ROOT):
+        return []
+    found = []
+    for name in os.listdir(ROOT):
+        profile_id, suffix = os.path.splitext(name)
+        if suffix != ".json" or not ID_RE.match(profile_id):
+            continue
+        try:
+            with open(os.path.join(ROOT, name), encoding="utf-8") as f:
+                meta = json.load(f)
+            files = _files(profile_id)
+            meta["bytes"] = sum(os.path.getsize(p) for p in files)
+            meta["used"] = max(os.path.getmtime(p) for p in files)
+        except (OSError, ValueError):
+            continue  # evicted or half-written meanwhile
+        meta["kinds"] = [s.lstrip(".") for s in SUFFIXES[1:] if path_for(profile_id, s) in files]
+        found.append(meta)
+    return sorted(found, key=lambda m: m["id"], reverse=True)
+
+
+def touch(profile_id):
+    """Mark a profile as used (downloads keep it from being evicted first)."""
+    try:
+        os.utime(path_for(profile_id, ".json"))
+    except FileNotFoundError:
+        pass
+
+
+def evict():
+    """Delete least recently used profiles beyond PROFILE_MAX_COUNT / PROFILE_MAX_MB."""
+    stored = sorted(entries(), key=lambda m: m["used"])
+    count, size = len(stored), sum(m["bytes"] for m in stored)
+    for meta in stored:
+        if count <= MAX_COUNT and size <= MAX_BYTES:
+            break
+        for path in _files(meta["id"]):
+            os.remove(path)
+        count, size = count - 1, size - meta["bytes"]
+
+
+def summary(profile_id, limit=60):
+    """pstats text report (by cumulative time) of a cprofile-mode profile."""
+    out = io.StringIO()
+    stats = pstats.Stats(path_for(profile_id, ".prof"), stream=out)
+    stats.strip_dirs().sort_stats("cumulative").print_stats(limit)
+    return out.getvalue()
+
+
+# -------------------------
+# MIDDLEWARE
+# -------------------------
+class ProfilerMiddleware:
+    """
+    Runs requests flagged by a staff user under the profiler (see the module
+    docstring) and stores the result; the response gets an X-Profile-Id
+    header. Must come after AuthenticationMiddleware.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        mode = requested_mode(request) if flagged(request) else None
+        if mode is None:
+            return self.get_response(request)
+        profile, sampler, started = self.start(mode, self.__call__.__code__)
+        response = None
+        try:
+            response = self.get_response(request)
+        finally:
+            elapsed = self.stop(profile, sampler, started)
+            profile_id = self.finish(request, response, mode, profile, sampler, elapsed)
+        response["X-Profile-Id"] = profile_id
+        return response
+
+    async def __acall__(self, request):
+        mode = await sync_to_async(requested_mode)(request) if flagged(request) else None
+        if mode is None:
+            return await self.get_response(request)
+        profile, sampler, started = self.start(mode, self.__acall__.__code__)
+        response = None
+        try:
+            response = await self.get_response(request)
+        finally:
+            elapsed = self.stop(profile, sampler, started)
+            profile_id = await sync_to_async(self.finish)(request, response, mode, profile, sampler, elapsed)
+        response["X-Profile-Id"] = profile_id
+        return response
+
+    @staticmethod
+    def start(mode, root_code):
+        sampler = StackSampler(threading.get_ident(), root_code)
+        sampler.start()
+        profile = cProfile.Profile() if mode == "cprofile" else None
+        started = time.perf_counter()
+        if profile is not None:
+            profile.enable()
+        return profile, sampler, started
+
+    @staticmethod
+    def stop(profile, sampler, started):
+        if profile is not None:
+            profile.disable()
+        elapsed = time.perf_counter() - started
+        sampler.stop()
+        return elapsed
+
+    @staticmethod
+    def finish(request, response, mode, profile, sampler, elapsed):
+        match = getattr(request, "resolver_match", None)
+        meta = {
+            "id": _new_id(),
+            "created": time.time(),
+            "method": request.method,
+            "path": request.get_full_path(),
+            "view": match.view_name if match else None,
+            "status": response.status_code if response is not None else None,
+            "ms": round(elapsed * 1000, 1),
+            "mode": mode,
+            "samples": sum(sampler.counts.values()),
+            "user": request.user.get_username() if request.user.is_authenticated else None,
+            "trigger": "header" if _META_HEADER in request.META else "query",
+        }
+        save(meta, profile, sampler)
+        return meta["id"]
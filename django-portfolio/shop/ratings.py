@@ -0,0 +1,48 @@
+# shop/ratings.py
+"""
+Approved-review aggregates per product: {"avg": float, "count": int}.
+
+They live on Product.rating_avg / rating_count (which also back the rating
+facet), so product_detail reads them from the row it already loaded and
+every worker sees a change as soon as it is committed. Writers call
+update(), which recomputes the affected products in one GROUP BY query.
+"""
+from django.db.models import Avg, Count
+
+from . import facets
+from .models import Feedback, Product
+
+EMPTY = {"avg": 0.0, "count": 0}
+
+
+def compute(product_ids):
+    """Summaries for many products with one query."""
+    product_ids = set(product_ids)
+    if not product_ids:
+        return {}
+    rows = (
+        # written back to Product, so always computed from the primary (see shop/routers.py)
+        Feedback.objects.using("default").filter(product_id__in=product_ids, approved=True)
+        .values("product_id")
+        .annotate(avg=Avg("rating"), count=Count("id"))
+    )
+    summaries = {pid: dict(EMPTY) for pid in product_ids}
+    for row in rows:
+        summaries[row["product_id"]] = {"avg": float(row["avg"] or 0.0), "count": row["count"]}
+    return summaries
+
+
+def summary(product):
+    return {"avg": product.rating_avg, "count": product.rating_count}
+
+
+def update(product_ids):
+    """After reviews change: recompute the denormalized Product columns."""
+    summaries = compute(product_ids)
+    if summaries:
+        Product.objects.bulk_update(
+            [Product(id=pid, rating_avg=s["avg"], rating_count=s["count"]) for pid, s in summaries.items()],
+            ["rating_avg", "rating_count"],
+        )
+        facets.bump()
+    return summaries
@@ -0,0 +1,95 @@
+# shop/routers.py
+"""
+Primary / replica routing for the read-heavy catalog pages.
+
+Reads go to the "replica" alias only when all of these hold:
+  * a "replica" database is configured,
+  * the view opted in with @replica_reads (catalog, search, RSS),
+  * the model is catalog / review data (REPLICA_MODELS),
+  * the visitor is not pinned to the primary.
+
+Writes always go to "default". Any write during a request, and any unsafe
+request, pins that visitor to the primary for REPLICA_PIN_SECONDS via a
+cookie (see shop.middleware.ReplicaPinMiddleware), so a user sees their own
+cart / review right after posting it even if the replica lags.
+"""
+from contextvars import ContextVar
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction
+from django.conf import settings
+
+REPLICA_ALIAS = "replica"
+REPLICA_MODELS = {"shop.category", "shop.product", "shop.feedback"}
+PIN_COOKIE = "db_primary"
+PIN_SECONDS = getattr(settings, "REPLICA_PIN_SECONDS", 10)
+
+_use_replica = ContextVar("use_replica", default=False)
+_pinned = ContextVar("pinned_to_primary", default=False)
+_wrote = ContextVar("wrote_to_primary", default=False)
+
+
+def replica_configured():
+    return REPLICA_ALIAS in settings.DATABASES
+
+
+def replica_reads(view):
+    """Allow this (read-only) view's catalog queries to use the replica."""
+    if iscoroutinefunction(view):
+        @wraps(view)
+        async def async_wrapper(request, *args, **kwargs):
+            if request.method not in ("GET", "HEAD") or _pinned.get():
+                return await view(request, *args, **kwargs)
+            # sync_to_async / the async ORM copy the context, so this reaches the router
+            token = _use_replica.set(True)
+            try:
+                return await view(request, *args, **kwargs)
+            finally:
+                _use_replica.reset(token)
+
+        return async_wrapper
+
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if request.method not in ("GET", "HEAD") or _pinned.get():
+            return view(request, *args, **kwargs)
+        token = _use_replica.set(True)
+        try:
+            return view(request, *args, **kwargs)
+        finally:
+            _use_replica.reset(token)
+
+    return wrapper
+
+
+def begin_request(pinned):
+    """Called by the middleware; returns tokens for end_request."""
+    return _pinned.set(pinned), _wrote.set(False)
+
+
+def end_request(tokens):
+    """Returns whether anything was written during the request."""
+    wrote = _wrote.get()
+    _pinned.reset(tokens[0])
+    _wrote.reset(tokens[1])
+    return wrote
+
+
+class PrimaryReplicaRouter:
+    def db_for_read(self, model, **hints):
+        if _use_replica.get() and not _wrote.get() and model._meta.label_lower in REPLICA_MODELS:
+            if replica_configured():
+                return REPLICA_ALIAS
+        return "default"
+
+    def db_for_write(self, model, **hints):
+        _wrote.set(True)
+        return "default"
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # both aliases hold the same data
+        return {obj1._state.db, obj2._state.db} <= {"default", REPLICA_ALIAS}
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # the replica is a copy of the primary file, never migrated itself
+        return db != REPLICA_ALIAS
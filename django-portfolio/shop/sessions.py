@@ -0,0 +1,284 @@
+# shop/sessions.py
+"""
+Session engine for cart / checkout state (SESSION_ENGINE = "shop.sessions").
+
+* Cache-first: sessions are read from SESSION_CACHE_ALIAS, with the database
+  as the fallback. Only when that cache is shared by all workers (Redis /
+  Memcached): with a process-local one (LocMemCache, the default without
+  CACHE_URL) another worker would keep serving its own stale copy, e.g. a
+  login after logout, so the store then reads and writes the database only.
+* Diffing: the serialized session is remembered at load time, and save()
+  is a no-op when nothing actually changed, even if session.modified was
+  set (checkout re-storing the same buy-now keys, a Cart being built).
+* Write-behind: ordinary updates go to the cache immediately and are
+  batched into one database upsert per SESSION_WRITE_BEHIND_SECONDS per
+  process. New sessions and login / logout changes are written through.
+  Losing a worker can lose up to that many seconds of cart edits; set it
+  to 0 to write everything through. Also shared-cache only: the buffer
+  lives in the process, and other workers read the edits from the cache.
+  The buffer is never read back, and its flush only updates rows that
+  still exist: a session deleted by another worker (logout) leaves a
+  tombstone in the cache, and buffered edits to it are dropped, so it
+  can't come back.
+* CompactSerializer packs the cart as varints instead of JSON.
+
+Each store keeps per-request counters in .stats (see SessionStatsMiddleware).
+"""
+import atexit
+import json
+import threading
+import time
+from decimal import Decimal, InvalidOperation
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth import BACKEND_SESSION_KEY, HASH_SESSION_KEY, SESSION_KEY
+from django.contrib.sessions.backends.db import SessionStore as DBStore
+from django.core.cache import caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+
+from .cart import CART_SESSION_ID
+
+KEY_PREFIX = "shop.sessions."
+TOMBSTONE_PREFIX = KEY_PREFIX + "deleted."
+WRITE_BEHIND_SECONDS = getattr(settings, "SESSION_WRITE_BEHIND_SECONDS", 30)
+AUTH_KEYS = (SESSION_KEY, BACKEND_SESSION_KEY, HASH_SESSION_KEY)
+PROCESS_LOCAL_CACHES = (LocMemCache, DummyCache)
+
+
+# -------------------------
+# SERIALIZER
+# -------------------------
+def _varint(n):
+    out = bytearray()
+    while True:
+        byte, n = n & 0x7F, n >> 7
+        out.append(byte | (0x80 if n else 0))
+        if not n:
+            return bytes(out)
+
+
+def _read_varint(data, pos):
+    n = shift = 0
+    while True:
+        byte = data[pos]
+        pos += 1
+        n |= (byte & 0x7F) << shift
+        if not byte & 0x80:
+            return n, pos
+        shift += 7
+
+
+def _pack_cart(cart):
+    """{"12": {"quantity": 2, "price": "163.00"}, ...} -> varints, or None if it doesn't fit."""
+    out = [_varint(len(cart))]
+    try:
+        for pid, item in cart.items():
+            if set(item) != {"quantity", "price"} or not pid.isdigit() or str(int(pid)) != pid:
+                return None
+            quantity, cents = int(item["quantity"]), int(Decimal(item["price"]) * 100)
+            if quantity < 0 or cents < 0 or quantity != item["quantity"] or _price(cents) != item["price"]:
+                return None
+            out += [_varint(int(pid)), _varint(quantity), _varint(cents)]
+    except (AttributeError, TypeError, ValueError, InvalidOperation):
+        return None
+    return b"".join(out)
+
+
+def _price(cents):
+    return format(Decimal(cents).scaleb(-2), "f")
+
+
+class CompactSerializer:
+    """
+    b"J" + JSON, or b"C" + varint(len(JSON)) + JSON + packed cart, where the
+    cart is [count, (product id, quantity, price in cents) * count].
+    Plain JSON from the stock serializer still loads.
+    """
+
+    def dumps(self, obj):
+        cart = obj.get(CART_SESSION_ID)
+        packed = _pack_cart(cart) if isinstance(cart, dict) and cart else None
+        if packed is None:
+            return b"J" + json.dumps(obj, separators=(",", ":")).encode("latin-1")
+        rest = {k: v for k, v in obj.items() if k != CART_SESSION_ID}
+        body = json.dumps(rest, separators=(",", ":")).encode("latin-1")
+        return b"C" + _varint(len(body)) + body + packed
+
+    def loads(self, data):
+        if data[:1] == b"J":
+            return json.loads(data[1:].decode("latin-1"))
+        if data[:1] != b"C":
+            return json.loads(data.decode("latin-1"))
+        length, pos = _read_varint(data, 1)
+        obj = json.loads(data[pos:pos + length].decode("latin-1"))
+        pos += length
+        count, pos = _read_varint(data, pos)
+        cart = {}
+        for _ in range(count):
+            pid, pos = _read_varint(data, pos)
+            quantity, pos = _read_varint(data, pos)
+            cents, pos = _read_varint(data, pos)
+            cart[str(pid)] = {"quantity": quantity, "price": _price(cents)}
+        obj[CART_SESSION_ID] = cart
+        return obj
+
+
+# -------------------------
+# WRITE-BEHIND BUFFER (per process)
+# -------------------------
+_pending = {}  # session_key -> (encoded data, expire_date)
+_pending_lock = threading.Lock()
+_last_flush = time.monotonic()
+
+
+def _tombstoned(cache, keys):
+    """The session keys among `keys` that were deleted (by any worker sharing the cache)."""
+    found = cache.get_many([TOMBSTONE_PREFIX + k for k in keys])
+    return {k[len(TOMBSTONE_PREFIX):] for k in found}
+
+
+def flush_pending(force=False):
+    """
+    Write buffered sessions back in one UPDATE; returns how many rows were
+    written. Never inserts: sessions deleted meanwhile stay deleted.
+    """
+    global _last_flush
+    with _pending_lock:
+        if not _pending or (not force and time.monotonic() - _last_flush < WRITE_BEHIND_SECONDS):
+            return 0
+        batch = dict(_pending)
+        _pending.clear()
+        _last_flush = time.monotonic()
+
+    for key in _tombstoned(caches[settings.SESSION_CACHE_ALIAS], batch):
+        del batch[key]
+    model = SessionStore.get_model_class()
+    existing = model.objects.filter(session_key__in=batch).values_list("session_key", flat=True)
+    rows = [model(session_key=k, session_data=batch[k][0], expire_date=batch[k][1]) for k in existing]
+    model.objects.bulk_update(rows, ["session_data", "expire_date"])
+    return len(rows)
+
+
+atexit.register(lambda: flush_pending(force=True))
+
+
+# -------------------------
+# STORE
+# -------------------------
+class SessionStore(DBStore):
+    def __init__(self, session_key=None):
+        super().__init__(session_key)
+        self._loaded_payload = None
+        self.shared = not isinstance(self.cache, PROCESS_LOCAL_CACHES)
+        self.stats = {"bytes": 0, "db_writes": 0, "cache_writes": 0, "skipped": 0}
+
+    @property
+    def cache(self):
+        return caches[settings.SESSION_CACHE_ALIAS]
+
+    @property
+    def cache_key(self):
+        return KEY_PREFIX + self._get_or_create_session_key()
+
+    def _payload(self, data):
+        return self.serializer().dumps(data)
+
+    def load(self):
+        payload = self.cache.get(KEY_PREFIX + self.session_key) if self.shared and self.session_key else None
+        if payload is not None:
+            data = self.serializer().loads(payload)
+        else:
+            # not from _pending: another worker may have changed or deleted the session since
+            row = self._get_session_from_db()
+            if row is None:
+                self._session_key = None
+                return {}
+            data = self.decode(row.session_data)
+            payload = self._payload(data)
+            if self.shared:
+                self.cache.set(KEY_PREFIX + self.session_key, payload,
+                               self.get_expiry_age(expiry=data.get("_session_expiry")))
+        self._loaded_payload = payload
+        return data
+
+    def exists(self, session_key):
+        return (
+            (self.shared and KEY_PREFIX + session_key in self.cache)
+            or session_key in _pending
+            or super().exists(session_key)
+        )
+
+    def save(self, must_create=False):
+        if self.session_key is None:
+            return self.create()
+        data = self._get_session(no_load=must_create)
+        payload = self._payload(data)
+        self.stats["bytes"] = len(payload)
+        if not must_create and payload == self._loaded_payload:
+            self.stats["skipped"] += 1
+            return
+
+        auth_changed = self._loaded_payload is None or any(
+            data.get(k) != self._loaded_data().get(k) for k in AUTH_KEYS
+        )
+        if must_create or auth_changed or not WRITE_BEHIND_SECONDS or not self.shared:
+            super().save(must_create=must_create)
+            self.stats["db_writes"] += 1
+            with _pending_lock:
+                _pending.pop(self.session_key, None)
+        elif _tombstoned(self.cache, [self.session_key]):
+            return  # logged out / flushed elsewhere while this request ran
+        else:
+            with _pending_lock:
+                _pending[self.session_key] = (self.encode(data), self.get_expiry_date())
+
+        if self.shared:
+            self.cache.set(self.cache_key, payload, self.get_expiry_age())
+            self.stats["cache_writes"] += 1
+        self._loaded_payload = payload
+        if flush_pending():
+            self.stats["db_writes"] += 1
+
+    def _loaded_data(self):
+        return self.serializer().loads(self._loaded_payload)
+
+    def delete(self, session_key=None):
+        key = session_key or self.session_key
+        if key is None:
+            return
+        self.cache.delete(KEY_PREFIX + key)
+        if self.shared:
+            # for the other workers' write-behind buffers; a session can't outlive its cookie
+            self.cache.set(TOMBSTONE_PREFIX + key, True, settings.SESSION_COOKIE_AGE)
+        with _pending_lock:
+            _pending.pop(key, None)
+        super().delete(key)
+
+    def flush(self):
+        self.clear()
+        self.delete(self.session_key)
+        self._session_key = None
+        self._loaded_payload = None
+
+    # async callers (async views) get the same cache / diff / buffer logic
+    async def aload(self):
+        return await sync_to_async(self.load)()
+
+    async def aexists(self, session_key):
+        return await sync_to_async(self.exists)(session_key)
+
+    async def asave(self, must_create=False):
+        return await sync_to_async(self.save)(must_create)
+
+    async def adelete(self, session_key=None):
+        return await sync_to_async(self.delete)(session_key)
+
+    async def aflush(self):
+        return await sync_to_async(self.flush)()
+
+    @classmethod
+    def clear_expired(cls):
+        flush_pending(force=True)
+        super().clear_expired()
@@ -0,0 +1,46 @@
+# shop/signals.py
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from . import facets, feeds, images, prerender, ratings
+from .models import Category, Feedback, Product
+
+
+@receiver(post_save, sender=Feedback)
+def feedback_saved(sender, instance, created, **kwargs):
+    # A new unapproved review isn't in any feed yet. Any other save may have
+    # changed an approved review or (un)approved one.
+    if instance.approved or not created:
+        feeds.invalidate_product(instance.product_id)
+        ratings.update([instance.product_id])
+        transaction.on_commit(lambda: prerender.reviews_changed([instance.product_id]))
+
+
+@receiver(post_delete, sender=Feedback)
+def feedback_deleted(sender, instance, **kwargs):
+    if instance.approved:
+        feeds.invalidate_product(instance.product_id)
+        ratings.update([instance.product_id])
+        transaction.on_commit(lambda: prerender.reviews_changed([instance.product_id]))
+
+
+@receiver(post_save, sender=Product)
+def product_saved(sender, instance, created, **kwargs):
+    facets.bump()
+    # name / slug / is_active show up in the feed channel and item links
+    if not created:
+        feeds.invalidate_product(instance.id)
+    if images.needs_variants(instance):
+        transaction.on_commit(lambda: images.schedule(instance.id))
+    elif not instance.image and instance.image_variants:
+        sender.objects.filter(pk=instance.pk).update(image_variants={})
+    transaction.on_commit(lambda: prerender.product_changed(instance))
+
+
+@receiver(post_delete, sender=Product)
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def catalog_changed(sender, **kwargs):
+    facets.bump()
+    transaction.on_commit(prerender.catalog_changed)
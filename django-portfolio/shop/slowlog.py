@@ -0,0 +1,243 @@
+# shop/slowlog.py
+"""
+Slow-query log.
+
+Every database connection gets an execute wrapper (attached on
+connection_created) that times each statement. Statements slower than
+SLOW_QUERY_MS are recorded with:
+
+  shape     the SQL with literals and placeholders as ?, IN lists and
+            multi-row VALUES collapsed, so the same query from different
+            requests groups together ("fingerprint" is a hash of it)
+  params    the parameters (each repr cut to PARAM_CHARS); "redacted", and
+            "sql" reduced to the shape, when the statement touches a table
+            in SLOW_QUERY_REDACT (sessions, users, orders: personal data)
+  view      the URL name of the request (shop:product_detail), its method
+            and path; None outside a request (commands, offload threads)
+  frame     the innermost project frame that ran it (file:line in function);
+            None for async ORM calls, whose coroutine isn't on the stack
+  template  the innermost template node being rendered, if any
+            (shop/reviews_list.html:12), e.g. a lazy {{ r.user }} in a loop
+
+Records go to an in-process ring buffer (recent()) and, as JSON lines, to
+SLOW_QUERY_LOG_FILE (rotated at SLOW_QUERY_LOG_MAX_BYTES). "manage.py
+slow_queries" aggregates the log by shape.
+
+The request is known through a context variable set by
+SlowQueryMiddleware; it follows async views into sync_to_async threads.
+"""
+import hashlib
+import json
+import logging
+import logging.handlers
+import os
+import re
+import sys
+import threading
+import time
+from collections import deque
+from contextvars import ContextVar
+from datetime import datetime, timezone
+
+from django.conf import settings
+from django.template.base import Node
+
+ENABLED = getattr(settings, "SLOW_QUERY_LOG", True)
+THRESHOLD = getattr(settings, "SLOW_QUERY_MS", 100) / 1000
+LOG_FILE = str(getattr(settings, "SLOW_QUERY_LOG_FILE", "") or "")
+MAX_BYTES = getattr(settings, "SLOW_QUERY_LOG_MAX_BYTES", 10 * 1024 * 1024)
+BACKUPS = getattr(settings, "SLOW_QUERY_LOG_BACKUPS", 5)
+SQL_CHARS = 4000
+PARAM_CHARS = 200
+REDACT = tuple(getattr(settings, "SLOW_QUERY_REDACT", (
+    "django_session", "auth_user", "shop_order", "shop_profile", "shop_address",
+    "account_emailaddress", "socialaccount_socialaccount", "socialaccount_socialtoken",
+)))
+REDACTED = "redacted"
+
+BASE_DIR = str(settings.BASE_DIR)
+_RENDER_CODE = Node.render_annotated.__code__
+
+logger = logging.getLogger(__name__)
+_buffer = deque(maxlen=getattr(settings, "SLOW_QUERY_BUFFER", 500))
+_request = ContextVar("slowlog_request", default=None)
+_file_lock = threading.Lock()
+_file_ready = False
+
+
+# -------------------------
+# NORMALIZATION
+# -------------------------
+_STRING_RE = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_RE = re.compile(r"(?<![\w\"])-?\d+(?:\.\d+)?\b")
+_PLACEHOLDER_RE = re.compile(r"%s|\?")
+_IN_LIST_RE = re.compile(r"\bIN \(\?(?:, \?)*\)")
+_VALUES_RE = re.compile(r"(\(\?(?:, \?)*\))(?:, \1)+")
+_SPACE_RE = re.compile(r"\s+")
+# a table name as an identifier, quoted or not ("shop_order", not shop_orderitem)
+_REDACT_RE = re.compile(
+    r"(?<![\w$])(?:%s)(?![\w$])" % "|".join(re.escape(t) for t in REDACT)) if REDACT else None
+
+
+def normalize(sql):
+    """SQL shape: literals and placeholders as ?, IN (...) and repeated VALUES rows collapsed."""
+    shape = _SPACE_RE.sub(" ", sql).strip()
+    shape = _STRING_RE.sub("?", shape)
+    shape = _NUMBER_RE.sub("?", shape)
+    shape = _PLACEHOLDER_RE.sub("?", shape)
+    shape = _IN_LIST_RE.sub("IN (...)", shape)
+    return _VALUES_RE.sub(r"\1, ...", shape)
+
+
+def fingerprint(shape):
+    return hashlib.sha1(shape.encode()).hexdigest()[:12]
+
+
+def redacted(sql):
+    """Whether the statement reads or writes a SLOW_QUERY_REDACT table."""
+    return _REDACT_RE is not None and _REDACT_RE.search(sql) is not None
+
+
+def _params(params, many):
+    if params is None:
+        return None
+    if many:
+        # an iterator was consumed by the execute; only sequences can be summarized
+        rows = params if isinstance(params, (list, tuple)) else None
+        return {"rows": len(rows), "first": _params(rows[0], False)} if rows else None
+    if isinstance(params, dict):
+        return {k: repr(v)[:PARAM_CHARS] for k, v in params.items()}
+    return [repr(v)[:PARAM_CHARS] for v in params]
+
+
+# -------------------------
+# ATTRIBUTION
+# -------------------------
+def _origin(frame):
+    """(project frame, template node) that led to this statement; either may be None."""
+    code_frame = template = None
+    while frame is not None and (code_frame is None or template is None):
+        code = frame.f_code
+        if template is None and code is _RENDER_CODE:
+            node = frame.f_locals.get("self")
+            origin, token = getattr(node, "origin", None), getattr(node, "token", None)
+            if origin is not None:
+                template = f"{origin.template_name or origin.name}:{token.lineno if token else '?'}"
+        elif (
+            code_frame is None
+            and code.co_filename.startswith(BASE_DIR)
+            and code.co_filename != __file__
+            and "site-packages" not in code.co_filename
+            and not _passes_request_on(frame)
+        ):
+            code_frame = (f"{os.path.relpath(code.co_filename, BASE_DIR)}:{frame.f_lineno} "
+                          f"in {code.co_name}")
+        frame = frame.f_back
+    return code_frame, template
+
+
+def _passes_request_on(frame):
+    """A middleware's __call__: on the stack of every query, so never the culprit."""
+    return (frame.f_code.co_name in ("__call__", "__acall__")
+            and hasattr(frame.f_locals.get("self"), "get_response"))
+
+
+def _view():
+    request = _request.get()
+    if request is None:
+        return None
+    match = getattr(request, "resolver_match", None)
+    return {
+        "name": match.view_name if match else None,
+        "method": request.method,
+        "path": request.path,
+    }
+
+
+# -------------------------
+# RECORDING
+# -------------------------
+def _write(entry):
+    global _file_ready
+    if not LOG_FILE:
+        return
+    if not _file_ready:
+        with _file_lock:
+            if not _file_ready:
+                os.makedirs(os.path.dirname(LOG_FILE) or ".", exist_ok=True)
+                handler = logging.handlers.RotatingFileHandler(
+                    LOG_FILE, maxBytes=MAX_BYTES, backupCount=BACKUPS, encoding="utf-8", delay=True)
+                handler.setFormatter(logging.Formatter("%(message)s"))
+                logger.addHandler(handler)
+                logger.setLevel(logging.INFO)
+                logger.propagate = False
+                _file_ready = True
+    logger.info(json.dumps(entry, default=str))
+
+
+def record(alias, sql, params, many, duration):
+    shape = normalize(sql)
+    code_frame, template = _origin(sys._getframe(2))
+    private = redacted(sql)
+    entry = {
+        "ts": datetime.now(timezone.utc).isoformat(timespec="milliseconds"),
+        "ms": round(duration * 1000, 2),
+        "alias": alias,
+        "fingerprint": fingerprint(shape),
+        "shape": shape[:SQL_CHARS],
+        "sql": (shape if private else sql)[:SQL_CHARS],
+        "params": REDACTED if private else _params(params, many),
+        "many": many,
+        "view": _view(),
+        "frame": code_frame,
+        "template": template,
+        "thread": threading.current_thread().name,
+    }
+    _buffer.append(entry)
+    try:
+        _write(entry)
+    except OSError:
+        pass  # a full / read-only disk must not fail the query
+    return entry
+
+
+def recent(limit=None):
+    """Newest first."""
+    entries = list(_buffer)[::-1]
+    return entries[:limit] if limit else entries
+
+
+def clear():
+    _buffer.clear()
+
+
+class SlowQueryWrapper:
+    def __init__(self, alias):
+        self.alias = alias
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = time.perf_counter() - start
+            if duration >= THRESHOLD:
+                record(self.alias, sql, params, many, duration)
+
+
+def attach(sender, connection, **kwargs):
+    """connection_created receiver: time every statement on this connection."""
+    if not any(isinstance(w, SlowQueryWrapper) for w in connection.execute_wrappers):
+        connection.execute_wrappers.append(SlowQueryWrapper(connection.alias))
+
+
+# -------------------------
+# REQUEST CONTEXT
+# -------------------------
+def begin_request(request):
+    """Called by SlowQueryMiddleware; returns a token for end_request."""
+    return _request.set(request)
+
+
+def end_request(token):
+    _request.reset(token)
@@ -0,0 +1,304 @@
+# shop/staticfiles.py
+import gzip
+import mimetypes
+import mmap
+import os
+import re
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+from django.http import HttpResponse, HttpResponseNotModified, StreamingHttpResponse
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from django.utils.http import http_date, parse_etags, parse_http_date_safe
+
+try:
+    import brotli  # optional: pip install brotli
+except ImportError:
+    brotli = None
+
+# ManifestStaticFilesStorage names files like "base.3f2a9c1b7d4e.css"
+HASHED_NAME_RE = re.compile(r"\.[0-9a-f]{12}\.[^./]+$")
+
+# Text-like assets worth compressing (png/jpg/webp are already compressed)
+COMPRESSIBLE_EXTENSIONS = getattr(settings, "STATIC_COMPRESSIBLE_EXTENSIONS", (
+    ".css", ".js", ".mjs", ".map", ".json", ".svg", ".txt", ".xml", ".html", ".ico",
+))
+COMPRESS_MIN_SIZE = getattr(settings, "STATIC_COMPRESS_MIN_SIZE", 256)
+
+# Files up to this size are held in memory; bigger ones are mmap'ed
+MEMORY_MAX_FILE_SIZE = getattr(settings, "STATIC_MEMORY_MAX_FILE_SIZE", 512 * 1024)
+
+# encoding name -> file suffix, in server preference order
+ENCODINGS = (("br", ".br"), ("gzip", ".gz"))
+
+RANGE_RE = re.compile(r"^bytes=(\d*)-(\d*)$")
+STREAM_CHUNK_SIZE = 64 * 1024
+
+
+def is_hashed_name(path):
+    """True when the file name carries a content hash (safe to cache forever)."""
+    return bool(HASHED_NAME_RE.search(path))
+
+
+def add_cache_headers(response, path):
+    """
+    Hashed files never change under the same URL, so browsers may keep them
+    for a year without revalidating. Unhashed names (the original
+    "style.css" copies) must be revalidated on every use.
+    """
+    if is_hashed_name(path):
+        patch_cache_control(
+            response,
+            public=True,
+            max_age=settings.STATIC_IMMUTABLE_MAX_AGE,
+            immutable=True,
+        )
+    else:
+        patch_cache_control(response, public=True, no_cache=True)
+    return response
+
+
+# -------------------------
+# COLLECTSTATIC: .gz / .br VARIANTS
+# -------------------------
+def compress_file(full_path):
+    """
+    Write <file>.gz (and <file>.br when brotli is installed) next to the file.
+    A variant is only kept when it is actually smaller than the original.
+    """
+    with open(full_path, "rb") as f:
+        data = f.read()
+    if len(data) < COMPRESS_MIN_SIZE:
+        return []
+
+    written = []
+    variants = [(".gz", lambda d: gzip.compress(d, compresslevel=9, mtime=0))]
+    if brotli is not None:
+        variants.append((".br", lambda d: brotli.compress(d, quality=11)))
+
+    for suffix, compress in variants:
+        out = compress(data)
+        if len(out) >= len(data) * 0.95:
+            continue
+        with open(full_path + suffix, "wb") as f:
+            f.write(out)
+        written.append(full_path + suffix)
+    return written
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    """
+    ManifestStaticFilesStorage that also precompresses text assets, so the
+    app server never has to gzip a static file per request.
+    """
+
+    def post_process(self, paths, dry_run=False, **options):
+        names = set()
+        for name, hashed_name, processed in super().post_process(paths, dry_run, **options):
+            if not isinstance(processed, Exception):
+                names.add(name)
+                if hashed_name:
+                    names.add(hashed_name)
+            yield name, hashed_name, processed
+
+        if dry_run:
+            return
+        for name in sorted(names):
+            if name.lower().endswith(COMPRESSIBLE_EXTENSIONS):
+                compress_file(self.path(name))
+
+
+# -------------------------
+# IN-PROCESS STATIC SERVING
+# -------------------------
+class StaticFile:
+    """One representation (identity, gzip or br) of a collected file."""
+
+    def __init__(self, full_path, encoding=None):
+        stat = os.stat(full_path)
+        self.encoding = encoding
+        self.size = stat.st_size
+        self.last_modified = http_date(stat.st_mtime)
+        suffix = f"-{encoding}" if encoding else ""
+        self.etag = f'"{stat.st_size:x}-{int(stat.st_mtime):x}{suffix}"'
+
+        with open(full_path, "rb") as f:
+            if self.size == 0:
+                self.data = b""
+            elif self.size <= MEMORY_MAX_FILE_SIZE:
+                self.data = f.read()
+            else:
+                self.data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def response(self, content_type, start=0, end=None, status=200, head=False):
+        """Response for bytes start..end (inclusive); mmap'ed files are streamed."""
+        end = self.size - 1 if end is None else end
+        if head or self.size == 0:
+            response = HttpResponse(b"", content_type=content_type, status=status)
+        elif isinstance(self.data, bytes):
+            response = HttpResponse(self.data[start:end + 1], content_type=content_type, status=status)
+        else:
+            response = StreamingHttpResponse(self.stream(start, end), content_type=content_type, status=status)
+        response["Content-Length"] = max(end - start + 1, 0)
+        return response
+
+    def stream(self, start, end):
+        view = memoryview(self.data)
+        for offset in range(start, end + 1, STREAM_CHUNK_SIZE):
+            yield bytes(view[offset:min(offset + STREAM_CHUNK_SIZE, end + 1)])
+
+
+class StaticEntry:
+    """A URL path with its content type and available encodings."""
+
+    def __init__(self, full_path, name):
+        content_type, _ = mimetypes.guess_type(full_path)
+        self.name = name
+        self.content_type = content_type or "application/octet-stream"
+        self.identity = StaticFile(full_path)
+        self.variants = {}
+        for encoding, suffix in ENCODINGS:
+            if os.path.isfile(full_path + suffix):
+                self.variants[encoding] = StaticFile(full_path + suffix, encoding)
+
+
+def build_index(root):
+    """Map url path (relative to STATIC_ROOT) -> StaticEntry."""
+    index = {}
+    if not root or not os.path.isdir(root):
+        return index
+    skip = tuple(suffix for _, suffix in ENCODINGS)
+    for dirpath, _, filenames in os.walk(root):
+        for filename in filenames:
+            if filename.endswith(skip):
+                continue
+            full_path = os.path.join(dirpath, filename)
+            name = os.path.relpath(full_path, root).replace(os.sep, "/")
+            index[name] = StaticEntry(full_path, name)
+    return index
+
+
+def accepted_encodings(request):
+    """Encodings the client accepts (q > 0), from Accept-Encoding."""
+    accepted = set()
+    for part in request.META.get("HTTP_ACCEPT_ENCODING", "").split(","):
+        token, _, params = part.strip().partition(";")
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        if token and q > 0:
+            accepted.add(token.strip().lower())
+    return accepted
+
+
+class StaticFilesMiddleware:
+    """
+    Serves STATIC_URL straight from an in-memory index of STATIC_ROOT,
+    before URL resolution, sessions, auth or any view code run.
+
+    - picks the .br / .gz variant written at collectstatic time when the
+      client accepts it (Vary: Accept-Encoding)
+    - ETag / Last-Modified with 304 responses
+    - single byte-range requests (served from the identity file)
+    - hashed names get immutable cache headers (see add_cache_headers)
+
+    The index is built once per process; restart workers after collectstatic.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.prefix = "/" + settings.STATIC_URL.lstrip("/")
+        self.index = build_index(settings.STATIC_ROOT)
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        entry = self.lookup(request)
+        if entry is not None:
+            return self.serve(request, entry)
+        return self.get_response(request)
+
+    async def __acall__(self, request):
+        # serving is memory / mmap reads only, so it runs on the event loop
+        entry = self.lookup(request)
+        if entry is not None:
+            return self.serve(request, entry)
+        return await self.get_response(request)
+
+    def lookup(self, request):
+        if request.path_info.startswith(self.prefix) and request.method in ("GET", "HEAD"):
+            return self.index.get(request.path_info[len(self.prefix):])
+        return None
+
+    def serve(self, request, entry):
+        range_header = request.META.get("HTTP_RANGE")
+        static_file = entry.identity
+        if not range_header:
+            accepted = accepted_encodings(request)
+            for encoding, _ in ENCODINGS:
+                if encoding in entry.variants and encoding in accepted:
+                    static_file = entry.variants[encoding]
+                    break
+
+        if self.not_modified(request, static_file):
+            response = HttpResponseNotModified()
+        elif range_header:
+            response = self.range_response(request, entry, static_file, range_header)
+        else:
+            response = static_file.response(entry.content_type, head=request.method == "HEAD")
+
+        if response.status_code in (200, 206, 304):
+            response["ETag"] = static_file.etag
+            response["Last-Modified"] = static_file.last_modified
+            response["Accept-Ranges"] = "bytes"
+            if static_file.encoding:
+                response["Content-Encoding"] = static_file.encoding
+            if entry.variants:
+                patch_vary_headers(response, ("Accept-Encoding",))
+            add_cache_headers(response, entry.name)
+        return response
+
+    def not_modified(self, request, static_file):
+        if_none_match = request.META.get("HTTP_IF_NONE_MATCH")
+        if if_none_match:
+            etags = parse_etags(if_none_match)
+            return "*" in etags or static_file.etag in etags
+        if_modified_since = parse_http_date_safe(request.META.get("HTTP_IF_MODIFIED_SINCE") or "")
+        if if_modified_since is not None:
+            return parse_http_date_safe(static_file.last_modified) <= if_modified_since
+        return False
+
+    def range_response(self, request, entry, static_file, range_header):
+        size = static_file.size
+        head = request.method == "HEAD"
+        match = RANGE_RE.match(range_header.strip())
+        if not match or not any(match.groups()):
+            # multi-range / malformed: ignore the header and send everything
+            return static_file.response(entry.content_type, head=head)
+
+        start, end = match.groups()
+        if start == "":
+            # suffix range: last N bytes
+            start, end = max(size - int(end), 0), size - 1
+        else:
+            start = int(start)
+            end = min(int(end), size - 1) if end else size - 1
+
+        if start >= size or start > end:
+            response = HttpResponse(status=416)
+            response["Content-Range"] = f"bytes */{size}"
+            return response
+
+        response = static_file.response(entry.content_type, start, end, status=206, head=head)
+        response["Content-Range"] = f"bytes {start}-{end}/{size}"
+        return response
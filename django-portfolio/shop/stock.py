@@ -0,0 +1,205 @@
+# shop/stock.py
+"""
+Stock reservations for checkout.
+
+initiate_payment reserves the order's units (reserve), payment_handler
+commits them once the payment is verified (commit) or gives them back when
+it fails (release). Held reservations expire after RESERVATION_TTL, so an
+abandoned checkout returns its units: release_expired() runs from the
+release_expired_stock command and, for one product, whenever that product
+looks sold out.
+
+Units on hand live in StockShard rows. Taking units is a single conditional
+UPDATE ... SET available = available - n WHERE available >= n on one shard,
+never SELECT ... FOR UPDATE, so a row is locked only from that statement to
+the end of the (short) checkout transaction. Popular products can be split
+over several shards; each checkout starts at a random one, so concurrent
+checkouts of the same product mostly lock different rows. (SQLite locks the
+whole database per write transaction, so there shards only spread the work;
+the gain is on PostgreSQL / MySQL.)
+
+A product without shards is not stock-tracked and always reserves.
+"""
+import logging
+import random
+from collections import Counter
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Sum
+from django.utils import timezone
+
+from .models import StockReservation, StockShard
+
+logger = logging.getLogger(__name__)
+
+RESERVATION_TTL = timedelta(minutes=getattr(settings, "STOCK_RESERVATION_MINUTES", 15))
+SWEEP_BATCH = 500
+
+
+class OutOfStock(Exception):
+    def __init__(self, product_id, requested, available):
+        self.product_id, self.requested, self.available = product_id, requested, available
+        super().__init__(f"Only {available} left of product {product_id} ({requested} requested).")
+
+
+# -------------------------
+# STOCK LEVELS
+# -------------------------
+def set_stock(product, units, shards=1):
+    """
+    Replace a product's stock with `units` spread evenly over `shards` rows.
+    Refused (ValueError) while checkouts hold units of the product: releasing
+    a hold adds its units back to the shard it was taken from, which this
+    would have deleted. Use restock() to add units meanwhile.
+    """
+    per, extra = divmod(units, shards)
+    release_expired(product_id=product.pk)
+    with transaction.atomic():
+        # locked first, so a checkout that is taking units right now commits its hold before the check
+        list(StockShard.objects.select_for_update().filter(product=product).values_list("pk", flat=True))
+        held = StockReservation.objects.filter(product=product, status="held").aggregate(n=Sum("quantity"))["n"]
+        if held:
+            raise ValueError(f"{held} unit(s) of product {product.pk} are held by checkouts in progress; "
+                             f"use restock() or retry once they are paid or released.")
+        StockShard.objects.filter(product=product).delete()
+        StockShard.objects.bulk_create([
+            StockShard(product=product, shard=i, available=per + (i < extra)) for i in range(shards)
+        ])
+
+
+def restock(product, units):
+    """Add units without touching concurrent reservations (an increment, not a write of the total)."""
+    shards = list(StockShard.objects.filter(product=product).values_list("shard", flat=True))
+    if not shards:
+        raise ValueError(f"Product {product.pk} is not stock-tracked; use set_stock().")
+    per, extra = divmod(units, len(shards))
+    with transaction.atomic():
+        for i, shard in enumerate(sorted(shards)):
+            if per + (i < extra):
+                _adjust(product.pk, shard, per + (i < extra))
+
+
+def available(product_ids):
+    """{product_id: units on hand} for stock-tracked products (untracked ones are absent)."""
+    rows = (
+        StockShard.objects.filter(product_id__in=product_ids)
+        .values("product_id")
+        .annotate(units=Sum("available"))
+    )
+    return {row["product_id"]: row["units"] for row in rows}
+
+
+def _adjust(product_id, shard, delta):
+    """Add delta to one shard; a negative delta only applies if that many units are there."""
+    rows = StockShard.objects.filter(product_id=product_id, shard=shard)
+    if delta < 0:
+        rows = rows.filter(available__gte=-delta)
+    return rows.update(available=F("available") + delta) == 1
+
+
+# -------------------------
+# RESERVE / COMMIT / RELEASE
+# -------------------------
+def _take(product_id, quantity):
+    """
+    [(shard, units), ...] taken for one product, or None if it is untracked.
+    Prefers a single shard (starting at a random one); splits the quantity
+    over shards only when no single shard has enough.
+    """
+    shards = list(StockShard.objects.filter(product_id=product_id).values_list("shard", "available"))
+    if not shards:
+        return None
+    start = random.randrange(len(shards))
+    shards = shards[start:] + shards[:start]
+    for shard, units in shards:
+        if units >= quantity and _adjust(product_id, shard, -quantity):
+            return [(shard, quantity)]
+
+    taken, remaining = [], quantity
+    for shard, units in StockShard.objects.filter(product_id=product_id).values_list("shard", "available"):
+        take = min(units, remaining)
+        if take and _adjust(product_id, shard, -take):
+            taken.append((shard, take))
+            remaining -= take
+            if not remaining:
+                return taken
+    # the caller's savepoint rolls back what was taken
+    raise OutOfStock(product_id, quantity, quantity - remaining)
+
+
+def reserve(order, items):
+    """
+    Hold units for an order; items are (product_id, quantity) pairs. All or
+    nothing: raises OutOfStock (having taken nothing) if any product is short.
+    """
+    wanted = Counter()
+    for product_id, quantity in items:
+        wanted[product_id] += int(quantity)
+    expires_at = timezone.now() + RESERVATION_TTL
+    reservations = []
+    with transaction.atomic():
+        # a fixed product order, so two multi-product checkouts can't deadlock
+        for product_id in sorted(wanted):
+            try:
+                with transaction.atomic():
+                    taken = _take(product_id, wanted[product_id])
+            except OutOfStock:
+                # units held by abandoned checkouts may be due back
+                if not release_expired(product_id=product_id):
+                    raise
+                taken = _take(product_id, wanted[product_id])
+            reservations += [
+                StockReservation(order=order, product_id=product_id, shard=shard, quantity=units,
+                                 expires_at=expires_at)
+                for shard, units in taken or ()
+            ]
+        StockReservation.objects.bulk_create(reservations)
+    return reservations
+
+
+def commit(orders):
+    """Payment verified: the held units are sold. Re-takes units whose hold had already expired."""
+    with transaction.atomic():
+        StockReservation.objects.filter(order__in=orders, status="held").update(status="committed")
+        late = list(StockReservation.objects.filter(order__in=orders, status="released"))
+        for reservation in late:
+            try:
+                with transaction.atomic():
+                    _take(reservation.product_id, reservation.quantity)
+            except OutOfStock as exc:
+                # paid for, but the units went to someone else meanwhile
+                logger.error("Oversold after an expired hold on order %s: %s", reservation.order_id, exc)
+            StockReservation.objects.filter(pk=reservation.pk).update(status="committed")
+
+
+def _release(reservations):
+    released = 0
+    with transaction.atomic():
+        for reservation in reservations:
+            # the status flip is the guard: a concurrent release / commit wins or loses as a whole
+            if StockReservation.objects.filter(pk=reservation.pk, status="held").update(status="released"):
+                _adjust(reservation.product_id, reservation.shard, reservation.quantity)
+                released += reservation.quantity
+    return released
+
+
+def release(orders):
+    """Return the units held for orders that will not be paid. Returns the number of units."""
+    return _release(list(StockReservation.objects.filter(order__in=orders, status="held")))
+
+
+def release_expired(product_id=None, now=None):
+    """Return units of held reservations past their TTL (of one product, or all). Returns the number of units."""
+    rows = StockReservation.objects.filter(status="held", expires_at__lt=now or timezone.now())
+    if product_id is not None:
+        rows = rows.filter(product_id=product_id)
+    released = 0
+    while True:
+        batch = list(rows.order_by("expires_at")[:SWEEP_BATCH])
+        if not batch:
+            return released
+        released += _release(batch)
+        if len(batch) < SWEEP_BATCH:
+            return released
@@ -0,0 +1,55 @@
+# shop/templatetags/product_images.py
+from django import template
+from django.core.files.storage import default_storage
+from django.utils.html import format_html
+
+register = template.Library()
+
+PLACEHOLDER_URL = "https://via.placeholder.com/{}"
+
+
+def _srcset(variants):
+    return ", ".join(f"{default_storage.url(name)} {w}w" for w, name in variants)
+
+
+@register.simple_tag
+def product_image(product, sizes="100vw", css_class="", placeholder="400x250", eager=False):
+    """
+    Usage in template:
+      {% load product_images %}
+      {% product_image p sizes="(max-width: 600px) 100vw, 280px" placeholder="400x250" %}
+
+    Emits a <picture> with WebP and JPEG srcsets when the product's uploaded
+    image has derivatives (shop/images.py), with the blurred placeholder as
+    the background until the real image arrives. Falls back to the uploaded
+    original (variants still being built), then image_url, then a
+    placeholder service image. Images are lazy unless eager=True (use that
+    for the main above-the-fold image).
+    """
+    loading = "eager" if eager else "lazy"
+    variants = product.image_variants or {}
+    if product.image and variants.get("source") == product.image.name:
+        width = variants["webp"][-1][0]
+        height = round(variants["height"] * width / variants["width"])
+        return format_html(
+            '<picture><source type="image/webp" srcset="{}" sizes="{}">'
+            '<img src="{}" srcset="{}" sizes="{}" width="{}" height="{}" alt="{}"{} loading="{}" decoding="async"'
+            ' style="background:url({}) center/cover no-repeat"></picture>',
+            _srcset(variants["webp"]), sizes,
+            default_storage.url(variants["jpeg"][-1][1]), _srcset(variants["jpeg"]), sizes,
+            width, height, product.name, _class_attr(css_class), loading,
+            variants["placeholder"],
+        )
+
+    if product.image:
+        src = product.image.url
+    else:
+        src = product.image_url or PLACEHOLDER_URL.format(placeholder)
+    return format_html(
+        '<img src="{}" alt="{}"{} loading="{}" decoding="async">',
+        src, product.name, _class_attr(css_class), loading,
+    )
+
+
+def _class_attr(css_class):
+    return format_html(' class="{}"', css_class) if css_class else ""
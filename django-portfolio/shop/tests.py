@@ -1,3 +1,167 @@
-from django.test import TestCase
+import io
+import random
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
 
-# Create your tests here.
+from django.conf import settings
+from django.db import OperationalError, connections, transaction
+from django.db.models import Sum
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+
+from shop import sessions, stock
+from shop.management.commands.check_query_plans import Command as QueryPlans, disallowed_scans
+from shop.models import Category, Order, Product, StockReservation
+
+
+# the manifest only exists after collectstatic
+NO_MANIFEST = {**settings.STORAGES, "staticfiles": {"BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage"}}
+
+
+@override_settings(STORAGES=NO_MANIFEST)
+class QueryPlanTests(TestCase):
+    """The hot views' statements stay index-backed (see manage.py check_query_plans)."""
+
+    databases = "__all__"
+
+    def setUp(self):
+        self.plans = QueryPlans(stdout=io.StringIO())
+        self.plans.seed(2000)
+        self.plans.analyze()
+
+    def test_no_unexpected_full_scans(self):
+        captured = self.plans.exercise()
+        self.assertTrue(captured)
+        for (label, alias, sql), params in captured.items():
+            plan, scanned = self.plans.explain(connections[alias], sql, params)
+            with self.subTest(label=label, sql=sql):
+                self.assertEqual(disallowed_scans(label, scanned), [], "\n".join(plan))
+
+
+class ScanDetectionTests(TestCase):
+    """check_query_plans resolves SQLite's alias-only SCAN lines back to tables."""
+
+    def scanned(self, queryset):
+        sql, params = queryset.query.sql_with_params()
+        return QueryPlans().explain(connections[queryset.db], sql, params)[1]
+
+    def test_scan_inside_subquery_is_reported(self):
+        unindexed = Product.objects.filter(description="x").values("id")  # aliased U0 inside
+        scanned = self.scanned(Product.objects.filter(id__in=unindexed))
+        self.assertEqual(disallowed_scans("test", scanned), ["shop_product"])
+
+    def test_index_backed_subquery_passes(self):
+        by_slug = Product.objects.filter(slug="x").values("id")
+        self.assertEqual(self.scanned(Product.objects.filter(id__in=by_slug)), [])
+
+
+class StockConcurrencyTests(TransactionTestCase):
+    """Threads checking out one SKU until it sells out: nothing oversold, no unit lost."""
+
+    THREADS = 8
+    UNITS = 60
+
+    def setUp(self):
+        category = Category.objects.create(name="Stock", slug="stock")
+        self.product = Product.objects.create(category=category, name="SKU", slug="sku", price=100)
+
+    def checkout_until_sold_out(self, seed):
+        rng = random.Random(seed)
+        paid = 0
+        try:
+            while True:
+                quantity, outcome = rng.choice([1, 2]), rng.random()
+                try:
+                    # one transaction per checkout, so a lock error retries it as a whole
+                    with transaction.atomic():
+                        order = Order.objects.create(email=f"t{seed}@example.com", total_amount=100)
+                        stock.reserve(order, [(self.product.id, quantity)])
+                        if outcome < 0.2:  # abandoned: the hold runs out
+                            StockReservation.objects.filter(order=order).update(
+                                expires_at=timezone.now() - timedelta(seconds=1))
+                        elif outcome < 0.3:  # payment failed
+                            stock.release([order.pk])
+                        else:
+                            stock.commit([order.pk])
+                    if outcome >= 0.3:
+                        paid += quantity
+                except stock.OutOfStock:
+                    return paid
+                except OperationalError as exc:  # SQLite: one writer at a time
+                    if "locked" not in str(exc) and "busy" not in str(exc):
+                        raise
+        finally:
+            connections.close_all()
+
+    def assert_no_oversell(self, shards):
+        stock.set_stock(self.product, self.UNITS, shards)
+        with ThreadPoolExecutor(self.THREADS) as pool:
+            paid = sum(pool.map(self.checkout_until_sold_out, range(self.THREADS)))
+
+        def units(status):
+            rows = StockReservation.objects.filter(product=self.product, status=status)
+            return rows.aggregate(n=Sum("quantity"))["n"] or 0
+
+        on_hand = stock.available([self.product.id])[self.product.id]
+        self.assertEqual(units("committed"), paid)
+        self.assertLessEqual(paid, self.UNITS)
+        self.assertEqual(on_hand + units("held") + paid, self.UNITS)
+        stock.release_expired(product_id=self.product.id)
+        self.assertEqual(units("held"), 0)
+        self.assertEqual(stock.available([self.product.id])[self.product.id] + paid, self.UNITS)
+
+    def test_one_shard(self):
+        self.assert_no_oversell(1)
+
+    def test_sharded(self):
+        self.assert_no_oversell(4)
+
+    def test_set_stock_refused_while_units_are_held(self):
+        stock.set_stock(self.product, 10, 2)
+        order = Order.objects.create(email="t@example.com", total_amount=100)
+        stock.reserve(order, [(self.product.id, 3)])
+        with self.assertRaises(ValueError):
+            stock.set_stock(self.product, 20)
+        stock.release([order.pk])
+        self.assertEqual(stock.available([self.product.id])[self.product.id], 10)
+        stock.set_stock(self.product, 20)
+        self.assertEqual(stock.available([self.product.id])[self.product.id], 20)
+
+
+class SessionWriteBehindTests(TestCase):
+    """A session deleted by one worker stays deleted despite another worker's write-behind buffer."""
+
+    def store(self, session_key=None):
+        store = sessions.SessionStore(session_key)
+        store.shared = True  # LocMemCache stands in for the shared cache of a multi-worker setup
+        return store
+
+    def test_logout_elsewhere_is_not_undone(self):
+        store = self.store()
+        store["n"] = 1
+        store.save(must_create=True)
+        key = store.session_key
+        # this worker: a cart edit, buffered
+        edit = self.store(key)
+        edit["n"] = 2
+        edit.save()
+        buffered = dict(sessions._pending)
+        self.assertIn(key, buffered)
+        # another worker logs the session out; its delete() can't reach this worker's buffer
+        self.store(key).delete()
+        sessions._pending.update(buffered)
+
+        self.assertEqual(self.store(key).load(), {})
+        self.assertEqual(sessions.flush_pending(force=True), 0)
+        self.assertFalse(sessions.SessionStore.get_model_class().objects.filter(session_key=key).exists())
+
+    def test_buffered_edit_is_written_back(self):
+        store = self.store()
+        store["n"] = 1
+        store.save(must_create=True)
+        edit = self.store(store.session_key)
+        edit["n"] = 2
+        edit.save()
+        self.assertEqual(sessions.flush_pending(force=True), 1)
+        row = sessions.SessionStore.get_model_class().objects.get(session_key=store.session_key)
+        self.assertEqual(edit.decode(row.session_data), {"n": 2})
@@ -55,10 +55,20 @@ urlpatterns = [
     # Product Feedback
     path('feedback/<int:product_id>/', views.product_feedback, name='product_feedback'),
     path('feedback/rss/<int:product_id>/', views.product_reviews_rss, name='product_reviews_rss'),
+    path('feedback/rss/', views.reviews_rss, name='reviews_rss'),
 
     path("profile/address/add/", views.add_address, name="add_address"),
     path("profile/address/delete/<int:address_id>/", views.delete_address, name="delete_address"),
 
+    # CSRF cookie for prerendered pages (shop/prerender.py)
+    path('csrf/', views.csrf_cookie, name='csrf_cookie'),
+
+    # Staff: request profiles (shop/profiler.py), memory (shop/memory.py)
+    path('staff/profiles/', views.staff_profiles, name='staff_profiles'),
+    path('staff/profiles/<str:profile_id>/<str:kind>/', views.staff_profile_download,
+         name='staff_profile_download'),
+    path('staff/memory/', views.staff_memory, name='staff_memory'),
+
     # Product Detail (KEEP LAST)
     path('<slug:slug>/', views.product_detail, name='product_detail'),
     # urls.py (ADD BELOW profile path)
@@ -0,0 +1,29 @@
+# shop/views/__init__.py
+"""
+Shop views, one module per area:
+
+  catalog   product list / detail, search, the prerender CSRF endpoint
+  cart      session cart
+  checkout  buy now, checkout, Razorpay payment
+  accounts  signup / login, profile, addresses, orders
+  reviews   product feedback and the review RSS feeds
+  wishlist  wishlist page and toggle
+  staff     request profiles (shop/profiler.py), memory report (shop/memory.py)
+
+Third-party clients with a heavy import (the Razorpay SDK) are imported
+where they are used, not here, so booting a worker and resolving the
+first URL doesn't load them.
+"""
+from .accounts import (
+    add_address, cancel_order, delete_address, login_view, logout_view, my_orders, order_detail,
+    profile, signup,
+)
+from .cart import cart_add, cart_detail, cart_remove, cart_update
+from .catalog import ajax_search, csrf_cookie, product_detail, product_list, search_products
+from .checkout import (
+    buy_now, checkout, checkout_success, clear_buy_now_session, initiate_payment, payment_handler,
+)
+from .common import is_ajax_request
+from .reviews import product_feedback, product_reviews_rss, reviews_rss
+from .staff import staff_memory, staff_profile_download, staff_profiles
+from .wishlist import toggle_wishlist, wishlist_page
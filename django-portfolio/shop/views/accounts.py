@@ -0,0 +1,284 @@
+# shop/views/accounts.py
+import random
+import time
+
+from django.conf import settings
+from django.contrib.auth import authenticate, login, logout
+from django.contrib.auth.decorators import login_required
+from django.contrib.auth.models import User
+from django.core.mail import send_mail
+from django.shortcuts import get_object_or_404, redirect, render
+from django.http import JsonResponse
+from django.urls import reverse
+
+from .. import offload, stock
+from ..forms import CustomUserCreationForm
+from ..models import Address, Order, Profile
+
+
+# -------------------------
+# AUTH / PROFILE / ORDERS
+# -------------------------
+def signup(request):
+    """
+    Two-step signup:
+      1) User submits username,email,password,password2,phone -> server validates -> generate OTP -> send to email -> show OTP form.
+      2) User submits OTP -> server verifies -> create user+profile -> authenticate & login -> redirect to product_list.
+    OTP is stored in session with an expiry (5 minutes).
+    """
+    OTP_SESSION_KEY = "signup_otp_data"
+
+    if request.method == "POST":
+
+        # 🔁 RESEND OTP (AJAX)
+        if request.POST.get("resend_otp") == "1":
+            otp_data = request.session.get(OTP_SESSION_KEY)
+            if not otp_data:
+                return JsonResponse({"success": False}, status=400)
+
+            otp = random.randint(100000, 999999)
+            otp_data["otp"] = str(otp)
+            otp_data["expires_at"] = time.time() + (5 * 60)
+            request.session[OTP_SESSION_KEY] = otp_data
+            request.session.modified = True
+
+            subject = "Your signup OTP for My Shoppings"
+            message = f"Hi {otp_data['username']},\n\nYour new OTP is: {otp}"
+            from_email = settings.DEFAULT_FROM_EMAIL
+            offload.submit(send_mail, subject, message, from_email, [otp_data["email"]])
+
+            return JsonResponse({"success": True})
+
+        # If OTP field present -> verify branch
+        if request.POST.get("otp_verify") == "1":
+            otp_provided = request.POST.get("otp", "").strip()
+            otp_data = request.session.get(OTP_SESSION_KEY)
+            if not otp_data:
+                return render(request, "registration/signup.html", {
+                    "form": CustomUserCreationForm(),
+                    "otp_error": "Session expired. Please fill the signup form again."
+                })
+            if time.time() > otp_data.get("expires_at", 0):
+                del request.session[OTP_SESSION_KEY]
+                return render(request, "registration/signup.html", {
+                    "form": CustomUserCreationForm(),
+                    "otp_error": "OTP expired. Please submit signup form again to receive a new OTP."
+                })
+            if otp_provided != str(otp_data.get("otp")):
+                return render(request, "registration/signup.html", {
+                    "form": CustomUserCreationForm(initial={
+                        "username": otp_data.get("username"),
+                        "email": otp_data.get("email"),
+                        "phone": otp_data.get("phone"),
+                    }),
+                    "show_otp": True,
+                    "otp_error": "Invalid OTP. Please check your email and try again."
+                })
+
+            # OTP correct => create user
+            username = otp_data.get("username")
+            email = otp_data.get("email")
+            password = otp_data.get("password")
+            phone = otp_data.get("phone")
+
+            from django.contrib.auth.models import User
+            if User.objects.filter(username=username).exists():
+                del request.session[OTP_SESSION_KEY]
+                return render(request, "registration/signup.html", {
+                    "form": CustomUserCreationForm(),
+                    "otp_error": "Username already taken. Please choose another."
+                })
+            if User.objects.filter(email__iexact=email).exists():
+                del request.session[OTP_SESSION_KEY]
+                return render(request, "registration/signup.html", {
+                    "form": CustomUserCreationForm(),
+                    "otp_error": "Email already registered. Try logging in instead."
+                })
+
+            user = User.objects.create_user(username=username, email=email, password=password)
+            Profile.objects.create(user=user, phone=phone, signup_provider="manual")
+        
+
+
+            user = authenticate(username=username, password=password)
+            if user:
+                login(request, user)
+            try:
+                del request.session[OTP_SESSION_KEY]
+            except KeyError:
+                pass
+            return redirect("shop:product_list")
+
+        # Initial signup form submission
+        form = CustomUserCreationForm(request.POST)
+        if form.is_valid():
+            username = form.cleaned_data.get("username")
+            email = form.cleaned_data.get("email")
+            password = form.cleaned_data.get("password1")
+            phone = form.cleaned_data.get("phone")
+
+            from django.contrib.auth.models import User
+            if User.objects.filter(username=username).exists():
+                form.add_error("username", "This username is already taken.")
+                return render(request, "registration/signup.html", {"form": form})
+            if User.objects.filter(email__iexact=email).exists():
+                form.add_error("email", "An account with this email already exists.")
+                return render(request, "registration/signup.html", {"form": form})
+
+            otp = random.randint(100000, 999999)
+            expires_at = time.time() + (5 * 60)
+
+            request.session[OTP_SESSION_KEY] = {
+                "username": username,
+                "email": email,
+                "password": password,
+                "phone": phone,
+                "otp": str(otp),
+                "expires_at": expires_at
+            }
+            request.session.modified = True
+
+            subject = "Your signup OTP for My Shoppings"
+            message = f"Hi {username},\n\nYour OTP to complete signup is: {otp}\nThis OTP expires in 5 minutes.\n\nIf you did not request this, ignore this email."
+            from_email = getattr(settings, "DEFAULT_FROM_EMAIL", settings.EMAIL_HOST_USER if hasattr(settings, "EMAIL_HOST_USER") else None)
+            recipient_list = [email]
+
+            try:
+                offload.run(send_mail, subject, message, from_email, recipient_list, fail_silently=False)
+            except Exception as e:
+                try:
+                    del request.session[OTP_SESSION_KEY]
+                except:
+                    pass
+                form.add_error(None, f"Failed to send OTP email: {e}. Check your email settings.")
+                return render(request, "registration/signup.html", {"form": form})
+
+            return render(request, "registration/signup.html", {
+                "form": CustomUserCreationForm(initial={
+                    "username": username,
+                    "email": email,
+                    "phone": phone
+                }),
+                "show_otp": True,
+                "otp_sent_to": email
+            })
+        else:
+            return render(request, "registration/signup.html", {"form": form})
+    else:
+        form = CustomUserCreationForm()
+        return render(request, "registration/signup.html", {"form": form})
+
+
+@login_required
+def profile(request):
+    profile, _ = Profile.objects.get_or_create(
+        user=request.user,
+        defaults={"signup_provider": "google"}  # Google fallback
+    )
+
+    if request.method == "POST":
+        profile.phone = request.POST.get("phone", "").strip()
+        profile.address = request.POST.get("address", "").strip()
+        profile.save()
+        return redirect("shop:profile")
+
+    return render(request, "shop/profile.html", {
+    "profile": profile,
+    "address_limit_reached": profile.addresses.count() >= 3
+})
+
+
+
+@login_required
+def my_orders(request):
+    orders = Order.objects.filter(email=request.user.email).order_by("-created_at")
+    return render(request, "shop/my_orders.html", {"orders": orders})
+
+
+@login_required
+def order_detail(request, order_id):
+    order = get_object_or_404(Order, id=order_id)
+    if order.email != request.user.email:
+        return redirect("shop:my_orders")
+    return render(request, "shop/order_detail.html", {"order": order})
+
+
+@login_required
+def cancel_order(request, order_id):
+    order = get_object_or_404(Order, id=order_id)
+    if order.email != request.user.email:
+        return redirect("shop:my_orders")
+    if order.status not in ["paid", "cancelled"]:
+        order.status = "cancelled"
+        order.save()
+        stock.release([order.id])
+    return redirect("shop:my_orders")
+
+
+from django.contrib.auth.models import User
+
+def login_view(request):
+    if request.method == "POST":
+        identifier = request.POST.get("identifier", "").strip()
+        password = request.POST.get("password", "")
+        next_url = request.POST.get("next") or reverse("shop:product_list")
+
+        user = None
+
+        # 🔹 If email entered → get username
+        if "@" in identifier:
+            try:
+                user_obj = User.objects.get(email__iexact=identifier)
+                user = authenticate(username=user_obj.username, password=password)
+            except User.DoesNotExist:
+                user = None
+        else:
+            # 🔹 Username login
+            user = authenticate(username=identifier, password=password)
+
+        if user:
+            login(request, user)
+            return redirect(next_url)
+
+        return render(request, "registration/login.html", {
+            "error": "Invalid email/username or password",
+            "next": next_url
+        })
+
+    return render(request, "registration/login.html", {
+        "next": request.GET.get("next", "")
+    })
+
+
+def logout_view(request):
+    logout(request)
+    return redirect("shop:product_list")
+
+
+@login_required
+def add_address(request):
+    profile = request.user.profile
+
+    if request.method == "POST":
+        if profile.addresses.count() >= 3:
+            return redirect("shop:profile")
+
+        address_text = request.POST.get("address", "").strip()
+        if address_text:
+            Address.objects.create(
+                profile=profile,
+                address=address_text
+            )
+
+    return redirect("shop:profile")
+
+@login_required
+def delete_address(request, address_id):
+    profile = request.user.profile
+    try:
+        addr = profile.addresses.get(id=address_id)
+        addr.delete()
+    except:
+        pass
+
+    return redirect("shop:profile")
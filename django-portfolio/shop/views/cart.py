@@ -0,0 +1,129 @@
+# shop/views/cart.py
+from decimal import Decimal
+
+from django.contrib import messages
+from django.http import HttpResponseBadRequest, JsonResponse
+from django.shortcuts import get_object_or_404, redirect, render
+from django.urls import reverse
+
+from ..cart import Cart
+from ..models import Product
+from .common import is_ajax_request
+
+
+# -------------------------
+# ADD TO CART (LOGIN REQUIRED + TOAST + REDIRECT BACK)
+# -------------------------
+def cart_add(request, product_id):
+    if not request.user.is_authenticated:
+        messages.warning(request, "Please login to continue")
+        login_url = f"{reverse('shop:login')}?next={request.path}"
+
+        if is_ajax_request(request):
+            return JsonResponse({
+                "login_required": True,
+                "redirect_url": login_url,
+                "message": "Please login to continue"
+            }, status=401)
+
+        return redirect(login_url)
+
+    product = get_object_or_404(Product, id=product_id, is_active=True)
+    cart = Cart(request)
+
+    qty = 1
+    try:
+        qty = int(request.POST.get("qty", 1))
+    except:
+        qty = 1
+
+    cart.add(product=product, quantity=qty, update_quantity=False)
+
+    unique_count = len(cart.cart) if hasattr(cart, "cart") else 0
+    total_qty = len(cart)
+
+    if is_ajax_request(request):
+        return JsonResponse({
+            "success": True,
+            "cart_count": unique_count,
+            "total_qty": total_qty,
+        })
+
+    return redirect("shop:cart_detail")
+
+
+# -------------------------
+# UPDATE CART QTY
+# -------------------------
+def cart_update(request, product_id):
+    if request.method != "POST":
+        return HttpResponseBadRequest("Invalid")
+
+    cart = Cart(request)
+
+    try:
+        qty = int(request.POST.get("qty", 1))
+    except:
+        qty = 1
+
+    if qty <= 0:
+        try:
+            product = Product.objects.get(id=product_id)
+            cart.remove(product)
+        except:
+            pass
+    else:
+        product = get_object_or_404(Product, id=product_id)
+        cart.add(product=product, quantity=qty, update_quantity=True)
+
+    row_total = 0.0
+    for item in cart:
+        if item["product"].id == product_id:
+            row_total = float(item["total_price"])
+            break
+
+    return JsonResponse({
+        "success": True,
+        "row_total": row_total,
+        "cart_total": float(cart.get_total_price()),
+        "cart_count": len(cart.cart),
+        "total_qty": len(cart),
+    })
+
+
+# -------------------------
+# REMOVE FROM CART
+# -------------------------
+def cart_remove(request, product_id):
+    cart = Cart(request)
+    try:
+        product = Product.objects.get(id=product_id)
+        cart.remove(product)
+    except:
+        pass
+    return redirect("shop:cart_detail")
+
+
+# -------------------------
+# CART DETAIL
+# -------------------------
+def cart_detail(request):
+    cart = Cart(request)
+    items = []
+    total = Decimal("0.00")
+
+    for item in cart:
+        items.append({
+            "id": item["product"].id,
+            "product": item["product"],
+            "name": item["product"].name,
+            "price": item["price"],
+            "quantity": item["quantity"],
+            "line_total": item["total_price"],
+        })
+        total += item["total_price"]
+
+    return render(request, "shop/cart_detail.html", {
+        "items": items,
+        "total": total
+    })
@@ -0,0 +1,180 @@
+# shop/views/catalog.py
+from asgiref.sync import sync_to_async
+from django.core.paginator import EmptyPage, Page, PageNotAnInteger, Paginator
+from django.http import HttpResponse, JsonResponse
+from django.shortcuts import aget_object_or_404, get_object_or_404, render
+from django.template.loader import render_to_string
+from django.views.decorators.csrf import ensure_csrf_cookie
+
+from .. import facets, ratings
+from ..conditional import conditional_page, product_detail_state, product_list_state
+from ..models import Category, Product, Wishlist
+from ..routers import replica_reads
+from .common import is_ajax_request
+
+
+# -------------------------
+# PRODUCT LIST
+# -------------------------
+
+
+@replica_reads
+@conditional_page(product_list_state)
+async def product_list(request, slug=None):
+    products = Product.objects.filter(is_active=True)
+    current_category = None
+
+    if slug:
+        current_category = await aget_object_or_404(Category, slug=slug)
+
+    query = request.GET.get("q")
+    if query:
+        products = products.filter(name__icontains=query)
+
+    # facet counts for the searched set in one aggregate, then the selected filters
+    price, rating = facets.parse(request.GET)
+    categories = [c async for c in Category.objects.all()]
+    counts = await facets.acounts(products, categories, current_category, query, price, rating)
+    products = facets.apply(products, current_category, price, rating).order_by("-created_at")
+
+    # ===============================
+    # ✅ WISHLIST IDS (SAFE ADDITION)
+    # ===============================
+    wishlist_ids = []
+    user = await request.auser()
+    if user.is_authenticated:
+        wishlist_ids = [pid async for pid in Wishlist.objects.filter(
+            user=user
+        ).values_list("product_id", flat=True)]
+
+    # queries run here on the event loop; only template rendering (context
+    # processors read the session) goes to a thread
+    return await sync_to_async(render)(request, "shop/product_list.html", {
+        "categories": categories,
+        "products": [p async for p in products],
+        "current_category": current_category,
+        "query": query or "",
+        "facets": facets.present(counts, categories, current_category, query, price, rating),
+        "wishlist_ids": wishlist_ids,   # ✅ ADDED
+    })
+
+
+# -------------------------
+# PRODUCT DETAIL
+# -------------------------
+REVIEWS_PER_PAGE = 5
+
+
+@replica_reads
+@conditional_page(product_detail_state)
+async def product_detail(request, slug):
+    if is_ajax_request(request) and request.GET.get("rpage"):
+        return await reviews_page(request, slug)
+    return await sync_to_async(product_detail_page)(request, slug)
+
+
+async def reviews_page(request, slug):
+    """AJAX reviews pagination, entirely on the async ORM."""
+    product = await aget_object_or_404(Product, slug=slug)
+    reviews_qs = product.feedbacks.filter(approved=True).order_by("-created_at")
+
+    paginator = Paginator(reviews_qs, REVIEWS_PER_PAGE)
+    paginator.count = await reviews_qs.acount()  # pre-fill the cached count
+    try:
+        number = paginator.validate_number(request.GET.get("rpage", 1))
+    except (PageNotAnInteger, EmptyPage):
+        number = 1
+    bottom = (number - 1) * REVIEWS_PER_PAGE
+    rows = [r async for r in reviews_qs.select_related("user")[bottom:bottom + REVIEWS_PER_PAGE]]
+    rating = ratings.summary(product)
+
+    rendered = render_to_string(
+        "shop/reviews_list.html",
+        {
+            "reviews_page": Page(rows, number, paginator),
+            "product": product,
+            "avg_rating": rating["avg"],
+            "review_count": rating["count"],
+            "reviews_paginator": paginator,
+        },
+    )  # no request: these templates need no context processors (which would read the session)
+    return HttpResponse(rendered)
+
+
+def product_detail_page(request, slug):
+    product = get_object_or_404(Product, slug=slug)
+
+    related_products = Product.objects.filter(
+        category=product.category, is_active=True
+    ).exclude(id=product.id)
+
+    all_products = None
+    if not related_products.exists():
+        all_products = Product.objects.filter(is_active=True).exclude(id=product.id)[:8]
+
+    reviews_qs = product.feedbacks.filter(approved=True).order_by("-created_at")
+    page = request.GET.get("rpage", 1)
+    paginator = Paginator(reviews_qs, REVIEWS_PER_PAGE)
+
+    try:
+        reviews_page = paginator.page(page)
+    except (PageNotAnInteger, EmptyPage):
+        reviews_page = paginator.page(1)
+
+    rating = ratings.summary(product)
+
+    display_name = (
+        request.user.get_full_name() or request.user.get_username()
+        if request.user.is_authenticated else ""
+    )
+
+    user_feedback = (
+        product.feedbacks.filter(user=request.user).first()
+        if request.user.is_authenticated else None
+    )
+
+    # ===============================
+    # ✅ WISHLIST IDS (SAFE ADDITION)
+    # ===============================
+    wishlist_ids = []
+    if request.user.is_authenticated:
+        wishlist_ids = Wishlist.objects.filter(
+            user=request.user
+        ).values_list("product_id", flat=True)
+
+    return render(request, "shop/product_detail.html", {
+        "product": product,
+        "related_products": related_products,
+        "all_products": all_products,
+        "reviews_page": reviews_page,
+        "avg_rating": rating["avg"],
+        "review_count": rating["count"],
+        "reviews_paginator": paginator,
+        "display_name": display_name,
+        "user_feedback": user_feedback,
+        "wishlist_ids": wishlist_ids,   # ✅ ADDED
+    })
+
+
+# -------------------------
+# SEARCH
+# -------------------------
+def search_products(request):
+    query = request.GET.get("q", "")
+    products = Product.objects.filter(name__icontains=query)
+    return render(request, "shop/product_list_partial.html", {"products": products})
+
+
+@replica_reads
+async def ajax_search(request):
+    q = request.GET.get("q", "")
+    products = Product.objects.filter(name__icontains=q).values("name", "slug", "price")[:10]
+    return JsonResponse({
+        "results": [{"name": p["name"], "slug": p["slug"], "price": float(p["price"])} async for p in products]
+    })
+
+
+@ensure_csrf_cookie
+def csrf_cookie(request):
+    """Sets the CSRF cookie for prerendered pages (shop/prerender.py), which can't carry one."""
+    return HttpResponse(status=204)
@@ -0,0 +1,334 @@
+# shop/views/checkout.py
+import random
+
+from django.conf import settings
+from django.db import transaction
+from django.http import HttpResponseBadRequest, JsonResponse
+from django.shortcuts import get_object_or_404, redirect, render
+from django.urls import reverse
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_POST
+
+from .. import idempotency, offload, stock
+from ..cart import Cart
+from ..models import Order, OrderItem, Product
+
+
+def razorpay_client():
+    # imported on first use: the SDK pulls in requests / urllib3, which no
+    # other view needs, so workers don't pay for it at boot
+    import razorpay
+
+    return razorpay.Client(auth=(settings.RAZORPAY_KEY_ID, settings.RAZORPAY_KEY_SECRET))
+
+
+# -------------------------
+# BUY NOW (LOGIN REQUIRED + TOAST + REDIRECT BACK)
+# -------------------------
+# -------------------------
+
+#BUY NOW (LOGIN REQUIRED → REDIRECT TO CHECKOUT)
+def buy_now_fingerprint(request, product_id):
+    if not request.user.is_authenticated:
+        return None
+    # per checkout round: buying the same thing again after paying (or giving up) isn't a repeat
+    return (request.user.pk, idempotency.checkout_round(request), product_id, request.POST.get("qty", 1))
+
+
+@idempotency.idempotent(buy_now_fingerprint)
+def buy_now(request, product_id):
+    if not request.user.is_authenticated:
+        return redirect(f"{reverse('shop:login')}?next={request.path}")
+
+    product = get_object_or_404(Product, id=product_id, is_active=True)
+
+    try:
+        qty = int(request.POST.get("qty", 1))
+    except:
+        qty = 1
+
+
+    cart = Cart(request)
+
+    # ✅ Remove ONLY this product from cart (if already present)
+    product_key = str(product.id)
+    if product_key in cart.cart:
+        del cart.cart[product_key]
+        cart.session.modified = True
+
+    # ✅ Store buy-now intent (isolated checkout)
+    request.session["buy_now_product_id"] = product.id
+    request.session["buy_now_qty"] = qty
+    request.session.modified = True
+
+    # ✅ Go to isolated checkout
+    return redirect(f"{reverse('shop:checkout')}?buy={product.id}&qty={qty}")
+
+# -------------------------
+# BUY NOW (STRICT ISOLATED FLOW)
+# -------------------------
+# @login_required
+# def buy_now(request, product_id):
+#     product = get_object_or_404(Product, id=product_id, is_active=True)
+
+#     try:
+#         qty = int(request.POST.get("qty", 1))
+#     except:
+#         qty = 1
+
+#     cart = Cart(request)
+#     cart.clear()                       # ✅ ALWAYS clear old cart
+#     cart.add(product=product, quantity=qty, update_quantity=True)
+
+#     request.session.modified = True
+#     return redirect("shop:checkout")
+
+
+
+
+# -------------------------
+# CHECKOUT + PAYMENT
+# -------------------------
+SUGGESTION_POOL = 48
+
+
+def checkout_suggestions(exclude_id=None, count=4):
+    """
+    A few random active products. Sampled from the newest SUGGESTION_POOL ids
+    (read off the active-products index) rather than ORDER BY RANDOM(), which
+    sorts the whole catalogue on every checkout.
+    """
+    pool = Product.objects.filter(is_active=True).order_by("-created_at")
+    if exclude_id is not None:
+        pool = pool.exclude(id=exclude_id)
+    ids = list(pool.values_list("id", flat=True)[:SUGGESTION_POOL])
+    return Product.objects.filter(id__in=random.sample(ids, min(count, len(ids))))
+
+
+def checkout(request):
+    buy_id = request.GET.get("buy")
+    buy_qty = request.GET.get("qty")
+
+    try:
+        buy_qty = int(buy_qty) if buy_qty else 1
+    except:
+        buy_qty = 1
+
+    cart = Cart(request)
+
+    # ================================
+    # ✅ BUY NOW MODE (READ-ONLY CART)
+    # ================================
+    if buy_id:
+        try:
+            product = Product.objects.get(id=int(buy_id), is_active=True)
+        except Product.DoesNotExist:
+            return redirect("shop:product_list")
+
+    # ✅ CRITICAL FIX:
+    # Ensure buy-now session is ALWAYS set (home page Buy Now was missing this)
+    request.session["buy_now_product_id"] = product.id
+    request.session["buy_now_qty"] = buy_qty
+    request.session.modified = True
+
+    # 🚫 DO NOT touch cart
+
+    buy_now_items = [{
+        "product": product,
+        "price": product.price,
+        "quantity": buy_qty,
+        "total_price": product.price * buy_qty,
+    }]
+
+    total = product.price * buy_qty
+
+    return render(request, "shop/checkout.html", {
+        "cart": buy_now_items,
+        "total": total,
+        "suggestions": checkout_suggestions(exclude_id=product.id),
+    })
+
+    # ================================
+    # ✅ NORMAL CART CHECKOUT
+    # ================================
+    if len(cart) == 0:
+        return redirect("shop:product_list")
+
+    return render(request, "shop/checkout.html", {
+        "cart": list(cart),
+        "total": cart.get_total_price(),
+        "suggestions": checkout_suggestions(),
+    })
+
+
+def initiate_payment_fingerprint(request):
+    """Same visitor, same checkout attempt, same email and items: the same order."""
+    who = idempotency.owner(request)
+    if who is None:
+        return None
+    items = sorted((pid, item["quantity"], item["price"]) for pid, item in Cart(request).cart.items())
+    return (
+        who, idempotency.checkout_round(request), request.POST.get("email", "").strip(),
+        request.session.get("buy_now_product_id"), request.session.get("buy_now_qty"), items,
+    )
+
+
+# a repeat after the stock hold has lapsed gets a new order (and hold)
+@idempotency.idempotent(initiate_payment_fingerprint, ttl=int(stock.RESERVATION_TTL.total_seconds()))
+def initiate_payment(request):
+    if request.method != "POST":
+        return HttpResponseBadRequest("Invalid")
+
+    email = request.POST.get("email", "").strip()
+    if not email and request.user.is_authenticated:
+        email = request.user.email
+
+    if not email:
+        return JsonResponse({"error": "Email required"}, status=400)
+
+    cart = Cart(request)
+
+    # ================================
+    # ✅ BUY NOW PAYMENT MODE
+    # ================================
+    buy_id = request.session.get("buy_now_product_id")
+    buy_qty = request.session.get("buy_now_qty", 1)
+
+    if buy_id:
+        try:
+            product = Product.objects.get(id=int(buy_id), is_active=True)
+        except Product.DoesNotExist:
+            return JsonResponse({"error": "Invalid product"}, status=400)
+
+        total = product.price * int(buy_qty)
+        lines = [(product, product.price, int(buy_qty))]
+
+    # ================================
+    # ✅ NORMAL CART PAYMENT MODE
+    # ================================
+    else:
+        if len(cart) == 0:
+            return JsonResponse({"error": "Cart empty"}, status=400)
+
+        total = cart.get_total_price()
+        lines = [(item["product"], item["price"], item["quantity"]) for item in cart]
+
+    # order, items and stock hold commit together; nothing is kept if any product is short
+    try:
+        with transaction.atomic():
+            order = Order.objects.create(email=email, total_amount=total)
+            OrderItem.objects.bulk_create([
+                OrderItem(order=order, product=product, price=price, quantity=quantity)
+                for product, price, quantity in lines
+            ])
+            stock.reserve(order, [(product.id, quantity) for product, _, quantity in lines])
+    except stock.OutOfStock as exc:
+        name = next(p.name for p, _, _ in lines if p.id == exc.product_id)
+        return JsonResponse({"error": f"Only {exc.available} of {name} left in stock."}, status=409)
+
+    paise = int(total * 100)
+
+    # ================================
+    # RAZORPAY ORDER
+    # ================================
+    client = razorpay_client()
+
+    try:
+        rzp_order = offload.run(client.order.create, {
+            "amount": paise,
+            "currency": "INR",
+            "receipt": f"order_{order.id}",
+            "notes": {"order_id": str(order.id)}
+        })
+    except Exception:
+        stock.release([order.id])  # don't hold units until the TTL for an order that can't be paid
+        raise
+
+    order.razorpay_order_id = rzp_order["id"]
+    order.save()
+
+    return JsonResponse({
+        "razorpay_order_id": rzp_order["id"],
+        "order_id": order.id,
+        "amount": paise,
+        "currency": "INR",
+        "razorpay_key_id": settings.RAZORPAY_KEY_ID,
+    })
+
+def payment_handler_fingerprint(request):
+    keys = ("order_id", "razorpay_order_id", "razorpay_payment_id", "razorpay_signature")
+    values = tuple(request.POST.get(k) for k in keys)
+    return values if all(values) else None
+
+
+@csrf_exempt
+@idempotency.idempotent(payment_handler_fingerprint)
+def payment_handler(request):
+    if request.method != "POST":
+        return HttpResponseBadRequest("Invalid")
+
+    order_id = request.POST.get("order_id")
+    payment_id = request.POST.get("razorpay_payment_id")
+    signature = request.POST.get("razorpay_signature")
+    razorpay_order_id = request.POST.get("razorpay_order_id")
+
+    if not all([order_id, payment_id, signature, razorpay_order_id]):
+        return HttpResponseBadRequest("Missing params")
+
+    client = razorpay_client()
+
+    # only the Razorpay order id is covered by the signature, so it selects the row
+    order = Order.objects.filter(razorpay_order_id=razorpay_order_id, id=order_id)
+
+    try:
+        client.utility.verify_payment_signature({
+            "razorpay_order_id": razorpay_order_id,
+            "razorpay_payment_id": payment_id,
+            "razorpay_signature": signature
+        })
+    except:
+        order.update(status="failed")
+        stock.release(order)
+        idempotency.next_checkout_round(request)
+        return HttpResponseBadRequest("Signature failed")
+
+    # ✅ Mark order paid
+    with transaction.atomic():
+        order.update(
+            status="paid",
+            razorpay_payment_id=payment_id,
+            razorpay_signature=signature
+        )
+        stock.commit(order)
+
+    # ✅ CLEAR CART ONLY FOR NORMAL CART CHECKOUT
+    if not request.session.get("buy_now_product_id"):
+        Cart(request).clear()
+    idempotency.next_checkout_round(request)
+
+    return JsonResponse({"status": "paid"})
+
+
+@require_POST
+def clear_buy_now_session(request):
+    """
+    Called when Razorpay popup is dismissed.
+    Clears ONLY buy-now intent, not the cart.
+    """
+    request.session.pop("buy_now_product_id", None)
+    request.session.pop("buy_now_qty", None)
+    idempotency.next_checkout_round(request)  # paying again is a new attempt
+    request.session.modified = True
+    return JsonResponse({"cleared": True})
+
+
+# -------------------------
+# CHECKOUT SUCCESS
+# -------------------------
+def checkout_success(request):
+    # ✅ Clear ONLY buy-now session (cart must remain untouched)
+    request.session.pop("buy_now_product_id", None)
+    request.session.pop("buy_now_qty", None)
+    request.session.modified = True
+
+    return render(request, "shop/checkout_success.html")
@@ -0,0 +1,11 @@
+# shop/views/common.py
+
+
+def is_ajax_request(request):
+    """
+    Safe AJAX detection. Some clients set X-Requested-With header.
+    """
+    return (
+        request.headers.get("x-requested-with") == "XMLHttpRequest"
+        or request.META.get("HTTP_X_REQUESTED_WITH") == "XMLHttpRequest"
+    )
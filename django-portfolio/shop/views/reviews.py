@@ -0,0 +1,115 @@
+# shop/views/reviews.py
+from django.db import transaction
+from django.http import HttpResponse, HttpResponseBadRequest, JsonResponse
+from django.shortcuts import aget_object_or_404, get_object_or_404
+from django.template.loader import render_to_string
+from django.views.decorators.http import require_POST
+
+from .. import feeds, prerender, ratings
+from ..conditional import conditional_page, product_reviews_rss_state, site_reviews_rss_state
+from ..models import Feedback, Product
+from ..routers import replica_reads
+
+
+# -------------------------
+# PRODUCT FEEDBACK POST (AJAX)
+# -------------------------
+@require_POST
+def product_feedback(request, product_id):
+    """
+    Accepts JSON (application/json) or form POST.
+    Payload expected:
+      { rating: int(1-5), message: str, reviewer_name: str (optional), reviewer_email: str (optional) }
+    ('update' / 'feedback_id' from older clients are accepted and ignored.)
+
+    Behavior:
+      - Authenticated users have at most one review per product (unique
+        constraint); it is written with a single INSERT ... ON CONFLICT DO UPDATE.
+      - Anonymous submissions create a new Feedback (approved=False).
+
+    The response carries only the new/changed review as an HTML fragment
+    (when it is visible) plus the updated aggregates; the page patches the
+    DOM itself, so this costs the same whatever the number of reviews.
+    """
+    product = get_object_or_404(Product, id=product_id, is_active=True)
+
+    try:
+        if request.content_type and 'application/json' in request.content_type:
+            import json
+            payload = json.loads(request.body.decode('utf-8') or '{}')
+        else:
+            payload = request.POST
+        rating = int(payload.get('rating', 0))
+        message = (payload.get('message') or '').strip()
+        reviewer_name = (payload.get('reviewer_name') or '').strip()
+        reviewer_email = (payload.get('reviewer_email') or '').strip()
+    except Exception:
+        return HttpResponseBadRequest("Invalid payload")
+
+    if rating < 1 or rating > 5:
+        return JsonResponse({"success": False, "error": "Invalid rating"}, status=400)
+
+    if request.user.is_authenticated:
+        fb = Feedback(
+            product=product,
+            rating=rating,
+            message=message,
+            user=request.user,
+            reviewer_name=request.user.get_full_name() or request.user.get_username(),
+            reviewer_email=(request.user.email or ''),
+            approved=True,
+        )
+        Feedback.objects.bulk_create(
+            [fb],
+            update_conflicts=True,
+            unique_fields=['product', 'user'],
+            update_fields=['rating', 'message', 'reviewer_name', 'reviewer_email', 'approved', 'updated_at'],
+        )
+        # bulk_create sends no post_save: do what feedback_saved would (shop/signals.py)
+        feeds.invalidate_product(product.id)
+        rating = ratings.update([product.id])[product.id]
+        transaction.on_commit(lambda: prerender.reviews_changed([product.id]))
+        # the stored row: an update keeps its id and original created_at
+        fb = Feedback.objects.using("default").select_related("user").get(product=product, user=request.user)
+    else:
+        fb = Feedback.objects.create(
+            product=product,
+            rating=rating,
+            message=message,
+            reviewer_name=reviewer_name,
+            reviewer_email=reviewer_email,
+            approved=False
+        )
+        rating = ratings.summary(product)  # unchanged: the review awaits approval
+
+    message_text = "Review submitted."
+    if not fb.approved:
+        message_text = "Thanks — your review is submitted and will appear once approved."
+
+    return JsonResponse({
+        "success": True,
+        "approved": fb.approved,
+        "message": message_text,
+        "html": render_to_string('shop/review_item.html', {'r': fb}, request=request) if fb.approved else "",
+        "avg_rating": rating["avg"],
+        "review_count": rating["count"],
+        "feedback_id": fb.id,
+    })
+
+
+# -------------------------
+# RSS feed for product reviews
+# -------------------------
+@replica_reads
+@conditional_page(product_reviews_rss_state, private=False)
+async def product_reviews_rss(request, product_id):
+    """Rendered XML is cached per product; see shop/feeds.py for invalidation."""
+    product = await aget_object_or_404(Product.objects.only("id", "slug", "name"), id=product_id, is_active=True)
+    return HttpResponse(await feeds.aproduct_feed(request, product), content_type='application/rss+xml')
+
+
+@replica_reads
+@conditional_page(site_reviews_rss_state, private=False)
+async def reviews_rss(request):
+    """Site-wide feed, merged from the cached per-product items."""
+    return HttpResponse(await feeds.asite_feed(request), content_type='application/rss+xml')
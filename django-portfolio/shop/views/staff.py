@@ -0,0 +1,92 @@
+# shop/views/staff.py
+import os
+
+from django.contrib.admin.views.decorators import staff_member_required
+from django.http import FileResponse, Http404, HttpResponse
+from django.shortcuts import redirect, render
+from django.urls import reverse
+from django.views.decorators.http import require_http_methods
+
+from .. import memory, profiler
+
+DOWNLOADS = {
+    "prof": ".prof",            # pstats: python -m pstats, snakeviz
+    "collapsed": ".collapsed",  # flamegraph.pl, speedscope
+}
+
+
+# -------------------------
+# REQUEST PROFILES
+# -------------------------
+@staff_member_required
+def staff_profiles(request):
+    """Stored request profiles, newest first, and a fresh X-Profile token for curl / scripts."""
+    return render(request, "shop/staff_profiles.html", {
+        "profiles": profiler.entries(),
+        "token": profiler.make_token(request.user),
+        "token_hours": profiler.TOKEN_MAX_AGE // 3600,
+        "max_count": profiler.MAX_COUNT,
+        "max_mb": profiler.MAX_BYTES // (1024 * 1024),
+        "example_url": request.build_absolute_uri(reverse("shop:product_list")),
+    })
+
+
+@staff_member_required
+def staff_profile_download(request, profile_id, kind):
+    """A profile's .prof / .collapsed file, or ("text") its pstats summary."""
+    if not profiler.ID_RE.match(profile_id) or kind not in (*DOWNLOADS, "text"):
+        raise Http404
+    suffix = DOWNLOADS.get(kind, ".prof")
+    path = profiler.path_for(profile_id, suffix)
+    if not os.path.isfile(path):
+        raise Http404
+    profiler.touch(profile_id)
+    if kind == "text":
+        return HttpResponse(profiler.summary(profile_id), content_type="text/plain; charset=utf-8")
+    return FileResponse(open(path, "rb"), as_attachment=True, filename=profile_id + suffix)
+
+
+# -------------------------
+# MEMORY
+# -------------------------
+@staff_member_required
+@require_http_methods(["GET", "POST"])
+def staff_memory(request):
+    """
+    This worker's memory: RSS, tracemalloc snapshots and the growth between
+    the last two, in-process cache sizes, live model instances and requests
+    over the allocation budget. POST action=start / stop / snapshot / clear.
+    """
+    if request.method == "POST":
+        action = request.POST.get("action")
+        if action == "start":
+            memory.start()
+        elif action == "stop" and memory.tracing():
+            memory.stop()
+        elif action == "snapshot" and memory.tracing():
+            memory.snapshot(request.POST.get("label", "")[:80])
+        elif action == "clear":
+            memory.clear()
+        return redirect("shop:staff_memory")
+
+    snapshots = memory.snapshots()
+    top = request.GET.get("top", "")
+    limit = min(int(top), 200) if top.isdigit() else 25
+    if len(snapshots) >= 2:
+        growth = memory.diff(snapshots[-2]["snapshot"], snapshots[-1]["snapshot"], limit)
+    else:
+        growth = memory.top(snapshots[-1]["snapshot"], limit) if snapshots else []
+    current_rss, peak_rss = memory.rss()
+    return render(request, "shop/staff_memory.html", {
+        "pid": os.getpid(),
+        "rss": current_rss,
+        "peak_rss": peak_rss,
+        "tracing": memory.tracing(),
+        "snapshots": snapshots,
+        "growth": growth,
+        "is_diff": len(snapshots) >= 2,
+        "caches": memory.cache_sizes(),
+        "models": memory.live_models(),
+        "over_budget": memory.over_budget(50),
+        "budget_kb": memory.BUDGET // 1024,
+    })
@@ -0,0 +1,43 @@
+# shop/views/wishlist.py
+from django.contrib.auth.decorators import login_required
+from django.http import JsonResponse
+from django.shortcuts import get_object_or_404, render
+from django.views.decorators.http import require_POST
+
+from ..models import Product, Wishlist
+from .common import is_ajax_request
+
+
+@require_POST
+@login_required
+def toggle_wishlist(request, product_id):
+    if not is_ajax_request(request):
+        return JsonResponse({"error": "Invalid request"}, status=400)
+
+    product = get_object_or_404(Product, id=product_id)
+
+    wishlist_obj, created = Wishlist.objects.get_or_create(
+        user=request.user,
+        product=product
+    )
+
+    if not created:
+        wishlist_obj.delete()
+        return JsonResponse({"status": "removed"})
+
+    return JsonResponse({"status": "added"})
+
+
+
+
+# 
+
+from django.contrib.auth.decorators import login_required
+
+@login_required
+def wishlist_page(request):
+    items = Wishlist.objects.filter(user=request.user).select_related("product").order_by("-created_at")
+
+    return render(request, "shop/wishlist.html", {
+        "wishlist_items": items
+    })
@@ -0,0 +1,257 @@
+  /* ================= CSRF ================= */
+  function getCookie(name) {
+    const v = document.cookie.match('(^|;)\\s*' + name + '\\s*=\\s*([^;]+)');
+    return v ? v.pop() : '';
+  }
+
+  /* ================= ACCOUNT DROPDOWN (FIXED) ================= */
+  document.addEventListener("DOMContentLoaded", function () {
+    const accountBtn = document.getElementById("accountBtn");
+    const accountMenu = document.getElementById("accountMenu");
+
+    if (!accountBtn || !accountMenu) return;
+
+    // Toggle menu on button click
+    accountBtn.addEventListener("click", function (e) {
+      e.preventDefault();
+      e.stopPropagation(); // 🔥 VERY IMPORTANT
+      const isOpen = accountMenu.style.display === "block";
+      accountMenu.style.display = isOpen ? "none" : "block";
+      accountMenu.setAttribute("aria-hidden", isOpen ? "true" : "false");
+    });
+
+    // Close menu when clicking outside
+    document.addEventListener("click", function (e) {
+      if (!accountMenu.contains(e.target) && !accountBtn.contains(e.target)) {
+        accountMenu.style.display = "none";
+        accountMenu.setAttribute("aria-hidden", "true");
+      }
+    });
+  });
+
+
+/* ================= ADD TO CART (AJAX) – LOGIN SAFE ================= */
+document.addEventListener('click', async function (e) {
+  const addBtn = e.target.closest('button.add');
+  if (!addBtn) return;
+
+  e.preventDefault();
+  e.stopPropagation();
+
+  const form = addBtn.closest('form');
+  if (!form) return;
+
+  addBtn.disabled = true;
+
+  try {
+    const resp = await fetch(form.action, {
+      method: 'POST',
+      headers: {
+        'Content-Type': 'application/x-www-form-urlencoded',
+        'X-CSRFToken': getCookie('csrftoken'),
+        'X-Requested-With': 'XMLHttpRequest'
+      },
+      body: new URLSearchParams({ qty: 1 })
+    });
+
+    /* 🔐 LOGIN REQUIRED */
+    if (resp.status === 401) {
+      const data = await resp.json();
+      if (data.redirect_url) {
+        window.location.href = data.redirect_url;
+        return;
+      }
+    }
+
+    const data = await resp.json();
+
+    if (data.cart_count !== undefined) {
+      document.getElementById('cartCountBadge').textContent = data.cart_count;
+    }
+
+  } catch (err) {
+    console.error(err);
+  } finally {
+    addBtn.disabled = false;
+  }
+});
+
+
+
+
+/* ================= BUY NOW (LOGIN SAFE) ================= */
+document.addEventListener('click', async function (e) {
+  const buyBtn = e.target.closest('button.buy');
+  if (!buyBtn) return;
+
+  e.preventDefault();
+  e.stopPropagation();
+
+  const form = buyBtn.closest('form');
+  if (!form) return;
+
+  buyBtn.disabled = true;
+
+  try {
+    const resp = await fetch(form.action, {
+      method: 'POST',
+      headers: {
+        'Content-Type': 'application/x-www-form-urlencoded',
+        'X-CSRFToken': getCookie('csrftoken'),
+        'X-Requested-With': 'XMLHttpRequest'
+      },
+      body: new URLSearchParams({ qty: 1 })
+    });
+
+    /* 🔐 LOGIN REQUIRED */
+    if (resp.status === 401) {
+      const data = await resp.json();
+      if (data.redirect_url) {
+        window.location.href = data.redirect_url;
+        return;
+      }
+    }
+
+    /* ✅ Logged-in user → proceed to checkout */
+    window.location.href = "/shop/checkout/";
+
+  } catch (err) {
+    console.error("Buy Now failed", err);
+    buyBtn.disabled = false;
+  }
+});
+
+
+  /* ================= PAGE VISIBILITY REFRESH ================= */
+  (function () {
+    let wasHidden = false;
+    document.addEventListener("visibilitychange", function () {
+      if (document.visibilityState === "hidden") wasHidden = true;
+      if (document.visibilityState === "visible" && wasHidden) {
+        window.location.reload();
+      }
+    });
+  })();
+
+
+/* =====================================================
+   FRONTEND-ONLY LOGIN GUARD (NO BACKEND TOUCH)
+   ===================================================== */
+
+/* Django auth state + URLs come from <body data-*> (see base.html) */
+const SHOP_CFG = document.body.dataset;
+const IS_AUTHENTICATED = SHOP_CFG.authenticated === "1";
+
+/* 1️⃣ BUY NOW ANCHOR PROTECTION */
+document.addEventListener("click", function (e) {
+  const buyLink = e.target.closest("a.buy-link");
+  if (!buyLink) return;
+
+  if (!IS_AUTHENTICATED) {
+    e.preventDefault();
+    const nextUrl = buyLink.getAttribute("href");
+    window.location.href =
+      SHOP_CFG.loginUrl + "?next=" + encodeURIComponent(nextUrl);
+  }
+});
+
+/* 2️⃣ DIRECT CHECKOUT URL PROTECTION */
+(function () {
+  const path = window.location.pathname;
+  const isCheckout = path === "/shop/checkout/";
+
+  if (isCheckout && !IS_AUTHENTICATED) {
+    const nextUrl = window.location.pathname + window.location.search;
+    window.location.replace(
+      SHOP_CFG.loginUrl + "?next=" + encodeURIComponent(nextUrl)
+    );
+  }
+})();
+
+
+document.addEventListener("click", function (e) {
+  const heart = e.target.closest(".wishlist-heart");
+  if (!heart) return;
+
+  e.preventDefault();
+  e.stopPropagation();
+
+  const productId = heart.dataset.product;
+
+  fetch(`/shop/wishlist/toggle/${productId}/`, {
+    method: "POST",
+    credentials: "same-origin", // 🔥 REQUIRED
+    headers: {
+      "X-CSRFToken": getCookie("csrftoken"),
+      "X-Requested-With": "XMLHttpRequest"
+    }
+  })
+  .then(res => {
+    if (res.status === 403 || res.status === 401) {
+      window.location.href = SHOP_CFG.loginUrl + "?next=" + window.location.pathname;
+      return;
+    }
+    return res.json();
+  })
+  .then(data => {
+    if (!data) return;
+    heart.classList.toggle("active", data.status === "added");
+  })
+  .catch(err => console.error("Wishlist error:", err));
+});
+
+
+(function () {
+  const searchInput = document.querySelector('.floating-search input[name="q"]');
+  const mainContent = document.querySelector('main');
+
+  if (!searchInput || !mainContent) return;
+
+  let controller = null;
+
+  function highlight(text, keyword) {
+    if (!keyword) return text;
+    const regex = new RegExp(`(${keyword})`, 'gi');
+    return text.replace(regex, '<span class="highlight">$1</span>');
+  }
+
+  async function performSearch(query) {
+    if (controller) controller.abort();
+    controller = new AbortController();
+
+    if (!query.trim()) {
+      window.location.href = SHOP_CFG.productListUrl;
+      return;
+    }
+
+    try {
+      const resp = await fetch(
+        `${SHOP_CFG.searchUrl}?q=${encodeURIComponent(query)}`,
+        {
+          headers: { "X-Requested-With": "XMLHttpRequest" },
+          signal: controller.signal
+        }
+      );
+
+      if (!resp.ok) return;
+
+      const html = await resp.text();
+      mainContent.innerHTML = html;
+
+      /* ✨ Highlight matches */
+      document.querySelectorAll('.product-name').forEach(el => {
+        el.innerHTML = highlight(el.textContent, query);
+      });
+
+    } catch (err) {
+      if (err.name !== "AbortError") console.error(err);
+    }
+  }
+
+  let debounceTimer;
+  searchInput.addEventListener('input', function () {
+    clearTimeout(debounceTimer);
+    const q = this.value;
+    debounceTimer = setTimeout(() => performSearch(q), 250);
+  });
+})();
@@ -0,0 +1,287 @@
+/* Helper: get csrftoken from cookie */
+function getCookie(name) {
+  const v = document.cookie.match('(^|;)\\s*' + name + '\\s*=\\s*([^;]+)');
+  return v ? v.pop() : '';
+}
+function parseHTML(str) {
+  const parser = new DOMParser();
+  return parser.parseFromString(str, 'text/html');
+}
+
+document.addEventListener("DOMContentLoaded", () => {
+  // ============ cart qty controls (same as before) ============
+  const qtyInput = document.getElementById('qty-input');
+  const btnDec = document.getElementById('qty-decrease');
+  const btnInc = document.getElementById('qty-increase');
+  const buyQtyHidden = document.getElementById('buy-qty');
+  const addCartBtn = document.getElementById('addCartBtn');
+  const addCartForm = document.getElementById('addCartForm');
+  const addedFlash = document.getElementById('addedFlash');
+
+  function sanitizeQty() {
+    if (!qtyInput) return 1;
+    let v = parseInt(qtyInput.value, 10);
+    if (isNaN(v) || v < 1) v = 1;
+    qtyInput.value = v;
+    if (buyQtyHidden) buyQtyHidden.value = v;
+    return v;
+  }
+
+  if (btnDec) btnDec.addEventListener('click', () => { let v = sanitizeQty(); if (v > 1) { qtyInput.value = v - 1; if (buyQtyHidden) buyQtyHidden.value = v - 1; } });
+  if (btnInc) btnInc.addEventListener('click', () => { let v = sanitizeQty(); qtyInput.value = v + 1; if (buyQtyHidden) buyQtyHidden.value = v + 1; });
+  if (qtyInput) { qtyInput.addEventListener('blur', sanitizeQty); qtyInput.addEventListener('input', () => { const f = qtyInput.value.replace(/[^\d]/g, ''); if (f !== qtyInput.value) qtyInput.value = f; if (buyQtyHidden) buyQtyHidden.value = qtyInput.value || 1; }); }
+
+  if (addCartBtn && addCartForm) {
+    addCartBtn.addEventListener('click', async (e) => {
+      e.preventDefault();
+      const url = addCartForm.action;
+      const qty = sanitizeQty();
+      try {
+        addCartBtn.disabled = true;
+        addCartBtn.textContent = 'Adding...';
+        const resp = await fetch(url, {
+          method: 'POST',
+          credentials: 'same-origin',
+          headers: {
+            'Content-Type': 'application/x-www-form-urlencoded',
+            'X-CSRFToken': getCookie('csrftoken'),
+            'X-Requested-With': 'XMLHttpRequest'
+          },
+          body: new URLSearchParams({ qty: qty })
+        });
+
+        /* 🔐 LOGIN REQUIRED */
+        if (resp.status === 401) {
+          const data = await resp.json();
+          if (data.redirect_url) {
+            window.location.href = data.redirect_url;
+            return;
+          }
+        }
+
+        if (!resp.ok) throw new Error('Network');
+        const data = await resp.json();
+        if (data && data.success) {
+          if (addedFlash) { addedFlash.classList.add('show'); setTimeout(() => addedFlash.classList.remove('show'), 1400); }
+          addCartBtn.textContent = 'Added';
+          setTimeout(() => { addCartBtn.textContent = '🛒 Add to Cart'; addCartBtn.disabled = false; }, 1100);
+          if (data.cart_count !== undefined) { const el = document.querySelector('#cartCountBadge'); if (el) el.textContent = data.cart_count; }
+        } else { throw new Error(data && data.error ? data.error : 'Failed'); }
+      } catch (err) {
+        console.error(err);
+        addCartBtn.textContent = 'Try again';
+        setTimeout(() => { addCartBtn.textContent = '🛒 Add to Cart'; addCartBtn.disabled = false; }, 1400);
+      }
+    });
+  }
+
+  const buyForm = document.getElementById('buyNowForm'); if (buyForm) buyForm.addEventListener('submit', () => sanitizeQty());
+
+  // description toggle
+  const toggle = document.getElementById("toggleDesc");
+  const shortDesc = document.getElementById("short-desc");
+  const fullDesc = document.getElementById("full-desc");
+  if (toggle && shortDesc && fullDesc) {
+    toggle.addEventListener('click', () => {
+      if (fullDesc.style.display === "none") { fullDesc.style.display = "inline"; shortDesc.style.display = "none"; toggle.textContent = "Show Less"; }
+      else { fullDesc.style.display = "none"; shortDesc.style.display = "inline"; toggle.textContent = "Know More ▾"; }
+    });
+    toggle.addEventListener("keydown", (e) => { if (e.key === 'Enter' || e.key === ' ') { e.preventDefault(); toggle.click(); } });
+  }
+
+  // ========== feedback UI ==========
+  const stars = Array.from(document.querySelectorAll('.star'));
+  const feedbackMsg = document.getElementById('feedbackMsg');
+  const feedbackStatus = document.getElementById('feedbackStatus');
+  const feedbackTextarea = document.getElementById('feedbackMessage');
+  const submitBtn = document.getElementById('submitFeedback');
+  const clearBtn = document.getElementById('clearFeedback');
+  const cfgEl = document.getElementById('feedbackConfig');
+  const postUrl = cfgEl ? cfgEl.dataset.postUrl : null;
+  const existingId = cfgEl ? (cfgEl.dataset.existingId || '') : '';
+  const existingRating = cfgEl ? (cfgEl.dataset.existingRating || '') : '';
+
+  let currentRating = 0;
+  if (existingRating) { try { currentRating = parseInt(existingRating, 10) || 0; } catch (e) { currentRating = 0; } }
+  function updateStarUI(r) {
+    if (!stars || !stars.length) return;
+    stars.forEach(s => {
+      const v = parseInt(s.dataset.value, 10);
+      if (v <= r) { s.classList.remove('empty'); s.classList.add('filled'); s.setAttribute('aria-checked', 'true'); }
+      else { s.classList.remove('filled'); s.classList.add('empty'); s.setAttribute('aria-checked', 'false'); }
+    });
+  }
+  if (currentRating) updateStarUI(currentRating);
+
+  if (stars && stars.length) {
+    stars.forEach(s => {
+      s.addEventListener('click', () => { currentRating = parseInt(s.dataset.value, 10); updateStarUI(currentRating); if (feedbackMsg) feedbackMsg.textContent = ''; });
+      s.addEventListener('keydown', (ev) => {
+        if (ev.key === 'Enter' || ev.key === ' ') { ev.preventDefault(); currentRating = parseInt(s.dataset.value, 10); updateStarUI(currentRating); if (feedbackMsg) feedbackMsg.textContent = ''; }
+        if (ev.key === 'ArrowLeft') { ev.preventDefault(); currentRating = Math.max(1, (currentRating || 1) - 1); updateStarUI(currentRating); }
+        if (ev.key === 'ArrowRight') { ev.preventDefault(); currentRating = Math.min(5, (currentRating || 0) + 1); updateStarUI(currentRating); }
+      });
+    });
+  }
+
+  if (clearBtn) {
+    clearBtn.addEventListener('click', () => {
+      currentRating = 0; updateStarUI(0); if (feedbackTextarea) feedbackTextarea.value = ''; if (feedbackMsg) feedbackMsg.textContent = ''; if (feedbackStatus) feedbackStatus.textContent = '';
+      const ni = document.getElementById('reviewer_name'), ei = document.getElementById('reviewer_email'); if (ni) ni.value = ''; if (ei) ei.value = '';
+    });
+  }
+
+  function getAnonReviewer() {
+    const nameEl = document.getElementById('reviewer_name'), emailEl = document.getElementById('reviewer_email');
+    return { name: nameEl ? nameEl.value.trim() : '', email: emailEl ? emailEl.value.trim() : '' };
+  }
+
+  if (submitBtn) {
+    submitBtn.addEventListener('click', async (ev) => {
+      ev.preventDefault();
+      if (!currentRating || currentRating < 1) {
+        if (feedbackMsg) { feedbackMsg.textContent = 'Please select a star rating (1–5).'; feedbackMsg.style.color = '#b00020'; }
+        return;
+      }
+      if (!postUrl) { if (feedbackMsg) { feedbackMsg.textContent = 'Configuration error (no endpoint).'; feedbackMsg.style.color = '#b00020'; } return; }
+
+      submitBtn.disabled = true;
+      const origText = submitBtn.textContent;
+      submitBtn.textContent = 'Submitting...';
+      if (feedbackMsg) feedbackMsg.textContent = ''; if (feedbackStatus) feedbackStatus.textContent = '';
+
+      const payload = { rating: currentRating, message: (feedbackTextarea ? feedbackTextarea.value.trim() : '') };
+      const anon = getAnonReviewer();
+      if (anon.name) payload.reviewer_name = anon.name;
+      if (anon.email) payload.reviewer_email = anon.email;
+      if (existingId) { payload.feedback_id = existingId; payload.update = true; }
+
+      try {
+        const resp = await fetch(postUrl, {
+          method: 'POST', credentials: 'same-origin',
+          headers: { 'Content-Type': 'application/json', 'X-CSRFToken': getCookie('csrftoken'), 'X-Requested-With': 'XMLHttpRequest' },
+          body: JSON.stringify(payload)
+        });
+        if (!resp.ok) {
+          const txt = await resp.text().catch(() => null);
+          throw new Error(txt || 'Server error');
+        }
+        const data = await resp.json().catch(() => ({ success: true }));
+        if (data && data.success) {
+          if (feedbackStatus) { feedbackStatus.textContent = data.message || (data.approved ? 'Thanks — review submitted!' : 'Thanks — review submitted (pending approval).'); feedbackStatus.style.color = data.approved ? '#05683b' : '#0b63d6'; }
+
+          // patch the single review in place (server sends only that <li>)
+          if (data.html) {
+            const block = document.getElementById('reviewsBlock');
+            const old = document.querySelector('.review-item[data-review-id="' + data.feedback_id + '"]');
+            const fresh = parseHTML('<ul>' + data.html + '</ul>').querySelector('li');
+            if (old && fresh) {
+              old.replaceWith(fresh);
+            } else if (block && fresh) {
+              let list = block.querySelector('ul');
+              if (!list) {
+                block.innerHTML = '';
+                list = document.createElement('ul');
+                list.style.cssText = 'list-style:none;padding:0;margin:0;';
+                block.appendChild(list);
+              }
+              list.prepend(fresh);
+            }
+          }
+          const summary = document.getElementById('reviewSummary');
+          if (summary && typeof data.avg_rating !== 'undefined') {
+            summary.textContent = parseFloat(data.avg_rating).toFixed(1) + ' ★ • ' + data.review_count + ' reviews';
+          }
+
+          // try update JSON-LD (best effort)
+          try {
+            if (typeof data.avg_rating !== 'undefined' && typeof data.review_count !== 'undefined') {
+              const ld = document.querySelector('script[type="application/ld+json"]');
+              if (ld) {
+                const obj = JSON.parse(ld.textContent);
+                obj.aggregateRating = { "@type": "AggregateRating", "ratingValue": String(parseFloat(data.avg_rating).toFixed(1)), "reviewCount": String(data.review_count) };
+                ld.textContent = JSON.stringify(obj);
+              }
+            }
+          } catch (e) { }
+
+          // clear UI fields
+          currentRating = 0; updateStarUI(0); if (feedbackTextarea) feedbackTextarea.value = ''; const ni = document.getElementById('reviewer_name'), ei = document.getElementById('reviewer_email'); if (ni) ni.value = ''; if (ei) ei.value = '';
+        } else {
+          throw new Error(data && data.error ? data.error : 'Failed to submit');
+        }
+      } catch (err) {
+        console.error('Feedback submit error', err);
+        if (feedbackMsg) { feedbackMsg.textContent = 'Could not submit review. Try again later.'; feedbackMsg.style.color = '#b00020'; }
+      } finally {
+        submitBtn.disabled = false; submitBtn.textContent = origText;
+      }
+    });
+  }
+
+  // ====== Reviews "See more" pagination ======
+  const seeMoreBtn = document.getElementById('seeMoreReviews');
+  if (seeMoreBtn) {
+    seeMoreBtn.addEventListener('click', async () => {
+      const cur = parseInt(seeMoreBtn.dataset.currentPage || '1', 10);
+      const total = parseInt(seeMoreBtn.dataset.totalPages || '1', 10);
+      if (cur >= total) { seeMoreBtn.style.display = 'none'; return; }
+      const next = cur + 1;
+      seeMoreBtn.disabled = true;
+      seeMoreBtn.textContent = 'Loading...';
+      try {
+        const base = window.location.pathname;
+        const resp = await fetch(base + '?rpage=' + next, { credentials: 'same-origin', headers: { 'X-Requested-With': 'XMLHttpRequest' } });
+        if (!resp.ok) throw new Error('Network error while loading reviews');
+        const text = await resp.text();
+        const doc = parseHTML(text);
+        const newWrapper = doc.querySelector('#reviewsWrapper');
+        if (newWrapper) {
+          const wrapper = document.getElementById('reviewsWrapper');
+          const incomingItems = Array.from(newWrapper.children);
+          if (wrapper && incomingItems.length) incomingItems.forEach(ch => wrapper.appendChild(ch));
+          else if (wrapper) wrapper.innerHTML = newWrapper.innerHTML;
+        } else {
+          const fallback = doc.querySelector('.reviews-list');
+          if (fallback && document.getElementById('reviewsWrapper')) document.getElementById('reviewsWrapper').innerHTML = fallback.innerHTML;
+        }
+        seeMoreBtn.dataset.currentPage = next;
+        if (next >= total) seeMoreBtn.style.display = 'none';
+        else seeMoreBtn.textContent = 'See more reviews';
+      } catch (err) {
+        console.error(err);
+        seeMoreBtn.textContent = 'Could not load. Try again';
+        setTimeout(() => seeMoreBtn.textContent = 'See more reviews', 1500);
+      } finally {
+        seeMoreBtn.disabled = false;
+      }
+    });
+  }
+
+  // ====== Related products client-side pager ======
+  const relatedScroll = document.getElementById('relatedScroll');
+  const relPager = document.getElementById('relatedPager');
+  if (relatedScroll) {
+    const cards = Array.from(relatedScroll.querySelectorAll('.card'));
+    const pageSize = 8; // items per page
+    let relPage = 0;
+    const totalRelPages = Math.max(1, Math.ceil(cards.length / pageSize));
+    const relPrev = document.getElementById('relPrev');
+    const relNext = document.getElementById('relNext');
+    const relPageInfo = document.getElementById('relPageInfo');
+
+    function showRelPage(n) {
+      relPage = Math.max(0, Math.min(totalRelPages - 1, n));
+      cards.forEach((c, idx) => { c.style.display = (idx >= relPage * pageSize && idx < (relPage + 1) * pageSize) ? 'block' : 'none'; });
+      if (relPager) relPager.style.display = (totalRelPages > 1) ? 'flex' : 'none';
+      if (relPageInfo) relPageInfo.textContent = (relPage + 1) + ' / ' + totalRelPages;
+      if (relPrev) relPrev.disabled = (relPage <= 0);
+      if (relNext) relNext.disabled = (relPage >= totalRelPages - 1);
+    }
+
+    showRelPage(0);
+    if (relPrev) relPrev.addEventListener('click', () => showRelPage(relPage - 1));
+    if (relNext) relNext.addEventListener('click', () => showRelPage(relPage + 1));
+  }
+
+}); // end DOMContentLoaded